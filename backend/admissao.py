@@ -0,0 +1,211 @@
+# -- coding: utf-8 --
+"""
+Controle de admissão dos requests.
+
+Protege o banco quando um usuário dispara muitas listagens completas ao
+mesmo tempo, antes que ele ocupe todos os workers do Gunicorn:
+
+  - limite por identidade (o 'sub' do JWT, ou o IP para rotas sem token):
+    um balde de ADMISSAO_RAJADA fichas, reposto a ADMISSAO_TAXA fichas por
+    segundo. Cada request gasta uma ficha e as rotas marcadas com @pesada
+    gastam ADMISSAO_CUSTO_PESADA. Balde vazio: 429 com Retry-After;
+  - vagas simultâneas separadas para rotas pesadas e leves
+    (ADMISSAO_CONCORRENCIA_PESADA / _LEVE). Sem vaga: 503 na hora, sem fila.
+    Rotas marcadas com @sem_vaga (o stream SSE, que fica aberto por minutos)
+    só passam pelo limite por identidade.
+
+Os contadores ficam em memória compartilhada (multiprocessing) criada em
+create_app(): com o GUNICORN_PRELOAD padrão dos workers sync ela é criada
+no mestre e herdada por todos os workers, e os limites valem para o
+servidor inteiro. Sem preload (eventlet) cada processo tem os seus.
+
+A trava que protege os contadores é um lock POSIX (fcntl) num arquivo
+temporário, mais uma trava de threads dentro de cada processo: se um worker
+morre segurando a trava (timeout do Gunicorn, OOM), o kernel a libera na
+hora, e os demais nunca ficam sem controle de admissão nem esperando por ela.
+
+As identidades são espalhadas por _BALDES baldes pelo crc32; duas
+identidades no mesmo balde dividem o limite (raro com a quantidade de
+funcionários de uma loja). Cada vaga guarda o pid do worker que a ocupa, e
+vagas de workers mortos pelo timeout do Gunicorn são recuperadas quando as
+demais estão ocupadas.
+"""
+import fcntl
+import math
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import zlib
+
+from flask import g, jsonify, request
+from flask_jwt_extended import decode_token
+
+_BALDES = 4096
+
+
+def pesada(f):
+    """Marca a rota como pesada: gasta mais fichas e usa as vagas de rotas pesadas."""
+    f.admissao = 'pesada'
+    return f
+
+
+def sem_vaga(f):
+    """Marca a rota como de longa duração: não ocupa vaga simultânea."""
+    f.admissao = 'sem_vaga'
+    return f
+
+
+class _Contadores:
+    """Baldes de fichas e vagas simultâneas na memória compartilhada."""
+
+    def __init__(self, taxa, rajada, vagas):
+        self.taxa = taxa
+        self.rajada = rajada
+        self._trava = _TravaCompartilhada()
+        # Fichas e instante da última reposição de cada balde. Instante 0 = balde cheio.
+        self._fichas = multiprocessing.Array('d', _BALDES, lock=False)
+        self._instantes = multiprocessing.Array('d', _BALDES, lock=False)
+        # classe -> pid do worker em cada vaga (0 = livre)
+        self._vagas = {classe: multiprocessing.Array('i', total, lock=False) for classe, total in vagas.items()}
+
+    def consumir(self, identidade, custo):
+        """
+        Gasta 'custo' fichas do balde da identidade. Devolve 0 se o request
+        foi admitido, ou os segundos até haver fichas suficientes.
+        """
+        balde = zlib.crc32(identidade.encode('utf-8')) % _BALDES
+        custo = min(custo, self.rajada)
+        with self._trava:
+            agora = time.monotonic()
+            if self._instantes[balde] == 0:
+                fichas = self.rajada
+            else:
+                fichas = min(self.rajada, self._fichas[balde] + (agora - self._instantes[balde]) * self.taxa)
+            self._instantes[balde] = agora
+            if fichas < custo:
+                self._fichas[balde] = fichas
+                return (custo - fichas) / self.taxa
+            self._fichas[balde] = fichas - custo
+            return 0
+
+    def ocupar(self, classe):
+        """Índice da vaga ocupada, ou None se todas estão em uso."""
+        vagas = self._vagas[classe]
+        with self._trava:
+            pid = os.getpid()
+            for i, dono in enumerate(vagas):
+                if dono == 0:
+                    vagas[i] = pid
+                    return i
+            # Todas ocupadas: recupera as de workers que morreram sem liberar
+            for i, dono in enumerate(vagas):
+                if dono != pid and not _processo_vivo(dono):
+                    print(f"Admissão: vaga {classe} {i} recuperada do worker {dono}, que não existe mais.")
+                    vagas[i] = pid
+                    return i
+            return None
+
+    def liberar(self, classe, vaga):
+        # Só o dono escreve na vaga ocupada: não precisa da trava
+        self._vagas[classe][vaga] = 0
+
+
+class _TravaCompartilhada:
+    """
+    Trava entre processos que o kernel libera quando o dono morre. O lock
+    do fcntl é por processo (as threads de um worker o compartilham), então
+    cada processo também tem a sua trava de threads, recriada no fork.
+    """
+
+    def __init__(self):
+        # Já removido do disco: o descritor herdado pelos workers basta
+        self._arquivo = tempfile.TemporaryFile(prefix='admissao-')
+        self._threads = threading.Lock()
+        os.register_at_fork(after_in_child=self._reiniciar)
+
+    def _reiniciar(self):
+        self._threads = threading.Lock()
+
+    def __enter__(self):
+        self._threads.acquire()
+        try:
+            fcntl.lockf(self._arquivo, fcntl.LOCK_EX)
+        except BaseException:
+            self._threads.release()
+            raise
+        return self
+
+    def __exit__(self, *_):
+        try:
+            fcntl.lockf(self._arquivo, fcntl.LOCK_UN)
+        finally:
+            self._threads.release()
+
+
+def _processo_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _identidade():
+    """
+    'sub' do JWT do request ou, sem token válido, o IP (a própria rota
+    responde o 401). Só decodifica o token: o usuário não é carregado do
+    banco, o que o @jwt_required() da rota já faz.
+    """
+    cabecalho = request.headers.get('Authorization', '')
+    # O stream SSE recebe o token em ?token=
+    token = cabecalho[7:] if cabecalho.startswith('Bearer ') else request.args.get('token')
+    if token:
+        try:
+            return f"usuario:{decode_token(token)['sub']}"
+        except Exception:
+            pass
+    return f'ip:{request.remote_addr}'
+
+
+def init_app(app):
+    if not app.config['ADMISSAO_ATIVA']:
+        return
+    custos = {'pesada': app.config['ADMISSAO_CUSTO_PESADA'], 'leve': 1, 'sem_vaga': 1}
+    contadores = _Contadores(app.config['ADMISSAO_TAXA'], app.config['ADMISSAO_RAJADA'], {
+        'pesada': app.config['ADMISSAO_CONCORRENCIA_PESADA'],
+        'leve': app.config['ADMISSAO_CONCORRENCIA_LEVE'],
+    })
+    app.extensions['admissao'] = contadores
+
+    @app.before_request
+    def admitir():
+        # O preflight do CORS não chega à rota
+        if request.method == 'OPTIONS' or request.endpoint is None:
+            return None
+        classe = getattr(app.view_functions.get(request.endpoint), 'admissao', 'leve')
+
+        espera = contadores.consumir(_identidade(), custos[classe])
+        if espera:
+            segundos = math.ceil(espera)
+            resposta = jsonify({"erro": f"Muitas requisições. Tente novamente em {segundos} s."})
+            resposta.headers['Retry-After'] = str(segundos)
+            return resposta, 429
+
+        if classe != 'sem_vaga':
+            vaga = contadores.ocupar(classe)
+            if vaga is None:
+                resposta = jsonify({"erro": "Servidor ocupado. Tente novamente em instantes."})
+                resposta.headers['Retry-After'] = '1'
+                return resposta, 503
+            g.vaga_admissao = (classe, vaga)
+        return None
+
+    @app.teardown_request
+    def liberar(_erro):
+        vaga = g.pop('vaga_admissao', None)
+        if vaga:
+            contadores.liberar(*vaga)
@@ -0,0 +1,190 @@
+# -- coding: utf-8 --
+"""
+Registro das alterações de Clientes, Mármores, Estoque, Orçamentos e
+Movimentações na outbox (tabela 'alteracoes').
+
+Um listener de after_flush grava, na mesma transação da alteração, uma
+linha por objeto criado, alterado ou excluído, com os valores das colunas
+já carregados no objeto. Assim o feed só publica o que foi de fato
+commitado e os clientes aplicam os deltas sem recarregar as tabelas.
+
+Comandos em massa (query.delete()/update(), upserts) não passam pelo
+flush: quem os usa registra as alterações com registrar_exclusoes() e
+registrar_gravacoes().
+
+O id (a versão) é atribuído no INSERT, não no commit: uma transação com id
+menor pode terminar depois de outra com id maior. Por isso o feed e o sync
+só entregam versões até versao_visivel(), e a limpeza guarda até onde
+apagou para historico_expirado() não confundir ids pulados (rollbacks)
+com histórico removido.
+"""
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import click
+from flask import current_app
+from sqlalchemy import event, inspect, insert
+from sqlalchemy.orm import Session
+
+from auditoria import anotar
+from extensions import db
+from filiais import filial_para_gravar
+from models import Alteracoes, Clientes, Estoque, MarcasProcessamento, Marmores, Movimentacoes_Estoque, Orcamentos
+
+# Modelo -> nome da entidade no feed
+ENTIDADES = {
+    Clientes: 'clientes',
+    Marmores: 'marmores',
+    Estoque: 'estoque',
+    Orcamentos: 'orcamentos',
+    Movimentacoes_Estoque: 'movimentacoes_estoque',
+}
+
+# Em marcas_processamento: maior id já apagado pela limpeza
+MARCA_LIMPEZA = 'alteracoes:limpeza'
+
+
+def _valor_json(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def _dados(obj):
+    # Só o que já está carregado: ler um atributo expirado dispararia um
+    # SELECT no meio do flush (ex.: colunas atribuídas com current_timestamp()).
+    estado = inspect(obj)
+    return {
+        coluna.key: _valor_json(estado.dict[coluna.key])
+        for coluna in estado.mapper.column_attrs
+        if coluna.key in estado.dict and not hasattr(estado.dict[coluna.key], '__clause_element__')
+    }
+
+
+def _filial(obj):
+    # A do próprio objeto: comandos fora de request (ex.: expirar reservas) alteram linhas de todas as filiais
+    filial = inspect(obj).dict.get('filial_id')
+    return filial_para_gravar() if filial is None else filial
+
+
+def _linha(entidade, entidade_id, operacao, dados=None, filial_id=None):
+    return {
+        'filial_id': filial_para_gravar() if filial_id is None else filial_id,
+        'entidade': entidade,
+        'entidade_id': entidade_id,
+        'operacao': operacao,
+        'dados': json.dumps(dados) if dados is not None else None,
+    }
+
+
+@event.listens_for(Session, 'before_flush')
+def _selecionar_alterados(session, flush_context, instances):
+    # Decidido antes do flush: atributos atribuídos com expressões SQL
+    # (ex.: arquivado_em = current_timestamp()) já chegam expirados ao
+    # after_flush, e is_modified() deixaria a alteração de fora.
+    session.info['alteracoes_atualizados'] = [
+        obj for obj in session.dirty
+        if type(obj) in ENTIDADES and session.is_modified(obj, include_collections=False)
+    ]
+
+
+@event.listens_for(Session, 'after_flush')
+def _registrar_alteracoes(session, flush_context):
+    atualizados = session.info.pop('alteracoes_atualizados', [])
+    linhas = []
+    for operacao, objetos in (('criado', session.new), ('atualizado', atualizados), ('excluido', session.deleted)):
+        for obj in objetos:
+            entidade = ENTIDADES.get(type(obj))
+            if entidade is None:
+                continue
+            linhas.append(_linha(entidade, obj.id, operacao, None if operacao == 'excluido' else _dados(obj),
+                                 _filial(obj)))
+    if linhas:
+        session.connection().execute(insert(Alteracoes), linhas)
+
+
+def registrar_exclusoes(session, model, ids):
+    """Registra exclusões feitas com comandos em massa, na transação da sessão (e na auditoria)."""
+    entidade = ENTIDADES.get(model)
+    if entidade and ids:
+        session.connection().execute(insert(Alteracoes), [_linha(entidade, id_, 'excluido') for id_ in ids])
+        for id_ in ids:
+            anotar(session, entidade, id_, 'excluido')
+
+
+def registrar_gravacoes(session, objetos, operacao, antes=None):
+    """
+    Registra objetos criados ou atualizados com comandos em massa (ex.:
+    upsert), na transação da sessão (e na auditoria, só com os valores depois).
+    Com 'antes' ({id: {coluna: valor anterior}}), a auditoria desses objetos
+    recebe só as colunas alteradas, antes e depois, como no flush.
+    """
+    antes = antes or {}
+    gravados = [(ENTIDADES[type(obj)], obj.id, _dados(obj), _filial(obj)) for obj in objetos if type(obj) in ENTIDADES]
+    if gravados:
+        session.connection().execute(insert(Alteracoes), [_linha(entidade, id_, operacao, dados, filial)
+                                                          for entidade, id_, dados, filial in gravados])
+        for entidade, id_, dados, filial in gravados:
+            if id_ in antes:
+                anotar(session, entidade, id_, operacao, antes=antes[id_],
+                       depois={coluna: dados.get(coluna) for coluna in antes[id_]}, filial_id=filial)
+            else:
+                anotar(session, entidade, id_, operacao, depois=dados, filial_id=filial)
+
+
+def versao_visivel():
+    """
+    Maior versão que pode ser entregue: a anterior à primeira alteração com
+    menos de ALTERACOES_MARGEM_SEGUNDOS (no relógio do banco). Alterações
+    mais novas, e as de id maior que elas, ficam para o próximo pedido, para
+    que um commit atrasado com id menor não seja pulado pelos clientes.
+    Versões são globais: o corte vale para todas as filiais.
+    """
+    margem = current_app.config['ALTERACOES_MARGEM_SEGUNDOS']
+    agora, maior = (db.session.query(db.func.current_timestamp(), db.func.max(Alteracoes.id))
+                    .execution_options(todas_as_filiais=True).one())
+    recente = (db.session.query(db.func.min(Alteracoes.id))
+               .filter(Alteracoes.criado_em >= agora - timedelta(seconds=margem))
+               .execution_options(todas_as_filiais=True).scalar())
+    if recente is not None:
+        return recente - 1
+    return maior or 0
+
+
+def historico_expirado(desde):
+    """True se a limpeza já apagou alterações posteriores a 'desde'."""
+    marca = db.session.get(MarcasProcessamento, MARCA_LIMPEZA)
+    return marca is not None and desde < marca.ultimo_id
+
+
+@click.group('alteracoes')
+def comandos():
+    """Outbox de alterações."""
+
+
+@comandos.command('limpar')
+@click.option('--dias', type=int, default=None, help='Mantém os últimos N dias (padrão: ALTERACOES_RETENCAO_DIAS).')
+def limpar(dias):
+    """Remove alterações antigas; clientes com versão anterior recebem 410 e recarregam tudo."""
+    dias = dias if dias is not None else current_app.config['ALTERACOES_RETENCAO_DIAS']
+    limite = datetime.now() - timedelta(days=dias)
+    # Apaga uma faixa contínua de ids e guarda o fim dela: é o que
+    # historico_expirado() compara com a versão dos clientes
+    corte = (db.session.query(db.func.max(Alteracoes.id)).filter(Alteracoes.criado_em < limite)
+             .execution_options(todas_as_filiais=True).scalar())
+    if corte is None:
+        click.echo('0 alteração(ões) removida(s).')
+        return
+    removidas = (Alteracoes.query.filter(Alteracoes.id <= corte)
+                 .execution_options(todas_as_filiais=True).delete(synchronize_session=False))
+    marca = db.session.get(MarcasProcessamento, MARCA_LIMPEZA)
+    if marca is None:
+        marca = MarcasProcessamento(nome=MARCA_LIMPEZA, ultimo_id=0)
+        db.session.add(marca)
+    marca.ultimo_id = max(marca.ultimo_id or 0, corte)
+    marca.atualizado_em = datetime.now()
+    db.session.commit()
+    click.echo(f'{removidas} alteração(ões) removida(s).')
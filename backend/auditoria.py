@@ -0,0 +1,244 @@
+# -- coding: utf-8 --
+"""
+Trilha de auditoria: quem alterou o quê em Clientes, Mármores, Estoque,
+Orçamentos e Movimentações.
+
+Um listener de after_flush anota cada objeto criado, alterado ou excluído
+com o funcionário do token (nas tarefas em segundo plano, o de
+em_nome_de()) e os valores antes e depois: só as colunas que mudaram nas
+alterações, todas as carregadas nas criações e exclusões. As anotações
+ficam na sessão até o commit (o rollback as descarta) e vão de uma vez
+para a fila do processo; uma thread grava a fila na tabela 'auditoria' em
+lotes de AUDITORIA_TAMANHO_LOTE linhas por INSERT. No request fica só o
+custo de copiar os valores: a serialização e o banco são da thread.
+
+A gravação não faz parte da transação da alteração. Com a fila cheia
+(AUDITORIA_FILA_MAXIMA commits), o commit espera a thread; no encerramento
+normal do processo a fila é gravada antes de sair, mas o que estiver nela
+se perde se o processo morrer.
+
+Comandos em massa (query.delete()/update(), upserts) não passam pelo
+flush: as funções de registro da outbox (alteracoes.py) chamam anotar(),
+só com os valores depois (ou nenhum, nas exclusões), ou com antes e depois
+das colunas alteradas quando o chamador sabe quanto mudou (reservas).
+"""
+import atexit
+import contextlib
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import current_app, has_app_context, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, inspect, insert
+from sqlalchemy.orm import Session
+
+from extensions import db
+from filiais import filial_para_gravar
+from models import Auditoria, Clientes, Estoque, Marmores, Movimentacoes_Estoque, Orcamentos
+
+# Modelo -> nome da entidade na auditoria
+ENTIDADES = {
+    Clientes: 'clientes',
+    Marmores: 'marmores',
+    Estoque: 'estoque',
+    Orcamentos: 'orcamentos',
+    Movimentacoes_Estoque: 'movimentacoes_estoque',
+}
+
+_funcionario = contextvars.ContextVar('auditoria_funcionario', default=None)
+
+
+@contextlib.contextmanager
+def em_nome_de(funcionario_id):
+    """Atribui as alterações do bloco ao funcionário (tarefas em segundo plano)."""
+    marca = _funcionario.set(funcionario_id)
+    try:
+        yield
+    finally:
+        _funcionario.reset(marca)
+
+
+def _funcionario_atual():
+    funcionario = _funcionario.get()
+    if funcionario is not None or not has_request_context():
+        return funcionario
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        # Rota sem @jwt_required (ex.: login)
+        return None
+
+
+def _para_json(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    # Colunas atribuídas com expressões SQL (ex.: current_timestamp())
+    return str(valor)
+
+
+def _valores(estado):
+    return {coluna.key: estado.dict[coluna.key] for coluna in estado.mapper.column_attrs if coluna.key in estado.dict}
+
+
+def _diferenca(estado):
+    # committed_state só tem os atributos atribuídos desde o último flush:
+    # não percorre todas as colunas do modelo
+    antes, depois = {}, {}
+    colunas = estado.mapper.column_attrs
+    for chave in estado.committed_state:
+        if chave not in colunas:
+            continue
+        historico = estado.attrs[chave].history
+        if historico.added or historico.deleted:
+            antes[chave] = historico.deleted[0] if historico.deleted else None
+            depois[chave] = historico.added[0] if historico.added else None
+    return antes, depois
+
+
+def anotar(session, entidade, entidade_id, operacao, antes=None, depois=None, filial_id=None):
+    """Anota uma alteração feita sem o flush; vai para a fila no commit da sessão."""
+    session.info.setdefault('auditoria', []).append((
+        filial_para_gravar() if filial_id is None else filial_id, entidade, entidade_id, operacao,
+        _funcionario_atual(), antes, depois, datetime.now()))
+
+
+@event.listens_for(Session, 'after_flush')
+def _anotar_flush(session, flush_context):
+    # No after_flush o histórico dos atributos ainda é o de antes do flush
+    # e os objetos novos já têm id
+    anotacoes = None
+    for operacao, objetos in (('criado', session.new), ('atualizado', session.dirty), ('excluido', session.deleted)):
+        for obj in objetos:
+            entidade = ENTIDADES.get(type(obj))
+            if entidade is None:
+                continue
+            estado = inspect(obj)
+            if operacao == 'atualizado':
+                antes, depois = _diferenca(estado)
+                if not depois:
+                    continue
+            elif operacao == 'criado':
+                antes, depois = None, _valores(estado)
+            else:
+                antes, depois = _valores(estado), None
+            if anotacoes is None:
+                anotacoes = session.info.setdefault('auditoria', [])
+                funcionario, agora = _funcionario_atual(), datetime.now()
+            filial = estado.dict.get('filial_id')
+            anotacoes.append((filial_para_gravar() if filial is None else filial, entidade, obj.id, operacao,
+                              funcionario, antes, depois, agora))
+
+
+@event.listens_for(Session, 'after_commit')
+def _enfileirar(session):
+    anotacoes = session.info.pop('auditoria', None)
+    if anotacoes and has_app_context():
+        current_app.extensions['auditoria'].enfileirar(anotacoes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar(session):
+    session.info.pop('auditoria', None)
+
+
+class EscritorAuditoria:
+    """Fila das anotações commitadas e a thread que as grava em lotes."""
+
+    def __init__(self, app):
+        self.app = app
+        self.tamanho_lote = app.config['AUDITORIA_TAMANHO_LOTE']
+        self.intervalo = app.config['AUDITORIA_INTERVALO']
+        self._fila_maxima = app.config['AUDITORIA_FILA_MAXIMA']
+        self._trava = threading.Lock()
+        self._pid = None
+        self._fila = None
+        self._thread = None
+
+    def enfileirar(self, anotacoes):
+        self._iniciar()
+        self._fila.put(anotacoes)
+
+    def _iniciar(self):
+        # Criada sob demanda e de novo após um fork: com --preload, a thread
+        # do processo mestre não existiria nos workers
+        if self._pid == os.getpid():
+            return
+        with self._trava:
+            if self._pid == os.getpid():
+                return
+            self._fila = queue.Queue(maxsize=self._fila_maxima)
+            self._thread = threading.Thread(target=self._executar, name='auditoria', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+            atexit.register(self.parar)
+
+    def esperar(self):
+        """Bloqueia até a fila atual estar gravada."""
+        if self._pid == os.getpid():
+            self._fila.join()
+
+    def parar(self, espera=10):
+        """Grava o que está na fila e encerra a thread."""
+        if self._pid == os.getpid() and self._thread.is_alive():
+            self._fila.put(None)
+            self._thread.join(espera)
+
+    def _executar(self):
+        parar = False
+        while not parar:
+            lote = self._fila.get()
+            recebidos = 1
+            if lote is None:
+                self._fila.task_done()
+                return
+            # Junta o que chegar em até AUDITORIA_INTERVALO segundos num lote só
+            limite = time.monotonic() + self.intervalo
+            while len(lote) < self.tamanho_lote:
+                try:
+                    mais = self._fila.get(timeout=max(0, limite - time.monotonic()))
+                except queue.Empty:
+                    break
+                recebidos += 1
+                if mais is None:
+                    parar = True
+                    break
+                lote.extend(mais)
+            try:
+                self._gravar(lote)
+            finally:
+                for _ in range(recebidos):
+                    self._fila.task_done()
+
+    def _gravar(self, anotacoes):
+        linhas = [{
+            'filial_id': filial_id,
+            'entidade': entidade,
+            'entidade_id': entidade_id,
+            'operacao': operacao,
+            'funcionario_id': int(funcionario) if funcionario is not None else None,
+            'antes': json.dumps(antes, default=_para_json) if antes is not None else None,
+            'depois': json.dumps(depois, default=_para_json) if depois is not None else None,
+            'alterado_em': alterado_em,
+        } for filial_id, entidade, entidade_id, operacao, funcionario, antes, depois, alterado_em in anotacoes]
+        for tentativa in range(1, 4):
+            try:
+                with self.app.app_context(), db.engine.begin() as conexao:
+                    for i in range(0, len(linhas), self.tamanho_lote):
+                        conexao.execute(insert(Auditoria), linhas[i:i + self.tamanho_lote])
+                return
+            except Exception as e:
+                print(f"Erro ao gravar {len(linhas)} registro(s) de auditoria (tentativa {tentativa}): {e}")
+                time.sleep(tentativa)
+        print(f"{len(linhas)} registro(s) de auditoria descartado(s).")
+
+
+def init_app(app):
+    app.extensions['auditoria'] = EscritorAuditoria(app)
@@ -0,0 +1,124 @@
+# -- coding: utf-8 --
+"""
+Mede o efeito do controle de admissão (admissao.py) sob rajada.
+
+Um usuário "abusivo" dispara GET /orcamentos (rota pesada) sem parar com
+--abusivos clientes simultâneos, enquanto um usuário comum consulta
+clientes um a um (rota leve). A mesma carga roda sem e com o controle de
+admissão, por --segundos cada, e mostra a latência do usuário comum e as
+respostas que o abusivo recebeu (200, 429, 503).
+
+Uso (a partir de backend/):
+    python -m benchmarks.admissao [--segundos 10] [--abusivos 16]
+"""
+import argparse
+import contextlib
+import http.client
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from flask_jwt_extended import create_access_token
+from werkzeug.serving import make_server
+
+from app import create_app
+from extensions import db
+from benchmarks import dados
+from benchmarks.carga import _percentil
+from filiais import CLAIM
+from models import Funcionarios
+
+
+def _subir(url, ativa):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': url,
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 60, 'check_same_thread': False}},
+        'JWT_SECRET_KEY': 'benchmark-secret-key-com-tamanho-suficiente',
+        'ADMISSAO_ATIVA': ativa,
+    })
+    servidor = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return app, servidor
+
+
+def _cliente(porta, token, caminhos, fim, resultados):
+    """Repete os caminhos até 'fim', guardando (status, ms) de cada resposta."""
+    conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=300)
+    headers = {'Authorization': f'Bearer {token}'}
+    i = 0
+    while time.perf_counter() < fim:
+        inicio = time.perf_counter()
+        conexao.request('GET', caminhos[i % len(caminhos)], headers=headers)
+        resposta = conexao.getresponse()
+        resposta.read()
+        resultados.append((resposta.status, (time.perf_counter() - inicio) * 1000))
+        if resposta.status == 429:
+            # Um cliente bem comportado respeitaria o Retry-After; o abusivo só
+            # espera um pouco para não medir apenas o laço de recusas.
+            time.sleep(0.05)
+        i += 1
+
+
+def rodada(url, ativa, tokens, clientes, segundos, abusivos):
+    app, servidor = _subir(url, ativa)
+    porta = servidor.server_port
+    fim = time.perf_counter() + segundos
+    abusivo, comum = [], []
+    threads = [threading.Thread(target=_cliente, args=(porta, tokens[0], ['/orcamentos'], fim, abusivo))
+               for _ in range(abusivos)]
+    threads.append(threading.Thread(target=_cliente, args=(porta, tokens[1], clientes, fim, comum)))
+    with open(os.devnull, 'w') as silencio, contextlib.redirect_stdout(silencio):
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    servidor.shutdown()
+
+    latencias = [ms for status, ms in comum if status == 200]
+    return {
+        'comum_req': len(comum),
+        'comum_p50': _percentil(latencias, 50),
+        'comum_p95': _percentil(latencias, 95),
+        'abusivo': Counter(status for status, _ in abusivo),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--abusivos', type=int, default=16)
+    parser.add_argument('--escala', type=float, default=1.0)
+    args = parser.parse_args()
+
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='marmoraria-admissao-'), 'admissao.db')}"
+    app, servidor = _subir(url, False)
+    servidor.shutdown()
+    with app.app_context():
+        print(f'Populando {url} (escala {args.escala})...')
+        ids = dados.popular(escala=args.escala)
+        comum = Funcionarios(nome='Comum', email='comum@marmoraria.com', cpf='00000000001')
+        comum.set_password(dados.SENHA)
+        db.session.add(comum)
+        db.session.commit()
+        with open(os.devnull, 'w') as silencio, contextlib.redirect_stdout(silencio):
+            tokens = [create_access_token(identity=f.id, additional_claims={CLAIM: f.filial_id})
+                      for f in Funcionarios.query.order_by(Funcionarios.id)]
+    clientes = [f'/clientes/{i}' for i in ids['clientes']]
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    print(f"{'admissão':<10}{'comum req':>11}{'comum p50 ms':>14}{'comum p95 ms':>14}  abusivo (status: respostas)")
+    for ativa in (False, True):
+        r = rodada(url, ativa, tokens, clientes, args.segundos, args.abusivos)
+        status = ', '.join(f'{s}: {n}' for s, n in sorted(r['abusivo'].items()))
+        print(f"{'ligada' if ativa else 'desligada':<10}{r['comum_req']:>11}{r['comum_p50']:>14.1f}"
+              f"{r['comum_p95']:>14.1f}  {status}", flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+# -- coding: utf-8 --
+"""
+Mede a trilha de auditoria (auditoria.py).
+
+  - custo no request: tempo do listener de after_flush por objeto alterado
+    (clientes e estoque com nome/preço trocados) e do envio para a fila no
+    commit, em µs;
+  - gravação: registros/s da thread de auditoria (lotes de
+    AUDITORIA_TAMANHO_LOTE linhas por INSERT) x um INSERT por registro.
+
+Uso (a partir de backend/):
+    python -m benchmarks.auditoria [--escala 1] [--registros 50000]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import func, insert
+
+import auditoria
+from app import create_app
+from extensions import db
+from benchmarks import dados
+from models import Auditoria, Clientes, Estoque
+
+
+def _custo_listener(escritor, repeticoes):
+    """µs por objeto no after_flush e µs por commit no envio para a fila."""
+    por_objeto, por_envio = [], []
+    clientes = Clientes.query.all()
+    itens = Estoque.query.all()
+    for rodada in range(repeticoes):
+        # Sem autoflush: recarregar os atributos expirados pelo rollback
+        # dispararia o flush (e o listener) fora da medição
+        with db.session.no_autoflush:
+            for cliente in clientes:
+                cliente.nome = f'{cliente.nome} ({rodada})'
+            for item in itens:
+                item.preco_unitario = item.preco_unitario + 1
+        objetos = len(clientes) + len(itens)
+        # O listener lê o histórico como no after_flush; sem flush nem commit
+        inicio = time.perf_counter()
+        auditoria._anotar_flush(db.session, None)
+        por_objeto.append((time.perf_counter() - inicio) * 1e6 / objetos)
+        anotacoes = db.session.info.pop('auditoria')
+        inicio = time.perf_counter()
+        escritor.enfileirar(anotacoes)
+        por_envio.append((time.perf_counter() - inicio) * 1e6)
+        db.session.rollback()
+    escritor.esperar()
+    return statistics.median(por_objeto), statistics.median(por_envio)
+
+
+def _anotacoes(quantidade):
+    agora = datetime.now()
+    return [(1, 'estoque', i % 200 + 1, 'atualizado', 1, {'preco_unitario': 100.0}, {'preco_unitario': 101.0}, agora)
+            for i in range(quantidade)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escala', type=float, default=1.0)
+    parser.add_argument('--registros', type=int, default=50000)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='marmoraria-auditoria-')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmpdir, 'auditoria.db')}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'check_same_thread': False}},
+        'JWT_SECRET_KEY': 'benchmark-secret-key-com-tamanho-suficiente',
+        'ADMISSAO_ATIVA': False,
+    })
+    with app.app_context():
+        print(f'Populando (escala {args.escala})...')
+        dados.popular(escala=args.escala)
+        escritor = app.extensions['auditoria']
+
+        listener, envio = _custo_listener(escritor, args.repeticoes)
+        print(f'request: {listener:6.2f} µs por objeto alterado no flush, {envio:6.2f} µs por commit para a fila')
+
+        db.session.query(Auditoria).delete()
+        db.session.commit()
+        inicio = time.perf_counter()
+        # Em pedaços do tamanho de um commit típico, como chegam dos requests
+        for i in range(0, args.registros, 5):
+            escritor.enfileirar(_anotacoes(min(5, args.registros - i)))
+        escritor.esperar()
+        segundos = time.perf_counter() - inicio
+        gravados = db.session.query(func.count(Auditoria.id)).scalar()
+        print(f'thread: {gravados} registros em {segundos:.2f} s ({gravados / segundos:.0f}/s, '
+              f'lotes de até {escritor.tamanho_lote})')
+
+        # Referência: um INSERT (e um commit) por registro, como seria gravar no request
+        amostra = min(args.registros, 2000)
+        linhas = [{'filial_id': 1, 'entidade': 'estoque', 'entidade_id': 1, 'operacao': 'atualizado',
+                   'funcionario_id': 1, 'antes': '{"preco_unitario": 100.0}', 'depois': '{"preco_unitario": 101.0}',
+                   'alterado_em': datetime.now()} for _ in range(amostra)]
+        inicio = time.perf_counter()
+        for linha in linhas:
+            with db.engine.begin() as conexao:
+                conexao.execute(insert(Auditoria), linha)
+        segundos = time.perf_counter() - inicio
+        print(f'um INSERT por registro: {amostra} registros em {segundos:.2f} s ({amostra / segundos:.0f}/s, '
+              f'{segundos * 1e6 / amostra:.0f} µs cada)')
+    shutil.rmtree(tmpdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
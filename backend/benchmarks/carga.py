@@ -0,0 +1,502 @@
+# -- coding: utf-8 --
+"""
+Benchmark de carga de todas as rotas da API.
+
+Popula um banco local (SQLite por padrão), sobe o app num servidor HTTP
+local e dispara cada rota com vários clientes simultâneos. Para cada rota
+reporta latência p50/p95/p99, vazão e quantidade de comandos SQL por
+request, e compara com o baseline gravado em benchmarks/baseline.json.
+
+Uso (a partir de backend/):
+    python -m benchmarks.carga                      # roda e compara com o baseline
+    python -m benchmarks.carga --rotas orcamentos   # só as rotas cujo nome contém o filtro
+    python -m benchmarks.carga --salvar-baseline    # regrava o baseline
+    python -m benchmarks.carga --execucoes 5        # mediana de 5 execuções (padrão 3)
+    python -m benchmarks.carga --database-url mysql+pymysql://...  # MySQL local
+    python -m benchmarks.carga --gunicorn sync,eventlet  # compara as classes de worker
+
+ATENÇÃO: o banco informado é APAGADO e recriado. Use apenas bancos locais.
+
+Cada rota roda --execucoes vezes, em rodadas sobre todas as rotas, e o
+resultado (e o baseline) é a mediana de cada medida: numa máquina
+compartilhada, o p95 de uma execução só varia mais que a tolerância.
+
+Sai com código 1 se alguma rota passar a executar mais comandos SQL, que
+não dependem da máquina. Um p95 acima do baseline além da tolerância é
+só um aviso, a menos que se use --exigir-latencia (máquina dedicada).
+
+Com --gunicorn o app roda no Gunicorn (gunicorn.conf.py), uma vez para cada
+classe de worker, com --workers processos e o banco populado de novo a cada
+rodada; o resultado é uma tabela lado a lado, sem baseline.
+"""
+import argparse
+import contextlib
+import http.client
+import itertools
+import json
+import logging
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from flask import g, has_request_context
+from sqlalchemy import event
+from werkzeug.serving import make_server
+
+from app import create_app
+from extensions import db
+from benchmarks import dados
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+class Contador:
+    """itertools.count com lock: vários clientes pedem ids ao mesmo tempo."""
+
+    def __init__(self, inicio=0):
+        self._contador = itertools.count(inicio)
+        self._trava = threading.Lock()
+
+    def __next__(self):
+        with self._trava:
+            return next(self._contador)
+
+
+@dataclass
+class Rota:
+    nome: str
+    metodo: str
+    # Recebem o contexto (ids do seed + contador da rota) e devolvem o caminho/corpo.
+    caminho: Callable[[dict], str]
+    corpo: Optional[Callable[[dict], dict]] = None
+    autenticada: bool = True
+    status_esperado: int = 200
+
+
+def _proximo(ctx, chave):
+    """Próximo id de uma lista do seed, sem repetir entre threads."""
+    return ctx[chave][next(ctx['contadores'][chave])]
+
+
+def _ciclico(ctx, chave):
+    lista = ctx[chave]
+    return lista[next(ctx['contadores'][chave]) % len(lista)]
+
+
+def _item_orcamento(ctx):
+    return {
+        'item_estoque_id': _ciclico(ctx, 'estoque'),
+        'quantidade': 2.5,
+        'preco_unitario_praticado': 320.0,
+        'subtotal': 800.0,
+        'log_calculo': 'Área: 2.5 m² x R$ 320.00 = R$ 800.00',
+    }
+
+
+def _lote_clientes(ctx, tamanho=100):
+    """Metade de CPFs novos e metade já cadastrados no seed (atualizados pelo upsert)."""
+    n = next(ctx['seq'])
+    novos = [{'nome': f'Cliente Lote {n}-{k}', 'cpf': f'{40_000_000_000 + n * tamanho + k:011d}',
+              'telefone': '21966665555'} for k in range(tamanho // 2)]
+    existentes = [{'nome': f'Cliente {k} (lote {n})', 'cpf': f'{10_000_000_000 + k:011d}',
+                   'telefone': '(21) 3222-1111'} for k in range(1, tamanho - tamanho // 2 + 1)]
+    return {'clientes': novos + existentes}
+
+
+ROTAS = [
+    Rota('login', 'POST', lambda ctx: '/login',
+         lambda ctx: {'email': dados.EMAIL, 'senha': dados.SENHA}, autenticada=False),
+    Rota('add_funcionario', 'POST', lambda ctx: '/funcionarios/cadastro',
+         lambda ctx: (lambda n: {'nome': f'Func {n}', 'email': f'func{n}@marmoraria.com',
+                                 'senha': 'Senha123!', 'cpf': f'{20_000_000_000 + n:011d}'})(next(ctx['seq'])),
+         status_esperado=201),
+
+    Rota('get_clientes', 'GET', lambda ctx: '/clientes'),
+    Rota('get_cliente', 'GET', lambda ctx: f"/clientes/{_ciclico(ctx, 'clientes')}"),
+    Rota('add_cliente', 'POST', lambda ctx: '/clientes',
+         lambda ctx: {'nome': 'Cliente Novo', 'cpf': f"{30_000_000_000 + next(ctx['seq']):011d}",
+                      'telefone': '(21) 98888-7777'}, status_esperado=201),
+    Rota('update_cliente', 'PUT', lambda ctx: f"/clientes/{_ciclico(ctx, 'clientes')}",
+         lambda ctx: {'nome': 'Cliente Atualizado', 'telefone': '21977776666'}),
+    Rota('delete_cliente', 'DELETE', lambda ctx: f"/clientes/{_proximo(ctx, 'clientes_reservados')}"),
+    Rota('upsert_clientes', 'POST', lambda ctx: '/clientes/lote', _lote_clientes),
+
+    Rota('get_marmores', 'GET', lambda ctx: '/marmores'),
+    Rota('add_marmore', 'POST', lambda ctx: '/marmores',
+         lambda ctx: {'nome': 'Granito Novo', 'preco_m2': 420.5, 'quantidade': 30}, status_esperado=201),
+    Rota('update_marmore', 'PUT', lambda ctx: f"/marmores/{_ciclico(ctx, 'marmores')}",
+         lambda ctx: {'preco_m2': 450.0}),
+    Rota('delete_marmore', 'DELETE', lambda ctx: f"/marmores/{_proximo(ctx, 'marmores_reservados')}"),
+
+    Rota('get_orcamentos', 'GET', lambda ctx: '/orcamentos'),
+    Rota('get_orcamentos_status', 'GET', lambda ctx: '/orcamentos?status=Pendente'),
+    Rota('get_orcamentos_logs', 'GET', lambda ctx: '/orcamentos?incluir=logs'),
+    Rota('get_orcamento', 'GET', lambda ctx: f"/orcamentos/{_ciclico(ctx, 'orcamentos')}"),
+    Rota('get_revisoes_orcamento', 'GET', lambda ctx: f"/orcamentos/{_ciclico(ctx, 'orcamentos')}/revisoes"),
+    Rota('create_orcamento', 'POST', lambda ctx: '/orcamentos',
+         lambda ctx: {'cliente_id': _ciclico(ctx, 'clientes'), 'observacoes': 'Benchmark',
+                      'itens': [_item_orcamento(ctx) for _ in range(3)]}, status_esperado=201),
+    Rota('update_orcamento', 'PUT', lambda ctx: f"/orcamentos/{_ciclico(ctx, 'orcamentos')}",
+         lambda ctx: {'observacoes': 'Revisado', 'itens': [_item_orcamento(ctx) for _ in range(3)]}),
+    Rota('update_orcamento_status', 'PUT',
+         lambda ctx: f"/orcamentos/{_proximo(ctx, 'orcamentos_aprovacao')}/status",
+         lambda ctx: {'status': 'Aprovado'}),
+    Rota('delete_orcamento', 'DELETE', lambda ctx: f"/orcamentos/{_proximo(ctx, 'orcamentos_reservados')}"),
+
+    Rota('listar_estoque', 'GET', lambda ctx: '/estoque'),
+    Rota('get_disponibilidade', 'GET',
+         lambda ctx: '/estoque/disponibilidade?ids=' + ','.join(str(_ciclico(ctx, 'estoque')) for _ in range(20))),
+    Rota('get_reposicao', 'GET', lambda ctx: '/estoque/reposicao'),
+    Rota('add_estoque_item', 'POST', lambda ctx: '/estoque',
+         lambda ctx: {'nome': 'Quartzito Novo', 'quantidade': 50, 'unidade_medida': 'm²',
+                      'preco_unitario': 890}, status_esperado=201),
+    Rota('update_estoque_item', 'PUT', lambda ctx: f"/estoque/{_ciclico(ctx, 'estoque')}",
+         lambda ctx: {'preco_unitario': 910}),
+    Rota('delete_estoque', 'DELETE', lambda ctx: f"/estoque/{_proximo(ctx, 'estoque_reservados')}"),
+
+    Rota('get_movimentacoes_estoque', 'GET', lambda ctx: '/movimentacoes_estoque'),
+    Rota('get_arquivo_movimentacoes', 'GET',
+         lambda ctx: f"/movimentacoes_estoque/arquivo?item_id={_ciclico(ctx, 'estoque')}"),
+    Rota('get_arquivo_movimentacoes_periodo', 'GET',
+         lambda ctx: '/movimentacoes_estoque/arquivo?de=2022-01-01&ate=2022-01-31'),
+    Rota('add_movimentacao_estoque', 'POST', lambda ctx: '/movimentacoes_estoque',
+         lambda ctx: {'item_id': _ciclico(ctx, 'estoque'), 'tipo_movimentacao': 'Entrada',
+                      'quantidade': 3, 'observacoes': 'Benchmark'}, status_esperado=201),
+
+    Rota('get_pedidos', 'GET', lambda ctx: '/pedidos'),
+    Rota('get_pedidos_status', 'GET', lambda ctx: '/pedidos?status=Pendente'),
+    Rota('get_pedido', 'GET', lambda ctx: f"/pedidos/{_ciclico(ctx, 'pedidos')}"),
+    Rota('add_pedido', 'POST', lambda ctx: '/pedidos',
+         lambda ctx: {'orcamento_id': _proximo(ctx, 'orcamentos_pedido')}, status_esperado=201),
+    Rota('update_pedidos_status', 'PUT', lambda ctx: '/pedidos/status',
+         lambda ctx: {'ids': [_ciclico(ctx, 'pedidos') for _ in range(20)], 'status': 'Aprovado'}),
+    Rota('add_pagamento', 'POST', lambda ctx: f"/pedidos/{_ciclico(ctx, 'pedidos')}/pagamentos",
+         lambda ctx: {'valor': 10.0, 'metodo_pagamento': 'Pix'}, status_esperado=201),
+    Rota('get_entregas', 'GET', lambda ctx: '/entregas?status=Pendente'),
+    Rota('get_programacao_entregas', 'GET',
+         lambda ctx: f"/entregas/programacao?data={_ciclico(ctx, 'datas_entrega')}"),
+    Rota('add_entrega', 'POST', lambda ctx: f"/pedidos/{_ciclico(ctx, 'pedidos')}/entregas",
+         lambda ctx: {'data_entrega': '2025-07-01', 'endereco_entrega': 'Rua da Praia, 10 - Niterói'},
+         status_esperado=201),
+    Rota('update_entregas_status', 'PUT', lambda ctx: '/entregas/status',
+         lambda ctx: {'ids': [_ciclico(ctx, 'pedidos') for _ in range(20)], 'status': 'Em Rota'}),
+
+    Rota('get_tarefas', 'GET', lambda ctx: '/tarefas'),
+    Rota('get_alteracoes', 'GET', lambda ctx: '/alteracoes?desde=0'),
+    Rota('get_sync_completo', 'GET', lambda ctx: '/sync'),
+    # Depois das rotas de escrita: o delta traz tudo o que elas alteraram
+    Rota('get_sync_delta', 'GET', lambda ctx: '/sync?desde=1'),
+    # Também depois das escritas, que geram a auditoria
+    Rota('get_auditoria', 'GET', lambda ctx: '/auditoria'),
+    Rota('get_auditoria_entidade', 'GET',
+         lambda ctx: f"/auditoria?entidade=clientes&entidade_id={_ciclico(ctx, 'clientes')}"),
+    Rota('get_auditoria_funcionario', 'GET', lambda ctx: '/auditoria?funcionario_id=1'),
+]
+
+
+def montar_contexto(ids):
+    """Contexto passado às funções de caminho/corpo das rotas."""
+    ctx = dict(ids)
+    ctx['seq'] = Contador(1)
+    ctx['contadores'] = {chave: Contador() for chave in ids}
+    return ctx
+
+
+def _instalar_contador_sql(app):
+    """Conta os comandos SQL de cada request e devolve no header X-SQL-Count."""
+    with app.app_context():
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def contar(conn, cursor, statement, parameters, context, executemany):
+            if has_request_context():
+                g.sql_count = g.get('sql_count', 0) + 1
+
+    @app.after_request
+    def expor(resposta):
+        resposta.headers['X-SQL-Count'] = str(g.get('sql_count', 0))
+        return resposta
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    k = (len(ordenados) - 1) * p / 100
+    inferior = int(k)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (k - inferior)
+
+
+def executar_rota(rota, ctx, porta, token, requisicoes, concorrencia):
+    local = threading.local()
+
+    def chamar(_):
+        if not hasattr(local, 'conexao'):
+            local.conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=300)
+        headers = {'Content-Type': 'application/json'}
+        if rota.autenticada:
+            headers['Authorization'] = f'Bearer {token}'
+        corpo = json.dumps(rota.corpo(ctx)) if rota.corpo else None
+        inicio = time.perf_counter()
+        local.conexao.request(rota.metodo, rota.caminho(ctx), body=corpo, headers=headers)
+        resposta = local.conexao.getresponse()
+        conteudo = resposta.read()
+        duracao = time.perf_counter() - inicio
+        if resposta.status != rota.status_esperado:
+            raise RuntimeError(f'{rota.nome}: status {resposta.status} (esperado {rota.status_esperado}): {conteudo[:300]!r}')
+        return duracao, int(resposta.getheader('X-SQL-Count', 0)), len(conteudo)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        resultados = list(executor.map(chamar, range(requisicoes)))
+    total = time.perf_counter() - inicio
+
+    latencias = [r[0] * 1000 for r in resultados]
+    return {
+        'p50_ms': round(_percentil(latencias, 50), 2),
+        'p95_ms': round(_percentil(latencias, 95), 2),
+        'p99_ms': round(_percentil(latencias, 99), 2),
+        'req_s': round(requisicoes / total, 1),
+        'sql_por_request': round(statistics.mean(r[1] for r in resultados), 1),
+        'bytes_resposta': round(statistics.mean(r[2] for r in resultados)),
+    }
+
+
+def comparar(resultados, baseline, tolerancia):
+    """(regressões de comandos SQL, regressões de p95) em relação ao baseline."""
+    sql, latencia = [], []
+    for nome, atual in resultados.items():
+        anterior = baseline.get('rotas', {}).get(nome)
+        if not anterior:
+            continue
+        if atual['p95_ms'] > anterior['p95_ms'] * tolerancia:
+            latencia.append(f"{nome}: p95 {atual['p95_ms']} ms > {anterior['p95_ms']} ms x {tolerancia}")
+        # Meio comando de folga: a média oscila com o cache da sessão.
+        if atual['sql_por_request'] > anterior['sql_por_request'] + 0.5:
+            sql.append(f"{nome}: {atual['sql_por_request']} comandos SQL por request (baseline {anterior['sql_por_request']})")
+    return sql, latencia
+
+
+def configuracao(url, concorrencia):
+    """Configuração do app medido, no mesmo processo ou nos workers do Gunicorn."""
+    return {
+        'SQLALCHEMY_DATABASE_URI': url,
+        'SQLALCHEMY_ENGINE_OPTIONS': {'connect_args': {'timeout': 60, 'check_same_thread': False}}
+                                     if url.startswith('sqlite') else {},
+        'JWT_SECRET_KEY': 'benchmark-secret-key-com-tamanho-suficiente',
+        # Um usuário só dispara todas as rotas: o controle de admissão entra
+        # na medição, mas com limites que nunca recusam (ver benchmarks.admissao)
+        'ADMISSAO_TAXA': 1e9, 'ADMISSAO_RAJADA': 1e9,
+        'ADMISSAO_CONCORRENCIA_PESADA': concorrencia, 'ADMISSAO_CONCORRENCIA_LEVE': concorrencia,
+    }
+
+
+def _popular(url, args):
+    app = create_app(configuracao(url, args.concorrencia))
+    with app.app_context():
+        print(f'Populando {url} (escala {args.escala})...')
+        # Ids para as rotas destrutivas de todas as execuções
+        ids = dados.popular(escala=args.escala, reservados=args.requisicoes * args.execucoes)
+        db.engine.dispose()
+    return app, ids
+
+
+@contextlib.contextmanager
+def _servidor_local(app):
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    servidor = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    try:
+        yield servidor.server_port
+    finally:
+        servidor.shutdown()
+
+
+@contextlib.contextmanager
+def _servidor_gunicorn(url, classe, args):
+    """Gunicorn com gunicorn.conf.py e a classe de worker informada (app em benchmarks/wsgi.py)."""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        porta = s.getsockname()[1]
+    ambiente = dict(os.environ, PORT=str(porta), GUNICORN_WORKER_CLASS=classe, WEB_CONCURRENCY=str(args.workers),
+                    BENCHMARK_DATABASE_URL=url, BENCHMARK_CONCORRENCIA=str(args.concorrencia))
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    processo = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'benchmarks.wsgi:app'],
+                                cwd=backend, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        limite = time.monotonic() + 60
+        while True:
+            if processo.poll() is not None:
+                raise RuntimeError(f'Gunicorn ({classe}) encerrou com código {processo.returncode}.')
+            try:
+                socket.create_connection(('127.0.0.1', porta), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > limite:
+                    raise RuntimeError(f'Gunicorn ({classe}) não respondeu em 60 s.')
+                time.sleep(0.2)
+        yield porta
+    finally:
+        processo.terminate()
+        processo.wait(30)
+
+
+def _login(porta):
+    conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=60)
+    conexao.request('POST', '/login', body=json.dumps({'email': dados.EMAIL, 'senha': dados.SENHA}),
+                    headers={'Content-Type': 'application/json'})
+    return json.loads(conexao.getresponse().read())['access_token']
+
+
+def _cabecalho():
+    print(f"{'rota':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}{'SQL/req':>9}{'bytes':>11}")
+
+
+def _linha(nome, r):
+    print(f"{nome:<28}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+          f"{r['req_s']:>9}{r['sql_por_request']:>9}{r['bytes_resposta']:>11}", flush=True)
+
+
+def _medir(rotas, ids, porta, args, tolerar_falhas=False):
+    """
+    Executa as rotas args.execucoes vezes e devolve a mediana de cada
+    medida por rota. Com tolerar_falhas, uma rota que falha (ex.: worker do
+    Gunicorn morto por timeout) fica fora daquela execução e as seguintes
+    continuam.
+    """
+    token = _login(porta)
+    # Um contexto só: as rotas destrutivas seguem para os próximos ids reservados
+    ctx = montar_contexto(ids)
+    execucoes = [_executar(rotas, ctx, porta, token, args, tolerar_falhas, n) for n in range(1, args.execucoes + 1)]
+    if args.execucoes == 1:
+        return execucoes[0]
+
+    resultados = {}
+    for rota in rotas:
+        medidas = [e[rota.nome] for e in execucoes if rota.nome in e]
+        if medidas:
+            resultados[rota.nome] = {chave: round(statistics.median(m[chave] for m in medidas), 2)
+                                     for chave in medidas[0]}
+    print(f'Mediana de {args.execucoes} execuções:')
+    _cabecalho()
+    for nome, r in resultados.items():
+        _linha(nome, r)
+    return resultados
+
+
+def _executar(rotas, ctx, porta, token, args, tolerar_falhas, n):
+    """Uma execução das rotas, em ordem, com uma linha impressa por rota."""
+    resultados = {}
+    if args.execucoes > 1:
+        print(f'Execução {n} de {args.execucoes}:')
+    _cabecalho()
+    for rota in rotas:
+        # Os prints de depuração das rotas iriam para o relatório.
+        try:
+            with open(os.devnull, 'w') as silencio, contextlib.redirect_stdout(silencio):
+                r = executar_rota(rota, ctx, porta, token, args.requisicoes, args.concorrencia)
+        except (OSError, http.client.HTTPException, RuntimeError) as e:
+            if not tolerar_falhas:
+                raise
+            print(f'{rota.nome:<28}falhou: {e.__class__.__name__}: {str(e)[:80]}', flush=True)
+            continue
+        resultados[rota.nome] = r
+        _linha(rota.nome, r)
+    return resultados
+
+
+def _comparar_workers(rotas, args):
+    """Mesmas rotas em cada classe de worker do Gunicorn; imprime p50/p95/req/s lado a lado."""
+    classes = args.gunicorn.split(',')
+    por_classe = {}
+    for classe in classes:
+        tmpdir = tempfile.mkdtemp(prefix=f'marmoraria-bench-{classe}-')
+        url = args.database_url or f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        _, ids = _popular(url, args)
+        print(f'Gunicorn {classe}, {args.workers} worker(s):')
+        with _servidor_gunicorn(url, classe, args) as porta:
+            por_classe[classe] = _medir(rotas, ids, porta, args, tolerar_falhas=True)
+
+    print()
+    print(f"{'rota':<28}" + ''.join(f"{classe + ' p50':>14}{'p95':>9}{'req/s':>9}" for classe in classes))
+    for rota in rotas:
+        linha = f'{rota.nome:<28}'
+        for classe in classes:
+            r = por_classe[classe].get(rota.nome)
+            linha += f"{r['p50_ms']:>14}{r['p95_ms']:>9}{r['req_s']:>9}" if r else f"{'falhou':>32}"
+        print(linha)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', help='Banco local a ser recriado (padrão: SQLite temporário)')
+    parser.add_argument('--escala', type=float, default=1.0, help='Multiplicador dos volumes do seed')
+    parser.add_argument('--requisicoes', type=int, default=50, help='Requisições por rota')
+    parser.add_argument('--concorrencia', type=int, default=8, help='Clientes simultâneos')
+    parser.add_argument('--rotas', help='Executa só as rotas cujo nome contém este texto')
+    parser.add_argument('--execucoes', type=int, default=3, help='Execuções de cada rota; vale a mediana')
+    parser.add_argument('--tolerancia', type=float, default=1.5, help='Fator aceito sobre o p95 do baseline')
+    parser.add_argument('--exigir-latencia', action='store_true', help='Falha também quando o p95 passa da tolerância')
+    parser.add_argument('--salvar-baseline', action='store_true')
+    parser.add_argument('--gunicorn', help='Classes de worker a comparar, separadas por vírgula (ex.: sync,eventlet)')
+    parser.add_argument('--workers', type=int, default=2, help='Processos do Gunicorn (com --gunicorn)')
+    args = parser.parse_args()
+
+    if args.execucoes < 1:
+        parser.error('--execucoes deve ser pelo menos 1')
+    rotas = [r for r in ROTAS if not args.rotas or args.rotas in r.nome]
+    if args.gunicorn:
+        if args.salvar_baseline:
+            parser.error('o baseline é do servidor em processo; não use --salvar-baseline com --gunicorn')
+        return _comparar_workers(rotas, args)
+
+    url = args.database_url
+    if not url:
+        tmpdir = tempfile.mkdtemp(prefix='marmoraria-bench-')
+        url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    app, ids = _popular(url, args)
+    _instalar_contador_sql(app)
+    with _servidor_local(app) as porta:
+        resultados = _medir(rotas, ids, porta, args)
+
+    if args.salvar_baseline:
+        # Com --rotas, só as rotas executadas são substituídas no baseline.
+        rotas_baseline = {}
+        if args.rotas and os.path.exists(BASELINE):
+            with open(BASELINE, encoding='utf-8') as f:
+                rotas_baseline = json.load(f)['rotas']
+        rotas_baseline.update(resultados)
+        with open(BASELINE, 'w', encoding='utf-8') as f:
+            json.dump({
+                'parametros': {'escala': args.escala, 'requisicoes': args.requisicoes,
+                               'concorrencia': args.concorrencia, 'execucoes': args.execucoes},
+                'rotas': rotas_baseline,
+            }, f, indent=2, ensure_ascii=False, sort_keys=True)
+            f.write('\n')
+        print(f'Baseline gravado em {BASELINE}')
+        return 0
+
+    if not os.path.exists(BASELINE):
+        print('Sem baseline para comparar (use --salvar-baseline).')
+        return 0
+    with open(BASELINE, encoding='utf-8') as f:
+        baseline = json.load(f)
+    sql, latencia = comparar(resultados, baseline, args.tolerancia)
+    regressoes = sql + latencia if args.exigir_latencia else sql
+    for regressao in regressoes:
+        print(f'REGRESSÃO {regressao}')
+    for aviso in latencia if not args.exigir_latencia else []:
+        print(f'AVISO {aviso}')
+    if not regressoes:
+        print('Nenhuma regressão em relação ao baseline.')
+    return 1 if regressoes else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
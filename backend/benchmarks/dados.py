@@ -0,0 +1,254 @@
+# -- coding: utf-8 --
+"""
+Popula um banco local com volumes realistas para os benchmarks.
+
+Os dados são gerados com semente fixa, então duas execuções com a mesma
+escala produzem exatamente o mesmo banco. Além da massa "de leitura", são
+criados registros reservados para as rotas destrutivas (exclusões e
+aprovações), um por requisição, para que cada chamada encontre um alvo
+válido.
+"""
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, update
+
+from extensions import db
+from filiais import FILIAL_PADRAO
+from models import (
+    Clientes, Entregas, Estoque, Filiais, Funcionarios, ItensOrcamento, Marmores,
+    Movimentacoes_Estoque, Orcamentos, Pagamentos, Pedidos, Reservas,
+)
+from services.estoque import arquivar_movimentacoes, corte_arquivamento
+from services.reposicao import atualizar_reposicao
+
+EMAIL = 'benchmark@marmoraria.com'
+SENHA = 'Benchmark1!'
+
+# Volumes para escala 1.0
+VOLUMES = {
+    'clientes': 1000,
+    'marmores': 100,
+    'estoque': 200,
+    'orcamentos': 1000,
+    'itens_por_orcamento': 3,
+    'movimentacoes': 10000,
+    'pedidos': 500,
+}
+
+NOMES_PEDRA = ['Granito', 'Mármore', 'Quartzito', 'Silestone', 'Travertino', 'Ônix']
+CORES = ['Preto São Gabriel', 'Branco Itaúnas', 'Verde Ubatuba', 'Cinza Andorinha',
+         'Carrara', 'Travertino Romano', 'Amarelo Ornamental', 'Branco Dallas']
+
+
+def _em_lotes(model, linhas, tamanho=2000):
+    for i in range(0, len(linhas), tamanho):
+        db.session.execute(insert(model), linhas[i:i + tamanho])
+
+
+def popular(escala=1.0, reservados=0, semente=42, meses_ativos=12):
+    """
+    Recria as tabelas e insere a massa de dados.
+
+    As movimentações com mais de 'meses_ativos' meses são arquivadas, como
+    em produção com o arquivamento periódico (None mantém todas na tabela
+    principal). Os pontos de reposição são calculados no fim.
+
+    Retorna um dicionário com os ids de cada entidade e os ids reservados
+    para rotas destrutivas (chaves terminadas em '_reservados').
+    """
+    rnd = random.Random(semente)
+    volumes = {k: max(1, int(v * escala)) if k != 'itens_por_orcamento' else v
+               for k, v in VOLUMES.items()}
+    agora = datetime(2025, 6, 1, 12, 0, 0)
+
+    db.drop_all()
+    db.create_all()
+
+    # Tudo na filial padrão, a de quem faz login com EMAIL
+    db.session.add(Filiais(id=FILIAL_PADRAO, nome='Matriz'))
+    funcionario = Funcionarios(nome='Benchmark', email=EMAIL, cpf='00000000000', filial_id=FILIAL_PADRAO)
+    funcionario.set_password(SENHA)
+    db.session.add(funcionario)
+
+    total_clientes = volumes['clientes'] + reservados
+    _em_lotes(Clientes, [{
+        'id': i,
+        'nome': f'Cliente {i}',
+        'cpf': f'{10_000_000_000 + i:011d}',
+        'telefone': f'2199{rnd.randint(1_000_000, 9_999_999)}',
+        'data_cadastro': agora - timedelta(days=rnd.randint(0, 1500)),
+    } for i in range(1, total_clientes + 1)])
+
+    total_marmores = volumes['marmores'] + reservados
+    _em_lotes(Marmores, [{
+        'id': i,
+        'nome': f'{rnd.choice(NOMES_PEDRA)} {rnd.choice(CORES)} {i}',
+        'preco_m2': round(rnd.uniform(150, 1800), 2),
+        'quantidade': round(rnd.uniform(0, 300), 2),
+    } for i in range(1, total_marmores + 1)])
+
+    total_estoque = volumes['estoque'] + reservados
+    _em_lotes(Estoque, [{
+        'id': i,
+        'nome': f'{rnd.choice(NOMES_PEDRA)} {rnd.choice(CORES)} {i}',
+        # Quantidade alta o bastante para as aprovações do benchmark.
+        'quantidade': round(rnd.uniform(5_000, 20_000), 2),
+        'unidade_medida': rnd.choice(['m²', 'm', 'un']),
+        'preco_unitario': round(rnd.uniform(80, 1500), 2),
+        'data_cadastro': agora - timedelta(days=rnd.randint(200, 1500)),
+        'data_atualizacao': agora - timedelta(days=rnd.randint(0, 200)),
+    } for i in range(1, total_estoque + 1)])
+
+    # Orçamentos: a massa normal mais os reservados para PUT status/DELETE
+    # e os já aprovados reservados para virar pedido.
+    total_orcamentos = volumes['orcamentos'] + 3 * reservados
+    orcamentos, itens = [], []
+    item_id = 1
+    for i in range(1, total_orcamentos + 1):
+        criado = agora - timedelta(days=rnd.randint(0, 720), minutes=rnd.randint(0, 1440))
+        total = 0.0
+        for _ in range(volumes['itens_por_orcamento']):
+            estoque_id = rnd.randint(1, volumes['estoque'])
+            quantidade = round(rnd.uniform(0.5, 12), 2)
+            preco = round(rnd.uniform(80, 1500), 2)
+            subtotal = round(quantidade * preco, 2)
+            total += subtotal
+            itens.append({
+                'id': item_id,
+                'orcamento_id': i,
+                'item_estoque_id': estoque_id,
+                'nome_item': f'Item {estoque_id}',
+                'quantidade': quantidade,
+                'unidade_medida': 'm²',
+                'preco_unitario_no_orcamento': preco,
+                'subtotal': subtotal,
+                'log_calculo': f'Área: {quantidade} m² x R$ {preco} = R$ {subtotal}\n' * 4,
+            })
+            item_id += 1
+        reservado = i > volumes['orcamentos']
+        if i <= volumes['pedidos']:
+            # Os primeiros orçamentos já viraram pedido
+            status = 'Aprovado'
+        elif i > volumes['orcamentos'] + 2 * reservados:
+            status = 'Aprovado'
+        elif reservado:
+            status = 'Pendente'
+        else:
+            status = rnd.choice(['Pendente', 'Aprovado', 'Rejeitado'])
+        orcamentos.append({
+            'id': i,
+            'cliente_id': rnd.randint(1, volumes['clientes']),
+            'data_criacao': criado,
+            'data_atualizacao': criado,
+            'total_orcamento': round(total, 2),
+            'observacoes': 'Bancada de cozinha e lavatório',
+            'status': status,
+        })
+    _em_lotes(Orcamentos, orcamentos)
+    _em_lotes(ItensOrcamento, itens)
+
+    # Reservas dos orçamentos pendentes, uma por item; parte já vencida,
+    # para a varredura. A validade é contada do relógio real, como nela.
+    pendentes = {o['id'] for o in orcamentos if o['status'] == 'Pendente'}
+    reservas, reservado = {}, Counter()
+    for item in itens:
+        if item['orcamento_id'] in pendentes:
+            chave = (item['orcamento_id'], item['item_estoque_id'])
+            reservas[chave] = reservas.get(chave, 0) + item['quantidade']
+            reservado[item['item_estoque_id']] += item['quantidade']
+    hoje = datetime.now()
+    # Gerador à parte: o restante da massa continua igual ao de antes das reservas
+    rnd_reservas = random.Random(semente + 1)
+    _em_lotes(Reservas, [{
+        'item_id': item_id,
+        'orcamento_id': orcamento_id,
+        'quantidade': quantidade,
+        'criado_em': hoje - timedelta(days=7),
+        'expira_em': hoje + timedelta(days=rnd_reservas.randint(-3, 7), minutes=rnd_reservas.randint(1, 1440)),
+    } for (orcamento_id, item_id), quantidade in reservas.items()])
+    db.session.execute(update(Estoque), [{'id': item_id, 'quantidade_reservada': quantidade}
+                                         for item_id, quantidade in reservado.items()])
+
+    movimentacoes = sorted(({
+        'item_id': rnd.randint(1, volumes['estoque']),
+        'tipo_movimentacao': rnd.choice(['Entrada', 'Saída']),
+        'quantidade': round(rnd.uniform(0.5, 40), 2),
+        'data_movimentacao': agora - timedelta(days=rnd.randint(0, 1500), minutes=rnd.randint(0, 1440)),
+        'observacoes': 'Carga de benchmark',
+    } for _ in range(volumes['movimentacoes'])), key=lambda m: m['data_movimentacao'])
+    # Ids em ordem de data, como no banco real: o arquivamento leva os
+    # menores ids e as movimentações novas continuam depois do maior
+    for i, movimentacao in enumerate(movimentacoes, 1):
+        movimentacao['id'] = i
+    _em_lotes(Movimentacoes_Estoque, movimentacoes)
+
+    # Pedidos dos primeiros orçamentos, com até dois pagamentos parciais
+    # (o saldo nunca zera, para os pagamentos do benchmark) e uma entrega.
+    pedidos, pagamentos, entregas = [], [], []
+    for i in range(1, volumes['pedidos'] + 1):
+        orcamento = orcamentos[i - 1]
+        total = orcamento['total_orcamento']
+        pago = 0.0
+        for _ in range(rnd.randint(0, 2)):
+            valor = round(total * rnd.uniform(0.1, 0.3), 2)
+            pago += valor
+            pagamentos.append({
+                'pedido_id': i,
+                'valor': valor,
+                'data_pagamento': orcamento['data_criacao'] + timedelta(days=rnd.randint(0, 30)),
+                'metodo_pagamento': rnd.choice(['Pix', 'Cartão', 'Boleto', 'Dinheiro']),
+            })
+        pedidos.append({
+            'id': i,
+            'cliente_id': orcamento['cliente_id'],
+            'orcamento_id': orcamento['id'],
+            'tipo_marmore': 'Bancada de cozinha',
+            'metragem': round(rnd.uniform(1, 20), 2),
+            'preco_total': total,
+            'saldo': round(total - pago, 2),
+            'data_pedido': orcamento['data_criacao'] + timedelta(days=1),
+            'status': rnd.choice(['Pendente', 'Aprovado', 'Concluído']),
+        })
+        entregas.append({
+            'id': i,
+            'pedido_id': i,
+            'data_entrega': (orcamento['data_criacao'] + timedelta(days=rnd.randint(7, 45))).date(),
+            'endereco_entrega': f'Rua {rnd.randint(1, 300)}, {rnd.randint(1, 2000)} - Niterói',
+            'status': rnd.choice(['Pendente', 'Em Rota', 'Entregue', 'Atrasado']),
+            'latitude': -22.88 + rnd.uniform(-0.3, 0.2),
+            'longitude': -43.10 + rnd.uniform(-0.5, 0.4),
+        })
+    _em_lotes(Pedidos, pedidos)
+    _em_lotes(Pagamentos, pagamentos)
+    _em_lotes(Entregas, entregas)
+
+    db.session.commit()
+
+    if meses_ativos is not None:
+        arquivar_movimentacoes(corte_arquivamento(meses_ativos, agora.date()), 5000)
+    atualizar_reposicao(agora.date())
+
+    def faixa(inicio, quantidade):
+        return list(range(inicio + 1, inicio + quantidade + 1))
+
+    # Dia com mais entregas, para a programação de rotas
+    por_dia = Counter(e['data_entrega'] for e in entregas)
+    dia_mais_cheio = max(sorted(por_dia), key=por_dia.__getitem__)
+
+    return {
+        'clientes': faixa(0, volumes['clientes']),
+        'clientes_reservados': faixa(volumes['clientes'], reservados),
+        'marmores': faixa(0, volumes['marmores']),
+        'marmores_reservados': faixa(volumes['marmores'], reservados),
+        'estoque': faixa(0, volumes['estoque']),
+        'estoque_reservados': faixa(volumes['estoque'], reservados),
+        'orcamentos': faixa(0, volumes['orcamentos']),
+        'orcamentos_aprovacao': faixa(volumes['orcamentos'], reservados),
+        'orcamentos_reservados': faixa(volumes['orcamentos'] + reservados, reservados),
+        'orcamentos_pedido': faixa(volumes['orcamentos'] + 2 * reservados, reservados),
+        'pedidos': faixa(0, volumes['pedidos']),
+        'datas_entrega': [dia_mais_cheio.isoformat()],
+        'movimentacoes': faixa(0, volumes['movimentacoes']),
+    }
@@ -0,0 +1,84 @@
+# -- coding: utf-8 --
+"""
+Mede a geração dos documentos dos orçamentos (services/documentos.py).
+
+  - por request: GET /orcamentos/<id>/documento gerando o arquivo (MISS) e
+    servindo o arquivo já gravado (HIT);
+  - em lote: os orçamentos aprovados do dia com mais aprovações da massa,
+    com 1 processo e com --processos processos.
+
+Uso (a partir de backend/):
+    python -m benchmarks.documentos [--formato html|pdf] [--processos 4] [--escala 5]
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from extensions import db
+from filiais import CLAIM, FILIAL_PADRAO
+from benchmarks import dados
+from models import Orcamentos
+from services.documentos import renderizar_aprovados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--formato', choices=['html', 'pdf'], default='html')
+    parser.add_argument('--processos', type=int, default=os.cpu_count())
+    parser.add_argument('--escala', type=float, default=5.0)
+    parser.add_argument('--requisicoes', type=int, default=50)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='marmoraria-documentos-')
+    pasta = os.path.join(tmpdir, 'documentos')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmpdir, 'documentos.db')}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+        'JWT_SECRET_KEY': 'benchmark-secret-key-com-tamanho-suficiente',
+        'ADMISSAO_ATIVA': False,
+        'DOCUMENTOS_PASTA': pasta,
+    })
+    with app.app_context():
+        print(f'Populando (escala {args.escala})...')
+        ids = dados.popular(escala=args.escala)
+        with open(os.devnull, 'w') as silencio, contextlib.redirect_stdout(silencio):
+            token = create_access_token(identity=1, additional_claims={CLAIM: FILIAL_PADRAO})
+        aprovados = Counter(d.date() for (d,) in db.session.query(Orcamentos.data_atualizacao)
+                            .filter(Orcamentos.status == 'Aprovado'))
+        dia, quantidade = aprovados.most_common(1)[0]
+
+    cliente = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    tempos = {'MISS': [], 'HIT': []}
+    with open(os.devnull, 'w') as silencio, contextlib.redirect_stdout(silencio):
+        for orcamento_id in ids['orcamentos'][:args.requisicoes]:
+            for _ in range(2):
+                inicio = time.perf_counter()
+                resposta = cliente.get(f'/orcamentos/{orcamento_id}/documento?formato={args.formato}', headers=headers)
+                tempos[resposta.headers['X-Documento-Cache']].append((time.perf_counter() - inicio) * 1000)
+    for situacao, ms in tempos.items():
+        print(f'request {situacao:<5} p50 {statistics.median(ms):7.2f} ms  ({len(ms)} requests)')
+
+    print(f'Lote: {quantidade} orçamentos aprovados em {dia:%d/%m/%Y}')
+    with app.app_context():
+        for processos in sorted({1, args.processos}):
+            shutil.rmtree(pasta, ignore_errors=True)
+            inicio = time.perf_counter()
+            gerados, _ = renderizar_aprovados(dia, args.formato, processos)
+            segundos = time.perf_counter() - inicio
+            print(f'{processos:>3} processo(s): {gerados} documentos em {segundos:.2f} s ({gerados / segundos:.0f}/s)')
+    shutil.rmtree(tmpdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
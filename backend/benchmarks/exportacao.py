@@ -0,0 +1,80 @@
+# -- coding: utf-8 --
+"""
+Mede a exportação analítica (services/exportacao.py).
+
+  - exportação completa (primeira execução, sem marcas): linhas e
+    linhas/s por tabela;
+  - exportação incremental depois de alterar alguns clientes e orçamentos
+    e registrar movimentações novas: só essas linhas (e os itens dos
+    orçamentos alterados) são gravadas.
+
+Precisa do pyarrow. Uso (a partir de backend/):
+    python -m benchmarks.exportacao [--formato parquet|arrow] [--escala 5] [--lote 10000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from app import create_app
+from extensions import db
+from benchmarks import dados
+from models import Clientes, Movimentacoes_Estoque, Orcamentos
+from services.exportacao import exportar
+
+
+def _relatorio(titulo, resultado):
+    print(titulo)
+    for tabela, dados_tabela in resultado.items():
+        linhas, segundos = dados_tabela['linhas'], dados_tabela['segundos']
+        tamanho = os.path.getsize(dados_tabela['arquivo']) if dados_tabela['arquivo'] else 0
+        print(f'  {tabela:<22} {linhas:>8} linhas em {segundos:6.2f} s '
+              f'({linhas / segundos if segundos else 0:>9.0f} linhas/s, {tamanho / 1024:8.1f} KiB)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--formato', choices=['parquet', 'arrow'], default='parquet')
+    parser.add_argument('--escala', type=float, default=5.0)
+    parser.add_argument('--lote', type=int, default=10000)
+    parser.add_argument('--alterados', type=int, default=50)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='marmoraria-exportacao-')
+    pasta = os.path.join(tmpdir, 'exportacao')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmpdir, 'exportacao.db')}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+        'JWT_SECRET_KEY': 'benchmark-secret-key-com-tamanho-suficiente',
+        'EXPORTACAO_PASTA': pasta,
+        'EXPORTACAO_TAMANHO_LOTE': args.lote,
+        # A massa é gravada de uma vez, sem transações concorrentes
+        'EXPORTACAO_MARGEM_SEGUNDOS': 0,
+    })
+    with app.app_context():
+        print(f'Populando (escala {args.escala})...')
+        ids = dados.popular(escala=args.escala)
+        # data_atualizacao tem resolução de segundos: a exportação só
+        # inclui o segundo atual depois que ele termina
+        time.sleep(1.1)
+        _relatorio('Completa:', exportar(formato=args.formato))
+
+        for cliente in Clientes.query.filter(Clientes.id.in_(ids['clientes'][:args.alterados])):
+            cliente.telefone = '21999990000'
+        for orcamento in Orcamentos.query.filter(Orcamentos.id.in_(ids['orcamentos'][:args.alterados])):
+            orcamento.observacoes = 'Alterado para o benchmark de exportação'
+        db.session.add_all(Movimentacoes_Estoque(item_id=ids['estoque'][i % len(ids['estoque'])],
+                                                 tipo_movimentacao='Saída', quantidade=1)
+                           for i in range(args.alterados))
+        db.session.commit()
+        time.sleep(1.1)
+        _relatorio(f'Incremental ({args.alterados} clientes, orçamentos e movimentações alterados):',
+                   exportar(formato=args.formato))
+    shutil.rmtree(tmpdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+# -- coding: utf-8 --
+"""
+Mede a latência das listagens de uma filial conforme o banco recebe outras.
+
+Popula a massa de benchmarks.dados na filial padrão e copia essa massa
+para novas filiais (mesmas linhas, ids deslocados), dobrando o total a
+cada rodada. Em cada rodada, as listagens são chamadas com o token do
+funcionário da filial padrão: como as consultas são restritas à filial do
+token e os índices começam por filial_id, o p50 deve ficar estável
+enquanto o total de linhas cresce.
+
+Uso (a partir de backend/):
+    python -m benchmarks.filiais [--escala 1] [--filiais 8] [--requisicoes 20]
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import func, insert, literal, select
+
+from app import create_app
+from extensions import db
+from benchmarks import dados
+from filiais import FILIAL_PADRAO
+from models import Clientes, Filiais, Movimentacoes_Estoque
+
+ROTAS = ['/clientes', '/marmores', '/estoque', '/orcamentos?status=Pendente', '/pedidos',
+         '/movimentacoes_estoque']
+
+# Ids das cópias: filial n usa (n - 1) * DESLOCAMENTO + id original
+DESLOCAMENTO = 10_000_000
+# Não copiadas: cadastros globais, funcionários e o que a massa não gera
+FORA_DA_COPIA = {'filiais', 'funcionarios', 'marcas_processamento', 'tarefas', 'alteracoes'}
+
+
+def copiar_filial(filial_id):
+    """Copia as linhas da filial padrão (e das tabelas filhas) para 'filial_id'."""
+    db.session.add(Filiais(id=filial_id, nome=f'Filial {filial_id}'))
+    db.session.flush()
+    deslocamento = (filial_id - 1) * DESLOCAMENTO
+    copiadas = {t.name for t in db.metadata.sorted_tables if t.name not in FORA_DA_COPIA}
+    for tabela in db.metadata.sorted_tables:
+        if tabela.name not in copiadas:
+            continue
+        colunas = []
+        for coluna in tabela.columns:
+            chaves = {fk.column.table.name for fk in coluna.foreign_keys}
+            if coluna.name == 'filial_id':
+                colunas.append(literal(filial_id).label(coluna.name))
+            elif (coluna.name == 'id' and coluna.primary_key) or chaves & copiadas:
+                colunas.append((coluna + deslocamento).label(coluna.name))
+            else:
+                colunas.append(coluna)
+        original = list(tabela.primary_key.columns)[0]
+        db.session.execute(insert(tabela).from_select(
+            [c.name for c in tabela.columns], select(*colunas).where(original < DESLOCAMENTO)))
+    db.session.commit()
+
+
+def medir(cliente, headers, requisicoes):
+    """p50 (ms) de cada rota com o token da filial padrão."""
+    resultado = {}
+    for rota in ROTAS:
+        tempos = []
+        for _ in range(requisicoes):
+            inicio = time.perf_counter()
+            resposta = cliente.get(rota, headers=headers)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+            assert resposta.status_code == 200, (rota, resposta.status_code)
+        resultado[rota] = statistics.median(tempos)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escala', type=float, default=1.0)
+    parser.add_argument('--filiais', type=int, default=8)
+    parser.add_argument('--requisicoes', type=int, default=20)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='marmoraria-filiais-')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmpdir, 'filiais.db')}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+        'JWT_SECRET_KEY': 'benchmark-secret-key-com-tamanho-suficiente',
+        'ADMISSAO_ATIVA': False,
+    })
+    with app.app_context():
+        print(f'Populando (escala {args.escala})...')
+        dados.popular(escala=args.escala)
+
+    cliente = app.test_client()
+    with open(os.devnull, 'w') as silencio, contextlib.redirect_stdout(silencio):
+        token = cliente.post('/login', json={'email': dados.EMAIL, 'senha': dados.SENHA}).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    print(f"{'filiais':>7} {'movimentações':>22} {'clientes':>16}  " + '  '.join(f'{r[:14]:>14}' for r in ROTAS))
+    filiais = 1
+    while True:
+        with app.app_context():
+            contagem = {}
+            for model in (Movimentacoes_Estoque, Clientes):
+                total = db.session.query(func.count(model.id)).scalar()
+                da_filial = db.session.query(func.count(model.id)).filter(model.filial_id == FILIAL_PADRAO).scalar()
+                contagem[model] = f'{da_filial}/{total}'
+        with open(os.devnull, 'w') as silencio, contextlib.redirect_stdout(silencio):
+            p50 = medir(cliente, headers, args.requisicoes)
+        print(f'{filiais:>7} {contagem[Movimentacoes_Estoque]:>22} {contagem[Clientes]:>16}  '
+              + '  '.join(f'{p50[r]:>11.2f} ms' for r in ROTAS))
+
+        if filiais * 2 > args.filiais:
+            break
+        with app.app_context():
+            for filial_id in range(filiais + 1, filiais * 2 + 1):
+                copiar_filial(filial_id)
+        filiais *= 2
+
+    shutil.rmtree(tmpdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
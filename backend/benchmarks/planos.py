@@ -0,0 +1,128 @@
+# -- coding: utf-8 --
+"""
+Verifica os planos de execução das consultas de cada rota.
+
+Executa cada rota de benchmarks.carga uma vez sobre um banco populado,
+captura os comandos SQL emitidos e roda EXPLAIN em cada um. Uma consulta
+com WHERE que percorre a tabela inteira (SCAN no SQLite, type=ALL no MySQL)
+é reportada como falha. Listagens sem filtro não entram na verificação.
+
+Uso (a partir de backend/):
+    python -m benchmarks.planos [--database-url ...] [--escala 0.2]
+
+A mesma verificação roda no pytest (tests/test_planos.py), num SQLite pequeno.
+
+ATENÇÃO: o banco informado é APAGADO e recriado. Use apenas bancos locais.
+"""
+import argparse
+import contextlib
+import json
+import os
+import re
+import sys
+import tempfile
+
+from flask import g, has_request_context
+from sqlalchemy import event
+
+from app import create_app
+from extensions import db
+from benchmarks import dados
+from benchmarks.carga import ROTAS, montar_contexto
+
+FILTRADA = re.compile(r'\bWHERE\b', re.IGNORECASE)
+
+
+def _capturar_sql(app):
+    with app.app_context():
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def capturar(conn, cursor, statement, parameters, context, executemany):
+            if has_request_context() and not executemany:
+                g.setdefault('comandos', []).append((statement, parameters))
+
+    @app.after_request
+    def guardar(resposta):
+        app.extensions['planos_comandos'].extend(g.get('comandos', []))
+        return resposta
+
+    app.extensions['planos_comandos'] = []
+
+
+def varreduras(conexao, statement, parameters):
+    """Linhas do plano que indicam leitura da tabela inteira."""
+    if conexao.dialect.name == 'sqlite':
+        plano = conexao.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+        return [linha[-1] for linha in plano if linha[-1].startswith('SCAN ')]
+    if conexao.dialect.name == 'mysql':
+        plano = conexao.exec_driver_sql(f'EXPLAIN {statement}', parameters).mappings().fetchall()
+        return [f"{linha['table']}: type=ALL" for linha in plano if linha['type'] == 'ALL']
+    raise RuntimeError(f'Dialeto não suportado: {conexao.dialect.name}')
+
+
+def verificar(url, escala):
+    """
+    Popula o banco em 'url', executa cada rota uma vez e gera (nome da rota,
+    problemas): as varreduras completas das consultas filtradas, ou o status
+    inesperado da resposta. Lista vazia = rota ok.
+    """
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': url,
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+        'JWT_SECRET_KEY': 'benchmark-secret-key-com-tamanho-suficiente',
+        # Todas as rotas em sequência com o mesmo usuário: sem limite por usuário
+        'ADMISSAO_ATIVA': False,
+    })
+    with app.app_context():
+        ids = dados.popular(escala=escala, reservados=1)
+    _capturar_sql(app)
+
+    cliente = app.test_client()
+    ctx = montar_contexto(ids)
+    for rota in ROTAS:
+        with open(os.devnull, 'w') as silencio, contextlib.redirect_stdout(silencio):
+            token = cliente.post('/login', json={'email': dados.EMAIL, 'senha': dados.SENHA}).get_json()['access_token']
+            app.extensions['planos_comandos'].clear()
+            headers = {'Authorization': f'Bearer {token}'} if rota.autenticada else {}
+            resposta = cliente.open(rota.caminho(ctx), method=rota.metodo, headers=headers,
+                                    data=json.dumps(rota.corpo(ctx)) if rota.corpo else None,
+                                    content_type='application/json')
+        if resposta.status_code != rota.status_esperado:
+            yield rota.nome, [f'status {resposta.status_code} inesperado']
+            continue
+
+        problemas = set()
+        with app.app_context():
+            with db.engine.connect() as conexao:
+                for statement, parameters in app.extensions['planos_comandos']:
+                    if not statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+                        continue
+                    if not FILTRADA.search(statement):
+                        continue
+                    for linha in varreduras(conexao, statement, parameters):
+                        problemas.add(f'{linha}\n      {" ".join(statement.split())[:200]}')
+                conexao.rollback()
+        yield rota.nome, sorted(problemas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url')
+    parser.add_argument('--escala', type=float, default=0.2)
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='marmoraria-planos-'), 'planos.db')}"
+    falhas = 0
+    for nome, problemas in verificar(url, args.escala):
+        if problemas:
+            falhas += 1
+            print(f'FALHA {nome}')
+            for problema in problemas:
+                print(f'    {problema}')
+        else:
+            print(f'ok    {nome}')
+
+    return 1 if falhas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
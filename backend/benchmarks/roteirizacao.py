@@ -0,0 +1,80 @@
+# -- coding: utf-8 --
+"""
+Mede a programação de entregas (services/roteirizacao.py) com paradas
+sintéticas espalhadas pela região metropolitana do Rio.
+
+Para cada quantidade de paradas mostra o tempo total (divisão em cargas +
+vizinho mais próximo + 2-opt), o número de cargas e a distância antes e
+depois do 2-opt. Termina com erro se alguma rodada passar de
+--limite-segundos.
+
+Uso (a partir de backend/):
+    python -m benchmarks.roteirizacao [--paradas 100 300 1000] [--limite-segundos 5]
+    python -m benchmarks.roteirizacao --capacidade-m2 100000 --capacidade-kg 1e9  # uma rota só
+"""
+import argparse
+import random
+import sys
+import time
+
+from services.roteirizacao import (
+    agrupar_em_cargas, comprimento, matriz_distancias, montar_rotas, vizinho_mais_proximo,
+)
+
+DEPOSITO = (-22.8833, -43.1036)
+PESO_KG_M2 = 55
+
+
+def paradas_sinteticas(quantidade, semente=42):
+    rnd = random.Random(semente)
+    paradas = []
+    for i in range(1, quantidade + 1):
+        area = round(rnd.uniform(1.5, 12), 2)
+        paradas.append({
+            'entrega_id': i,
+            'latitude': DEPOSITO[0] + rnd.uniform(-0.35, 0.25),
+            'longitude': DEPOSITO[1] + rnd.uniform(-0.6, 0.5),
+            'area_m2': area,
+            'peso_kg': area * PESO_KG_M2,
+        })
+    return paradas
+
+
+def distancia_sem_2opt(paradas, capacidade_kg, capacidade_m2):
+    total = 0.0
+    for carga in agrupar_em_cargas(paradas, DEPOSITO, capacidade_kg, capacidade_m2):
+        matriz = matriz_distancias([DEPOSITO] + [(p['latitude'], p['longitude']) for p in carga])
+        total += comprimento(vizinho_mais_proximo(matriz), matriz)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--paradas', type=int, nargs='+', default=[50, 100, 300, 600, 1000])
+    parser.add_argument('--limite-segundos', type=float, default=5.0)
+    parser.add_argument('--capacidade-kg', type=float, default=3500)
+    parser.add_argument('--capacidade-m2', type=float, default=60)
+    args = parser.parse_args()
+
+    print(f"{'paradas':>8}{'cargas':>8}{'tempo ms':>11}{'km vizinho':>12}{'km 2-opt':>10}{'ganho':>8}")
+    lento = False
+    for quantidade in args.paradas:
+        paradas = paradas_sinteticas(quantidade)
+        inicio = time.perf_counter()
+        cargas = montar_rotas(paradas, DEPOSITO, args.capacidade_kg, args.capacidade_m2)
+        segundos = time.perf_counter() - inicio
+
+        assert sorted(p['entrega_id'] for c in cargas for p in c['paradas']) == list(range(1, quantidade + 1))
+        km_2opt = sum(c['distancia_km'] for c in cargas)
+        km_vizinho = distancia_sem_2opt(paradas, args.capacidade_kg, args.capacidade_m2)
+        print(f"{quantidade:>8}{len(cargas):>8}{segundos * 1000:>11.1f}{km_vizinho:>12.1f}{km_2opt:>10.1f}"
+              f"{(1 - km_2opt / km_vizinho) * 100:>7.1f}%")
+        lento = lento or segundos > args.limite_segundos
+
+    if lento:
+        print(f'Alguma rodada passou de {args.limite_segundos} s.')
+    return 1 if lento else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# -- coding: utf-8 --
+"""
+Mede o custo de inicialização de um worker.
+
+Cada rodada é um processo Python novo que mede, em sequência:
+  - import: importar o módulo app
+  - create_app: montar o app (extensões e blueprints)
+  - primeiro_request: primeiro request servido (conexão com o banco incluída)
+
+Uso (a partir de backend/):
+    python -m benchmarks.startup [--rodadas 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RODADA = r"""
+import json, time
+t0 = time.perf_counter()
+import app as app_module
+t1 = time.perf_counter()
+app = app_module.create_app({
+    'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+    'SQLALCHEMY_ENGINE_OPTIONS': {},
+    'JWT_SECRET_KEY': 'benchmark',
+})
+t2 = time.perf_counter()
+from extensions import db
+with app.app_context():
+    db.create_all()
+t3 = time.perf_counter()
+resposta = app.test_client().post('/login', json={'email': 'x@x.com', 'senha': 'x'})
+t4 = time.perf_counter()
+assert resposta.status_code == 401, resposta.status_code
+print(json.dumps({'import': t1 - t0, 'create_app': t2 - t1, 'primeiro_request': t4 - t3}))
+"""
+
+
+def medir(rodadas):
+    resultados = []
+    for _ in range(rodadas):
+        saida = subprocess.run(
+            [sys.executable, '-c', RODADA],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        )
+        resultados.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+    return {
+        etapa: statistics.median(r[etapa] for r in resultados) * 1000
+        for etapa in ('import', 'create_app', 'primeiro_request')
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rodadas', type=int, default=10)
+    args = parser.parse_args()
+
+    medianas = medir(args.rodadas)
+    for etapa, ms in medianas.items():
+        print(f"{etapa:<18}{ms:8.1f} ms")
+    print(f"{'total':<18}{sum(medianas.values()):8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
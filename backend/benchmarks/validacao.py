@@ -0,0 +1,67 @@
+# -- coding: utf-8 --
+"""
+Mede o custo da validação dos corpos JSON (validacao.py) por request.
+
+Para cada esquema mostra os microssegundos por chamada de validar() com um
+corpo válido e com um corpo inválido (o caminho de erro percorre todos os
+erros para achar os itens inválidos). Orçamentos são medidos com 1, 10 e
+100 itens. Sem banco nem app: só a validação.
+
+Uso (a partir de backend/):
+    python -m benchmarks.validacao [--repeticoes 2000]
+"""
+import argparse
+import sys
+import time
+
+from validacao import ErroValidacao, validar
+
+ITEM = {'item_estoque_id': 1, 'quantidade': 2.5, 'preco_unitario_praticado': 320.0,
+        'subtotal': 800.0, 'log_calculo': 'Área: 2.5 m² x R$ 320.00 = R$ 800.00'}
+
+# nome -> (corpo válido, corpo inválido)
+CASOS = {
+    'login': ({'email': 'a@b.com', 'senha': 'Senha@123'}, {'email': 'a@b.com'}),
+    'funcionario': ({'nome': 'Ana', 'email': 'ana@marmoraria.com', 'senha': 'Senha@Forte123', 'cpf': '123.456.789-09'},
+                    {'nome': 'Ana', 'email': 'ana@marmoraria.com', 'senha': 'senhafraca', 'cpf': '123'}),
+    'cliente': ({'nome': 'Cliente', 'cpf': '123.456.789-09', 'telefone': '(21) 99999-0000'},
+                {'nome': 'Cliente', 'cpf': '123', 'telefone': '(21) 99999-0000'}),
+    'estoque': ({'nome': 'Granito', 'quantidade': '10.5', 'unidade_medida': 'm²', 'preco_unitario': 320},
+                {'nome': 'Granito', 'quantidade': 'dez', 'unidade_medida': 'm²', 'preco_unitario': 320}),
+    'movimentacao': ({'item_id': 1, 'tipo_movimentacao': 'Entrada', 'quantidade': 3},
+                     {'item_id': 1, 'tipo_movimentacao': 'Troca', 'quantidade': 3}),
+    'pagamento': ({'valor': '150.00', 'metodo_pagamento': 'Pix'}, {'valor': 'x', 'metodo_pagamento': 'Pix'}),
+}
+for n in (1, 10, 100):
+    # No corpo inválido um item em cada dez está incompleto
+    invalidos = [ITEM if i % 10 else {'item_estoque_id': 1} for i in range(1, n + 1)]
+    CASOS[f'orcamento ({n} itens)'] = ({'cliente_id': 1, 'itens': [ITEM] * n},
+                                       {'cliente_id': 1, 'itens': invalidos if n > 1 else [{}]})
+
+
+def medir(esquema, corpo, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        try:
+            validar(esquema, corpo)
+        except ErroValidacao:
+            pass
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'esquema':<24}{'válido µs':>12}{'inválido µs':>14}")
+    for nome, (valido, invalido) in CASOS.items():
+        esquema = nome.split(' ')[0]
+        validar(esquema, valido)  # falha aqui se o corpo de exemplo deixou de ser válido
+        print(f"{nome:<24}{medir(esquema, valido, args.repeticoes):>12.1f}"
+              f"{medir(esquema, invalido, args.repeticoes):>14.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
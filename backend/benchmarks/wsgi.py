@@ -0,0 +1,14 @@
+# -- coding: utf-8 --
+"""
+App servido pelo Gunicorn em python -m benchmarks.carga --gunicorn: a
+mesma configuração do benchmark em processo, com o contador de comandos
+SQL. O banco e a concorrência vêm do ambiente (BENCHMARK_DATABASE_URL,
+BENCHMARK_CONCORRENCIA), definido por benchmarks.carga.
+"""
+import os
+
+from app import create_app
+from benchmarks.carga import _instalar_contador_sql, configuracao
+
+app = create_app(configuracao(os.environ['BENCHMARK_DATABASE_URL'], int(os.environ['BENCHMARK_CONCORRENCIA'])))
+_instalar_contador_sql(app)
@@ -0,0 +1,112 @@
+# -- coding: utf-8 --
+import os
+import tempfile
+
+# Configuração do MySQL via variáveis de ambiente
+if os.path.exists('.env'):
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+def _engine_options():
+    # Pool de conexões: com workers eventlet vários requests dividem o mesmo
+    # processo, então o pool precisa comportar GUNICORN_WORKER_CONNECTIONS
+    # requests esperando o banco ao mesmo tempo.
+    engine_options = {'pool_pre_ping': True, 'pool_recycle': 280}
+    if os.getenv('DB_POOL_SIZE'):
+        engine_options['pool_size'] = int(os.getenv('DB_POOL_SIZE'))
+    if os.getenv('DB_MAX_OVERFLOW'):
+        engine_options['max_overflow'] = int(os.getenv('DB_MAX_OVERFLOW'))
+    return engine_options
+
+
+class Config:
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options()
+
+    # Configuração do JWT
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
+
+    # Linhas apagadas (ou arquivadas) por transação ao excluir um item de
+    # estoque com histórico e ao arquivar movimentações antigas
+    ESTOQUE_TAMANHO_LOTE_EXCLUSAO = int(os.getenv('ESTOQUE_TAMANHO_LOTE_EXCLUSAO', '1000'))
+    # Movimentações mais antigas que isso (em meses) vão para o arquivo
+    MOVIMENTACOES_MESES_ATIVOS = int(os.getenv('MOVIMENTACOES_MESES_ATIVOS', '12'))
+    # Validade das reservas de estoque dos orçamentos pendentes
+    RESERVAS_VALIDADE_DIAS = int(os.getenv('RESERVAS_VALIDADE_DIAS', '7'))
+    # Revisões dos orçamentos: uma com os itens completos a cada N, as
+    # demais só com a diferença para a anterior
+    ORCAMENTOS_REVISOES_INTERVALO = int(os.getenv('ORCAMENTOS_REVISOES_INTERVALO', '10'))
+    # Ponto de reposição (services/reposicao.py): prazo de entrega do
+    # fornecedor, chance de não faltar material durante o prazo e meses de
+    # histórico usados na previsão
+    REPOSICAO_PRAZO_DIAS = int(os.getenv('REPOSICAO_PRAZO_DIAS', '15'))
+    REPOSICAO_NIVEL_SERVICO = float(os.getenv('REPOSICAO_NIVEL_SERVICO', '0.95'))
+    REPOSICAO_MESES_HISTORICO = int(os.getenv('REPOSICAO_MESES_HISTORICO', '24'))
+
+    # Documentos dos orçamentos para impressão (services/documentos.py):
+    # pasta onde ficam gravados, compartilhada pelos workers do servidor
+    DOCUMENTOS_PASTA = os.getenv('DOCUMENTOS_PASTA', os.path.join(tempfile.gettempdir(), 'marmoraria-documentos'))
+    DOCUMENTOS_EMPRESA = os.getenv('DOCUMENTOS_EMPRESA', 'Marmoraria')
+
+    # Exportação analítica (services/exportacao.py): pasta dos arquivos,
+    # formato (parquet ou arrow), linhas por lote, margem para transações
+    # ainda sem commit (e atraso da réplica) e banco de onde ler, se não o
+    # principal
+    EXPORTACAO_PASTA = os.getenv('EXPORTACAO_PASTA', os.path.join(tempfile.gettempdir(), 'marmoraria-exportacao'))
+    EXPORTACAO_FORMATO = os.getenv('EXPORTACAO_FORMATO', 'parquet')
+    EXPORTACAO_TAMANHO_LOTE = int(os.getenv('EXPORTACAO_TAMANHO_LOTE', '10000'))
+    EXPORTACAO_MARGEM_SEGUNDOS = int(os.getenv('EXPORTACAO_MARGEM_SEGUNDOS', '60'))
+    EXPORTACAO_DATABASE_URL = os.getenv('EXPORTACAO_DATABASE_URL')
+
+    # Tarefas em segundo plano (ver tarefas.py)
+    TAREFAS_BROKER_URL = os.getenv('TAREFAS_BROKER_URL')
+    TAREFAS_CONCORRENCIA = int(os.getenv('TAREFAS_CONCORRENCIA', '2'))
+    TAREFAS_MAX_TENTATIVAS = int(os.getenv('TAREFAS_MAX_TENTATIVAS', '3'))
+    TAREFAS_ESPERA_RETENTATIVA = float(os.getenv('TAREFAS_ESPERA_RETENTATIVA', '2'))
+    # Orçamentos com mais itens que isso são aprovados em segundo plano
+    TAREFAS_LIMITE_ITENS_APROVACAO = int(os.getenv('TAREFAS_LIMITE_ITENS_APROVACAO', '50'))
+
+    # Feed de alterações (GET /alteracoes e /alteracoes/stream)
+    ALTERACOES_LIMITE = int(os.getenv('ALTERACOES_LIMITE', '500'))
+    ALTERACOES_INTERVALO_SSE = float(os.getenv('ALTERACOES_INTERVALO_SSE', '1'))
+    # Cada conexão SSE ocupa um worker sync; ela é encerrada depois desse
+    # tempo e o EventSource reconecta sozinho a partir do último id recebido.
+    ALTERACOES_DURACAO_SSE = int(os.getenv('ALTERACOES_DURACAO_SSE', '300'))
+    ALTERACOES_RETENCAO_DIAS = int(os.getenv('ALTERACOES_RETENCAO_DIAS', '7'))
+    # O id da alteração é atribuído no INSERT, não no commit: as mais novas
+    # que isso (segundos) só são entregues depois, quando as transações
+    # abertas com ids menores já terminaram. Maior que a transação mais longa.
+    ALTERACOES_MARGEM_SEGUNDOS = int(os.getenv('ALTERACOES_MARGEM_SEGUNDOS', '5'))
+
+    # Trilha de auditoria (auditoria.py): linhas por INSERT, espera para
+    # juntar commits num mesmo lote (segundos), commits na fila antes de o
+    # request esperar a gravação e registros por página em GET /auditoria
+    AUDITORIA_TAMANHO_LOTE = int(os.getenv('AUDITORIA_TAMANHO_LOTE', '500'))
+    AUDITORIA_INTERVALO = float(os.getenv('AUDITORIA_INTERVALO', '0.5'))
+    AUDITORIA_FILA_MAXIMA = int(os.getenv('AUDITORIA_FILA_MAXIMA', '10000'))
+    AUDITORIA_LIMITE = int(os.getenv('AUDITORIA_LIMITE', '100'))
+
+    # Programação de entregas (GET /entregas/programacao): capacidade de cada
+    # caminhão, peso médio das chapas e coordenadas do depósito
+    ENTREGAS_CAPACIDADE_KG = float(os.getenv('ENTREGAS_CAPACIDADE_KG', '3500'))
+    ENTREGAS_CAPACIDADE_M2 = float(os.getenv('ENTREGAS_CAPACIDADE_M2', '60'))
+    ENTREGAS_PESO_KG_M2 = float(os.getenv('ENTREGAS_PESO_KG_M2', '55'))
+    ENTREGAS_DEPOSITO_LAT = float(os.getenv('ENTREGAS_DEPOSITO_LAT', '-22.8833'))
+    ENTREGAS_DEPOSITO_LON = float(os.getenv('ENTREGAS_DEPOSITO_LON', '-43.1036'))
+
+    # Sincronização incremental (GET /sync): alterações lidas por página
+    SYNC_LIMITE = int(os.getenv('SYNC_LIMITE', '1000'))
+
+    # Controle de admissão (admissao.py). Por usuário do JWT (ou IP): balde
+    # de ADMISSAO_RAJADA fichas reposto a ADMISSAO_TAXA fichas/s; rotas
+    # pesadas gastam ADMISSAO_CUSTO_PESADA fichas, as demais uma. As vagas
+    # limitam os requests simultâneos de cada classe de rota no servidor
+    # (em cada processo quando o app não é carregado antes do fork).
+    ADMISSAO_ATIVA = os.getenv('ADMISSAO_ATIVA', '1') == '1'
+    ADMISSAO_TAXA = float(os.getenv('ADMISSAO_TAXA', '5'))
+    ADMISSAO_RAJADA = float(os.getenv('ADMISSAO_RAJADA', '30'))
+    ADMISSAO_CUSTO_PESADA = float(os.getenv('ADMISSAO_CUSTO_PESADA', '10'))
+    ADMISSAO_CONCORRENCIA_PESADA = int(os.getenv('ADMISSAO_CONCORRENCIA_PESADA', '2'))
+    ADMISSAO_CONCORRENCIA_LEVE = int(os.getenv('ADMISSAO_CONCORRENCIA_LEVE', '32'))
@@ -0,0 +1,17 @@
+# -- coding: utf-8 --
+"""
+Extensões do Flask criadas sem aplicação.
+
+Cada uma é ligada ao app em create_app() via init_app(), o que permite criar
+várias instâncias (testes, benchmarks) e carregar o app antes do fork do
+Gunicorn (--preload).
+"""
+from flask_sqlalchemy import SQLAlchemy
+from flask_cors import CORS
+from flask_jwt_extended import JWTManager
+from flask_migrate import Migrate
+
+db = SQLAlchemy()
+migrate = Migrate()
+jwt = JWTManager()
+cors = CORS()
@@ -0,0 +1,181 @@
+# -- coding: utf-8 --
+"""
+Filiais: uma instalação atende todas as lojas.
+
+As tabelas das lojas (modelos com o mixin DaFilial) têm a coluna
+filial_id. O login grava a filial do funcionário no claim 'filial' do
+JWT e, durante o request, um listener de do_orm_execute acrescenta
+filial_id = <filial do token> a toda consulta do ORM nessas tabelas (com
+with_loader_criteria: vale também para joins, relacionamentos, get() e
+UPDATE/DELETE em massa do ORM). As rotas não precisam filtrar nada, e os
+índices dessas tabelas começam por filial_id, então cada loja lê só as
+suas linhas, qualquer que seja o volume das outras.
+
+Fora de um request (comandos do flask, benchmarks) as consultas enxergam
+todas as filiais, a não ser dentro de na_filial(); as tarefas em segundo
+plano rodam na filial de quem as criou. Linhas novas recebem a filial
+atual ou, sem uma, FILIAL_PADRAO (a loja que já existia antes das
+filiais). Consultas que precisam de todas as filiais num request usam
+.execution_options(todas_as_filiais=True).
+
+Comandos SQL montados sem o ORM (conexao.execute, db.engine) não passam
+pelo listener.
+"""
+import contextlib
+import contextvars
+
+import click
+from flask import g, has_request_context, jsonify, request
+from flask_jwt_extended import decode_token
+from sqlalchemy import event
+from sqlalchemy.orm import Session, declared_attr, with_loader_criteria
+
+from extensions import db
+
+FILIAL_PADRAO = 1
+CLAIM = 'filial'
+
+_filial = contextvars.ContextVar('filial', default=None)
+_NAO_LIDA = object()
+
+
+class DaFilial:
+    """Mixin dos modelos cujas linhas pertencem a uma filial."""
+
+    @declared_attr
+    def filial_id(cls):
+        # with_loader_criteria também chama isto no próprio mixin, que não tem tabela
+        tabela = getattr(cls, '__tablename__', None)
+        return db.Column(db.Integer, db.ForeignKey('filiais.id', name=tabela and f'fk_{tabela}_filial_id'),
+                         nullable=False, default=filial_para_gravar, server_default=str(FILIAL_PADRAO))
+
+
+def _filial_do_token():
+    # Mesmo token que a rota confere: Authorization ou ?token= (stream SSE).
+    # Token inválido ou ausente: a própria rota responde 401.
+    cabecalho = request.headers.get('Authorization', '')
+    token = cabecalho[7:] if cabecalho.startswith('Bearer ') else request.args.get('token')
+    if not token:
+        return None
+    try:
+        return decode_token(token).get(CLAIM)
+    except Exception:
+        return None
+
+
+def filial_atual():
+    """Filial das consultas: a de na_filial(), a do token do request ou None (todas)."""
+    filial = _filial.get()
+    if filial is not None or not has_request_context():
+        return filial
+    filial = g.get('filial', _NAO_LIDA)
+    if filial is _NAO_LIDA:
+        filial = g.filial = _filial_do_token()
+    return filial
+
+
+def filial_para_gravar():
+    """Filial das linhas novas (default da coluna filial_id)."""
+    filial = filial_atual()
+    return FILIAL_PADRAO if filial is None else filial
+
+
+@contextlib.contextmanager
+def na_filial(filial_id):
+    """Restringe as consultas e as gravações do bloco à filial (tarefas, scripts)."""
+    marca = _filial.set(filial_id)
+    try:
+        yield
+    finally:
+        _filial.reset(marca)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _restringir_a_filial(estado):
+    if not (estado.is_select or estado.is_update or estado.is_delete):
+        return
+    # Carregamentos de colunas e relacionamentos herdam o critério da consulta que os originou
+    if estado.is_column_load or estado.is_relationship_load:
+        return
+    if estado.execution_options.get('todas_as_filiais'):
+        return
+    filial = filial_atual()
+    if filial is None:
+        return
+    estado.statement = estado.statement.options(
+        with_loader_criteria(DaFilial, lambda cls: cls.filial_id == filial, include_aliases=True))
+
+
+def init_app(app):
+    from extensions import jwt
+
+    # Tokens emitidos antes das filiais não têm o claim: enxergariam todas
+    @jwt.token_verification_loader
+    def _token_com_filial(_jwt_header, jwt_data):
+        return CLAIM in jwt_data
+
+    @jwt.token_verification_failed_loader
+    def _token_sem_filial(_jwt_header, _jwt_data):
+        return jsonify({"erro": "Sessão expirada. Faça login novamente."}), 401
+
+    app.cli.add_command(comandos)
+
+
+@click.group('filiais')
+def comandos():
+    """Cadastro das filiais."""
+
+
+@comandos.command('criar')
+@click.argument('nome')
+def criar(nome):
+    """Cadastra uma filial e mostra o id (use-o em 'filiais funcionario')."""
+    from models import Filiais
+
+    filial = Filiais(nome=nome)
+    db.session.add(filial)
+    db.session.commit()
+    click.echo(f'Filial {filial.id} ({filial.nome}) criada.')
+
+
+@comandos.command('listar')
+def listar():
+    """Lista as filiais cadastradas."""
+    from models import Filiais
+
+    for filial in Filiais.query.order_by(Filiais.id):
+        click.echo(f'{filial.id}\t{filial.nome}')
+
+
+@comandos.command('funcionario')
+@click.argument('filial_id', type=int)
+@click.argument('nome')
+@click.argument('email')
+@click.argument('cpf')
+@click.password_option('--senha')
+def funcionario(filial_id, nome, email, cpf, senha):
+    """
+    Cadastra um funcionário na filial. Serve para o primeiro de cada loja:
+    os demais são cadastrados por ele em POST /funcionarios/cadastro.
+    """
+    from sqlalchemy.exc import IntegrityError
+
+    from models import Filiais, Funcionarios
+    from services.integridade import erro_integridade
+    from validacao import ErroValidacao, validar
+
+    try:
+        dados = validar('funcionario', {'nome': nome, 'email': email, 'senha': senha, 'cpf': cpf})
+    except ErroValidacao as e:
+        raise click.ClickException(e.mensagem)
+    if not db.session.get(Filiais, filial_id):
+        raise click.ClickException(f'Filial {filial_id} não encontrada.')
+    novo = Funcionarios(nome=dados['nome'], email=dados['email'], cpf=dados['cpf'], filial_id=filial_id)
+    novo.set_password(dados['senha'])
+    db.session.add(novo)
+    try:
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        raise click.ClickException(erro_integridade(e).mensagem)
+    click.echo(f'Funcionário {novo.id} ({novo.email}) cadastrado na filial {filial_id}.')
@@ -0,0 +1,50 @@
+# -- coding: utf-8 --
+"""
+Configuração do Gunicorn.
+
+Por padrão usa workers síncronos (um request por processo). Para endpoints
+que passam a maior parte do tempo esperando o MySQL, defina
+GUNICORN_WORKER_CLASS=eventlet: cada processo passa a atender até
+GUNICORN_WORKER_CONNECTIONS requests simultâneos em greenlets. O PyMySQL é
+Python puro, então o monkey patching do eventlet torna as chamadas ao banco
+cooperativas sem alterar o código das rotas.
+
+O eventlet não é o padrão: medido com python -m benchmarks.carga --gunicorn
+sync,eventlet, o p95 piora de 2 a 4 vezes e as rotas pesadas (GET /sync
+completo) seguram o processo além do timeout (ver README).
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+
+# Só tem efeito com workers assíncronos (eventlet/gevent).
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '100'))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+accesslog = '-'
+errorlog = '-'
+
+# Carrega o app no processo mestre antes do fork, compartilhando a memória
+# dos módulos já importados entre os workers (copy-on-write). Desligado por
+# padrão no eventlet, que precisa aplicar o monkey patching antes dos imports.
+preload_app = os.getenv('GUNICORN_PRELOAD', '1' if worker_class == 'sync' else '0') == '1'
+
+
+def post_fork(server, worker):
+    # Conexões abertas no mestre não podem ser usadas pelos filhos: cada
+    # worker descarta o pool herdado (sem fechar os sockets do mestre) e abre
+    # o seu sob demanda.
+    if not server.cfg.preload_app:
+        return
+
+    from extensions import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,164 @@
+"""Filiais
+
+Revision ID: 24026c31d80e
+Revises: dde7b8f1b9d9
+Create Date: 2026-10-19 18:15:06.599575
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '24026c31d80e'
+down_revision = 'dde7b8f1b9d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('filiais',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nome', sa.String(length=100), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # A loja que já existia: as linhas atuais ficam nela (server_default '1')
+    filiais = sa.table('filiais', sa.column('id', sa.Integer), sa.column('nome', sa.String))
+    op.bulk_insert(filiais, [{'id': 1, 'nome': 'Matriz'}])
+    with op.batch_alter_table('alteracoes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('filial_id', sa.Integer(), server_default='1', nullable=False))
+        batch_op.drop_index(batch_op.f('ix_alteracoes_entidade_id'))
+        batch_op.create_index('ix_alteracoes_filial_id_entidade_id', ['filial_id', 'entidade', 'id'], unique=False)
+        batch_op.create_index('ix_alteracoes_filial_id_id', ['filial_id', 'id'], unique=False)
+        batch_op.create_foreign_key('fk_alteracoes_filial_id', 'filiais', ['filial_id'], ['id'])
+
+    with op.batch_alter_table('arquivo_movimentacoes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('filial_id', sa.Integer(), server_default='1', nullable=False))
+        batch_op.drop_index(batch_op.f('ix_arquivo_movimentacoes_data_movimentacao'))
+        batch_op.create_index('ix_arquivo_movimentacoes_filial_id_data', ['filial_id', 'data_movimentacao'], unique=False)
+        batch_op.create_foreign_key('fk_arquivo_movimentacoes_filial_id', 'filiais', ['filial_id'], ['id'])
+
+    with op.batch_alter_table('clientes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('filial_id', sa.Integer(), server_default='1', nullable=False))
+        batch_op.drop_constraint(batch_op.f('uq_clientes_cpf'), type_='unique')
+        batch_op.create_unique_constraint('uq_clientes_filial_cpf', ['filial_id', 'cpf'])
+        batch_op.create_foreign_key('fk_clientes_filial_id', 'filiais', ['filial_id'], ['id'])
+
+    with op.batch_alter_table('entregas', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('filial_id', sa.Integer(), server_default='1', nullable=False))
+        batch_op.drop_index(batch_op.f('ix_entregas_status_data_entrega'))
+        batch_op.create_index('ix_entregas_filial_id_data_entrega', ['filial_id', 'data_entrega'], unique=False)
+        batch_op.create_index('ix_entregas_filial_id_status_data_entrega', ['filial_id', 'status', 'data_entrega'], unique=False)
+        batch_op.create_foreign_key('fk_entregas_filial_id', 'filiais', ['filial_id'], ['id'])
+
+    with op.batch_alter_table('estoque', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('filial_id', sa.Integer(), server_default='1', nullable=False))
+        batch_op.drop_index(batch_op.f('ix_estoque_arquivado_em'))
+        batch_op.create_index('ix_estoque_filial_id_arquivado_em', ['filial_id', 'arquivado_em'], unique=False)
+        batch_op.create_foreign_key('fk_estoque_filial_id', 'filiais', ['filial_id'], ['id'])
+
+    with op.batch_alter_table('funcionarios', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('filial_id', sa.Integer(), server_default='1', nullable=False))
+        batch_op.create_foreign_key('fk_funcionarios_filial_id', 'filiais', ['filial_id'], ['id'])
+
+    with op.batch_alter_table('marmores', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('filial_id', sa.Integer(), server_default='1', nullable=False))
+        batch_op.create_index('ix_marmores_filial_id', ['filial_id'], unique=False)
+        batch_op.create_foreign_key('fk_marmores_filial_id', 'filiais', ['filial_id'], ['id'])
+
+    with op.batch_alter_table('movimentacoes__estoque', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('filial_id', sa.Integer(), server_default='1', nullable=False))
+        batch_op.create_index('ix_movimentacoes__estoque_filial_id_data', ['filial_id', 'data_movimentacao'], unique=False)
+        batch_op.create_foreign_key('fk_movimentacoes__estoque_filial_id', 'filiais', ['filial_id'], ['id'])
+
+    with op.batch_alter_table('orcamentos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('filial_id', sa.Integer(), server_default='1', nullable=False))
+        batch_op.drop_index(batch_op.f('ix_orcamentos_status_data_criacao'))
+        batch_op.create_index('ix_orcamentos_filial_id_status_data_criacao', ['filial_id', 'status', 'data_criacao'], unique=False)
+        batch_op.create_foreign_key('fk_orcamentos_filial_id', 'filiais', ['filial_id'], ['id'])
+
+    with op.batch_alter_table('pagamentos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('filial_id', sa.Integer(), server_default='1', nullable=False))
+        batch_op.create_foreign_key('fk_pagamentos_filial_id', 'filiais', ['filial_id'], ['id'])
+
+    with op.batch_alter_table('pedidos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('filial_id', sa.Integer(), server_default='1', nullable=False))
+        batch_op.drop_index(batch_op.f('ix_pedidos_status_data_pedido'))
+        batch_op.create_index('ix_pedidos_filial_id_status_data_pedido', ['filial_id', 'status', 'data_pedido'], unique=False)
+        batch_op.create_foreign_key('fk_pedidos_filial_id', 'filiais', ['filial_id'], ['id'])
+
+    with op.batch_alter_table('tarefas', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('filial_id', sa.Integer(), server_default='1', nullable=False))
+        batch_op.create_index('ix_tarefas_filial_id_id', ['filial_id', 'id'], unique=False)
+        batch_op.create_foreign_key('fk_tarefas_filial_id', 'filiais', ['filial_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('tarefas', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_tarefas_filial_id', type_='foreignkey')
+        batch_op.drop_index('ix_tarefas_filial_id_id')
+        batch_op.drop_column('filial_id')
+
+    with op.batch_alter_table('pedidos', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_pedidos_filial_id', type_='foreignkey')
+        batch_op.drop_index('ix_pedidos_filial_id_status_data_pedido')
+        batch_op.create_index(batch_op.f('ix_pedidos_status_data_pedido'), ['status', 'data_pedido'], unique=False)
+        batch_op.drop_column('filial_id')
+
+    with op.batch_alter_table('pagamentos', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_pagamentos_filial_id', type_='foreignkey')
+        batch_op.drop_column('filial_id')
+
+    with op.batch_alter_table('orcamentos', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_orcamentos_filial_id', type_='foreignkey')
+        batch_op.drop_index('ix_orcamentos_filial_id_status_data_criacao')
+        batch_op.create_index(batch_op.f('ix_orcamentos_status_data_criacao'), ['status', 'data_criacao'], unique=False)
+        batch_op.drop_column('filial_id')
+
+    with op.batch_alter_table('movimentacoes__estoque', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_movimentacoes__estoque_filial_id', type_='foreignkey')
+        batch_op.drop_index('ix_movimentacoes__estoque_filial_id_data')
+        batch_op.drop_column('filial_id')
+
+    with op.batch_alter_table('marmores', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_marmores_filial_id', type_='foreignkey')
+        batch_op.drop_index('ix_marmores_filial_id')
+        batch_op.drop_column('filial_id')
+
+    with op.batch_alter_table('funcionarios', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_funcionarios_filial_id', type_='foreignkey')
+        batch_op.drop_column('filial_id')
+
+    with op.batch_alter_table('estoque', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_estoque_filial_id', type_='foreignkey')
+        batch_op.drop_index('ix_estoque_filial_id_arquivado_em')
+        batch_op.create_index(batch_op.f('ix_estoque_arquivado_em'), ['arquivado_em'], unique=False)
+        batch_op.drop_column('filial_id')
+
+    with op.batch_alter_table('entregas', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_entregas_filial_id', type_='foreignkey')
+        batch_op.drop_index('ix_entregas_filial_id_status_data_entrega')
+        batch_op.drop_index('ix_entregas_filial_id_data_entrega')
+        batch_op.create_index(batch_op.f('ix_entregas_status_data_entrega'), ['status', 'data_entrega'], unique=False)
+        batch_op.drop_column('filial_id')
+
+    with op.batch_alter_table('clientes', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_clientes_filial_id', type_='foreignkey')
+        batch_op.drop_constraint('uq_clientes_filial_cpf', type_='unique')
+        batch_op.create_unique_constraint(batch_op.f('uq_clientes_cpf'), ['cpf'])
+        batch_op.drop_column('filial_id')
+
+    with op.batch_alter_table('arquivo_movimentacoes', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_arquivo_movimentacoes_filial_id', type_='foreignkey')
+        batch_op.drop_index('ix_arquivo_movimentacoes_filial_id_data')
+        batch_op.create_index(batch_op.f('ix_arquivo_movimentacoes_data_movimentacao'), ['data_movimentacao'], unique=False)
+        batch_op.drop_column('filial_id')
+
+    with op.batch_alter_table('alteracoes', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_alteracoes_filial_id', type_='foreignkey')
+        batch_op.drop_index('ix_alteracoes_filial_id_id')
+        batch_op.drop_index('ix_alteracoes_filial_id_entidade_id')
+        batch_op.create_index(batch_op.f('ix_alteracoes_entidade_id'), ['entidade', 'id'], unique=False)
+        batch_op.drop_column('filial_id')
+
+    op.drop_table('filiais')
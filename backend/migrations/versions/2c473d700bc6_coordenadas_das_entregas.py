@@ -0,0 +1,28 @@
+"""Coordenadas das entregas
+
+Revision ID: 2c473d700bc6
+Revises: 2f63f9d0c06e
+Create Date: 2026-10-19 16:56:40.303767
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c473d700bc6'
+down_revision = '2f63f9d0c06e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('entregas', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('latitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('longitude', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('entregas', schema=None) as batch_op:
+        batch_op.drop_column('longitude')
+        batch_op.drop_column('latitude')
@@ -0,0 +1,46 @@
+"""Pipeline de pedidos
+
+Revision ID: 2f63f9d0c06e
+Revises: 64b7fb242787
+Create Date: 2026-10-19 16:50:49.910983
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f63f9d0c06e'
+down_revision = '64b7fb242787'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('entregas', schema=None) as batch_op:
+        batch_op.create_index('ix_entregas_status_data_entrega', ['status', 'data_entrega'], unique=False)
+
+    with op.batch_alter_table('pedidos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('orcamento_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('saldo', sa.Numeric(precision=10, scale=2), server_default='0', nullable=False))
+        batch_op.create_index('ix_pedidos_status_data_pedido', ['status', 'data_pedido'], unique=False)
+        batch_op.create_index('ux_pedidos_orcamento_id', ['orcamento_id'], unique=True)
+        batch_op.create_foreign_key('fk_pedidos_orcamento_id', 'orcamentos', ['orcamento_id'], ['id'])
+
+    # Saldo dos pedidos existentes: total menos o que já foi pago
+    op.execute(
+        'UPDATE pedidos SET saldo = preco_total - COALESCE('
+        '(SELECT SUM(pagamentos.valor) FROM pagamentos WHERE pagamentos.pedido_id = pedidos.id), 0)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('pedidos', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_pedidos_orcamento_id', type_='foreignkey')
+        batch_op.drop_index('ux_pedidos_orcamento_id')
+        batch_op.drop_index('ix_pedidos_status_data_pedido')
+        batch_op.drop_column('saldo')
+        batch_op.drop_column('orcamento_id')
+
+    with op.batch_alter_table('entregas', schema=None) as batch_op:
+        batch_op.drop_index('ix_entregas_status_data_entrega')
@@ -0,0 +1,39 @@
+"""Revisoes dos orcamentos
+
+Revision ID: 340a430ff3b8
+Revises: be21741a5dd9
+Create Date: 2026-10-19 17:57:28.576445
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '340a430ff3b8'
+down_revision = 'be21741a5dd9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('revisoes_orcamento',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('orcamento_id', sa.Integer(), nullable=False),
+    sa.Column('numero', sa.Integer(), nullable=False),
+    sa.Column('base', sa.Integer(), nullable=False),
+    sa.Column('criado_em', sa.DateTime(), nullable=False),
+    sa.Column('funcionario_id', sa.Integer(), nullable=True),
+    sa.Column('total_orcamento', sa.Float(), nullable=False),
+    sa.Column('observacoes', sa.String(length=500), nullable=True),
+    sa.Column('itens_alterados', sa.Integer(), nullable=False),
+    sa.Column('conteudo', sa.LargeBinary(length=16777216), nullable=False),
+    sa.ForeignKeyConstraint(['funcionario_id'], ['funcionarios.id'], ),
+    sa.ForeignKeyConstraint(['orcamento_id'], ['orcamentos.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('orcamento_id', 'numero', name='uq_revisoes_orcamento_numero')
+    )
+
+
+def downgrade():
+    op.drop_table('revisoes_orcamento')
@@ -0,0 +1,29 @@
+"""Marca da limpeza de alteracoes
+
+Revision ID: 3e2c37eab9ac
+Revises: d2ef52771f9b
+Create Date: 2026-10-19 18:38:35.480841
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e2c37eab9ac'
+down_revision = 'd2ef52771f9b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Limpezas anteriores não guardaram a marca: parte da menor alteração retida
+    op.execute(
+        "INSERT INTO marcas_processamento (nome, ultimo_id, atualizado_em) "
+        "SELECT 'alteracoes:limpeza', m.menor - 1, CURRENT_TIMESTAMP "
+        "FROM (SELECT MIN(id) AS menor FROM alteracoes) m WHERE m.menor > 1"
+    )
+
+
+def downgrade():
+    op.execute("DELETE FROM marcas_processamento WHERE nome = 'alteracoes:limpeza'")
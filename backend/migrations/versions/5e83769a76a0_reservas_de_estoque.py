@@ -0,0 +1,49 @@
+"""Reservas de estoque
+
+Revision ID: 5e83769a76a0
+Revises: 60f5c2b27b3f
+Create Date: 2026-10-19 17:39:20.582397
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e83769a76a0'
+down_revision = '60f5c2b27b3f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('reservas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('orcamento_id', sa.Integer(), nullable=False),
+    sa.Column('quantidade', sa.Float(), nullable=False),
+    sa.Column('criado_em', sa.DateTime(), nullable=False),
+    sa.Column('expira_em', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['item_id'], ['estoque.id'], ),
+    sa.ForeignKeyConstraint(['orcamento_id'], ['orcamentos.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('reservas', schema=None) as batch_op:
+        batch_op.create_index('ix_reservas_expira_em', ['expira_em'], unique=False)
+        batch_op.create_index('ix_reservas_item_id_expira_em', ['item_id', 'expira_em'], unique=False)
+        batch_op.create_index('ix_reservas_orcamento_id', ['orcamento_id'], unique=False)
+
+    with op.batch_alter_table('estoque', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('quantidade_reservada', sa.Float(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('estoque', schema=None) as batch_op:
+        batch_op.drop_column('quantidade_reservada')
+
+    with op.batch_alter_table('reservas', schema=None) as batch_op:
+        batch_op.drop_index('ix_reservas_orcamento_id')
+        batch_op.drop_index('ix_reservas_item_id_expira_em')
+        batch_op.drop_index('ix_reservas_expira_em')
+
+    op.drop_table('reservas')
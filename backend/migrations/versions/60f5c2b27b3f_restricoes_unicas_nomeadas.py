@@ -0,0 +1,47 @@
+"""Restricoes unicas nomeadas
+
+Revision ID: 60f5c2b27b3f
+Revises: a73e8d101ca3
+Create Date: 2026-10-19 17:18:00.888419
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '60f5c2b27b3f'
+down_revision = 'a73e8d101ca3'
+branch_labels = None
+depends_on = None
+
+
+# (tabela, coluna, nome novo). Criadas sem nome na primeira migração: o
+# MySQL as chamou pelo nome da coluna e o SQLite não guarda nome nenhum.
+RESTRICOES = [
+    ('clientes', 'cpf', 'uq_clientes_cpf'),
+    ('funcionarios', 'email', 'uq_funcionarios_email'),
+    ('funcionarios', 'cpf', 'uq_funcionarios_cpf'),
+]
+CONVENCAO = {'uq': 'uq_%(table_name)s_%(column_0_name)s'}
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        # A cópia da tabela aplica a convenção às restrições sem nome
+        for tabela in ('clientes', 'funcionarios'):
+            with op.batch_alter_table(tabela, recreate='always', naming_convention=CONVENCAO):
+                pass
+        return
+    for tabela, coluna, nome in RESTRICOES:
+        op.drop_constraint(coluna, tabela, type_='unique')
+        op.create_unique_constraint(nome, tabela, [coluna])
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        # Nomes não atrapalham o SQLite; o esquema antigo continua funcionando
+        return
+    for tabela, coluna, nome in RESTRICOES:
+        op.drop_constraint(nome, tabela, type_='unique')
+        op.create_unique_constraint(coluna, tabela, [coluna])
@@ -0,0 +1,36 @@
+"""Outbox de alteracoes
+
+Revision ID: 64b7fb242787
+Revises: f37f948cb82c
+Create Date: 2026-10-19 17:41:27.530914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '64b7fb242787'
+down_revision = 'f37f948cb82c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('alteracoes',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('entidade', sa.String(length=30), nullable=False),
+    sa.Column('entidade_id', sa.Integer(), nullable=False),
+    sa.Column('operacao', sa.Enum('criado', 'atualizado', 'excluido', name='alteracao_operacao'), nullable=False),
+    sa.Column('dados', sa.Text(), nullable=True),
+    sa.Column('criado_em', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_alteracoes_entidade_id', 'alteracoes', ['entidade', 'id'], unique=False)
+    op.create_index('ix_alteracoes_criado_em', 'alteracoes', ['criado_em'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_alteracoes_criado_em', table_name='alteracoes')
+    op.drop_index('ix_alteracoes_entidade_id', table_name='alteracoes')
+    op.drop_table('alteracoes')
@@ -0,0 +1,28 @@
+"""Chave das tarefas
+
+Revision ID: 9d5f3570c950
+Revises: 3e2c37eab9ac
+Create Date: 2026-10-19 18:58:43.413037
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d5f3570c950'
+down_revision = '3e2c37eab9ac'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tarefas', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('chave', sa.String(length=100), nullable=True))
+        batch_op.create_unique_constraint('uq_tarefas_chave', ['chave'])
+
+
+def downgrade():
+    with op.batch_alter_table('tarefas', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_tarefas_chave', type_='unique')
+        batch_op.drop_column('chave')
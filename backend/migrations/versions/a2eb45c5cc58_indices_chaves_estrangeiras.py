@@ -0,0 +1,54 @@
+"""Indices nas chaves estrangeiras e filtros
+
+Revision ID: a2eb45c5cc58
+Revises: aea52e56e916
+Create Date: 2026-10-19 16:30:12.204511
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2eb45c5cc58'
+down_revision = 'aea52e56e916'
+branch_labels = None
+depends_on = None
+
+
+# (nome, tabela, colunas, coluna da FK que o índice passa a cobrir no MySQL)
+INDICES = [
+    # Orçamentos de um cliente (relação Clientes.orcamentos_rel, exclusão de cliente)
+    ('ix_orcamentos_cliente_id_data_criacao', 'orcamentos', ['cliente_id', 'data_criacao'], 'cliente_id'),
+    # GET /orcamentos?status=...
+    ('ix_orcamentos_status_data_criacao', 'orcamentos', ['status', 'data_criacao'], None),
+    # Itens de um orçamento (serialize, cascade de exclusão)
+    ('ix_itens_orcamento_orcamento_id', 'itens_orcamento', ['orcamento_id'], 'orcamento_id'),
+    # Itens que usam um item de estoque (delete_estoque)
+    ('ix_itens_orcamento_item_estoque_id', 'itens_orcamento', ['item_estoque_id'], 'item_estoque_id'),
+    # Histórico de um item em ordem cronológica
+    ('ix_movimentacoes__estoque_item_id_data', 'movimentacoes__estoque', ['item_id', 'data_movimentacao'], 'item_id'),
+    # Consultas por período
+    ('ix_movimentacoes__estoque_data_movimentacao', 'movimentacoes__estoque', ['data_movimentacao'], None),
+    # Backrefs carregados ao excluir um cliente ou um pedido
+    ('ix_pedidos_cliente_id', 'pedidos', ['cliente_id'], 'cliente_id'),
+    ('ix_pagamentos_pedido_id', 'pagamentos', ['pedido_id'], 'pedido_id'),
+    ('ix_entregas_pedido_id', 'entregas', ['pedido_id'], 'pedido_id'),
+]
+
+
+def upgrade():
+    # No MySQL, o índice implícito criado para cada FK é descartado
+    # automaticamente quando um índice começando pela mesma coluna é criado.
+    for nome, tabela, colunas, _ in INDICES:
+        op.create_index(nome, tabela, colunas, unique=False)
+
+
+def downgrade():
+    # O MySQL não deixa remover o único índice que atende uma FK: recria o
+    # índice simples (como o implícito original) antes de remover o composto.
+    mysql = op.get_bind().dialect.name == 'mysql'
+    for nome, tabela, colunas, coluna_fk in reversed(INDICES):
+        if mysql and coluna_fk:
+            op.create_index(coluna_fk, tabela, [coluna_fk], unique=False)
+        op.drop_index(nome, table_name=tabela)
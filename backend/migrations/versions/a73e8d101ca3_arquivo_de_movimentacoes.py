@@ -0,0 +1,51 @@
+"""Arquivo de movimentacoes
+
+Revision ID: a73e8d101ca3
+Revises: 2c473d700bc6
+Create Date: 2026-10-19 16:59:45.983093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a73e8d101ca3'
+down_revision = '2c473d700bc6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('arquivo_movimentacoes',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('tipo_movimentacao', sa.Enum('Entrada', 'Saída'), nullable=False),
+    sa.Column('quantidade', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('data_movimentacao', sa.DateTime(), nullable=False),
+    sa.Column('observacoes', sa.String(length=255), nullable=True),
+    sa.Column('arquivado_em', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['item_id'], ['estoque.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('arquivo_movimentacoes', schema=None) as batch_op:
+        batch_op.create_index('ix_arquivo_movimentacoes_data_movimentacao', ['data_movimentacao'], unique=False)
+        batch_op.create_index('ix_arquivo_movimentacoes_item_id_data', ['item_id', 'data_movimentacao'], unique=False)
+
+    op.create_table('saldos_abertura',
+    sa.Column('item_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('saldo', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('movimentacoes', sa.Integer(), nullable=False),
+    sa.Column('data_corte', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['item_id'], ['estoque.id'], ),
+    sa.PrimaryKeyConstraint('item_id')
+    )
+
+
+def downgrade():
+    op.drop_table('saldos_abertura')
+    with op.batch_alter_table('arquivo_movimentacoes', schema=None) as batch_op:
+        batch_op.drop_index('ix_arquivo_movimentacoes_item_id_data')
+        batch_op.drop_index('ix_arquivo_movimentacoes_data_movimentacao')
+
+    op.drop_table('arquivo_movimentacoes')
@@ -0,0 +1,52 @@
+"""Previsao de reposicao
+
+Revision ID: be21741a5dd9
+Revises: 5e83769a76a0
+Create Date: 2026-10-19 17:50:20.603369
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'be21741a5dd9'
+down_revision = '5e83769a76a0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('marcas_processamento',
+    sa.Column('nome', sa.String(length=50), nullable=False),
+    sa.Column('ultimo_id', sa.BigInteger(), nullable=False),
+    sa.Column('atualizado_em', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('nome')
+    )
+    op.create_table('consumo_mensal',
+    sa.Column('item_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('mes', sa.Date(), nullable=False),
+    sa.Column('quantidade', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['item_id'], ['estoque.id'], ),
+    sa.PrimaryKeyConstraint('item_id', 'mes')
+    )
+    op.create_table('reposicao',
+    sa.Column('item_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('consumo_diario', sa.Float(), nullable=False),
+    sa.Column('desvio_diario', sa.Float(), nullable=False),
+    sa.Column('fator_sazonal', sa.Float(), nullable=False),
+    sa.Column('demanda_diaria', sa.Float(), nullable=False),
+    sa.Column('estoque_seguranca', sa.Float(), nullable=False),
+    sa.Column('ponto_reposicao', sa.Float(), nullable=False),
+    sa.Column('meses_historico', sa.Integer(), nullable=False),
+    sa.Column('mes_referencia', sa.Date(), nullable=False),
+    sa.Column('calculado_em', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['item_id'], ['estoque.id'], ),
+    sa.PrimaryKeyConstraint('item_id')
+    )
+
+
+def downgrade():
+    op.drop_table('reposicao')
+    op.drop_table('consumo_mensal')
+    op.drop_table('marcas_processamento')
@@ -0,0 +1,46 @@
+"""Auditoria
+
+Revision ID: d2ef52771f9b
+Revises: 24026c31d80e
+Create Date: 2026-10-19 18:23:42.202251
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2ef52771f9b'
+down_revision = '24026c31d80e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('auditoria',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('entidade', sa.String(length=30), nullable=False),
+    sa.Column('entidade_id', sa.Integer(), nullable=False),
+    sa.Column('operacao', sa.Enum('criado', 'atualizado', 'excluido', name='auditoria_operacao'), nullable=False),
+    sa.Column('funcionario_id', sa.Integer(), nullable=True),
+    sa.Column('antes', sa.Text(), nullable=True),
+    sa.Column('depois', sa.Text(), nullable=True),
+    sa.Column('alterado_em', sa.DateTime(), nullable=False),
+    sa.Column('filial_id', sa.Integer(), server_default='1', nullable=False),
+    sa.ForeignKeyConstraint(['filial_id'], ['filiais.id'], name='fk_auditoria_filial_id'),
+    sa.ForeignKeyConstraint(['funcionario_id'], ['funcionarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('auditoria', schema=None) as batch_op:
+        batch_op.create_index('ix_auditoria_filial_id_entidade_id', ['filial_id', 'entidade', 'entidade_id', 'id'], unique=False)
+        batch_op.create_index('ix_auditoria_filial_id_funcionario_id_id', ['filial_id', 'funcionario_id', 'id'], unique=False)
+        batch_op.create_index('ix_auditoria_filial_id_id', ['filial_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('auditoria', schema=None) as batch_op:
+        batch_op.drop_index('ix_auditoria_filial_id_id')
+        batch_op.drop_index('ix_auditoria_filial_id_funcionario_id_id')
+        batch_op.drop_index('ix_auditoria_filial_id_entidade_id')
+
+    op.drop_table('auditoria')
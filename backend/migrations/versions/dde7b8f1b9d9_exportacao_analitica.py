@@ -0,0 +1,41 @@
+"""Exportacao analitica
+
+Revision ID: dde7b8f1b9d9
+Revises: 340a430ff3b8
+Create Date: 2026-10-19 18:03:59.866136
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'dde7b8f1b9d9'
+down_revision = '340a430ff3b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('clientes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_atualizacao', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True))
+        batch_op.create_index('ix_clientes_data_atualizacao', ['data_atualizacao'], unique=False)
+
+    with op.batch_alter_table('marcas_processamento', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('ultima_data', sa.DateTime(), nullable=True))
+
+    with op.batch_alter_table('orcamentos', schema=None) as batch_op:
+        batch_op.create_index('ix_orcamentos_data_atualizacao', ['data_atualizacao'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('orcamentos', schema=None) as batch_op:
+        batch_op.drop_index('ix_orcamentos_data_atualizacao')
+
+    with op.batch_alter_table('marcas_processamento', schema=None) as batch_op:
+        batch_op.drop_column('ultima_data')
+
+    with op.batch_alter_table('clientes', schema=None) as batch_op:
+        batch_op.drop_index('ix_clientes_data_atualizacao')
+        batch_op.drop_column('data_atualizacao')
+
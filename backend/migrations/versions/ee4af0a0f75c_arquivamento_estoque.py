@@ -0,0 +1,28 @@
+"""Arquivamento de itens de estoque
+
+Revision ID: ee4af0a0f75c
+Revises: a2eb45c5cc58
+Create Date: 2026-10-19 16:52:40.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ee4af0a0f75c'
+down_revision = 'a2eb45c5cc58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('estoque', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('arquivado_em', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_estoque_arquivado_em'), ['arquivado_em'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('estoque', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_estoque_arquivado_em'))
+        batch_op.drop_column('arquivado_em')
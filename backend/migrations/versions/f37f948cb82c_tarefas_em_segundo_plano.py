@@ -0,0 +1,42 @@
+"""Tarefas em segundo plano
+
+Revision ID: f37f948cb82c
+Revises: ee4af0a0f75c
+Create Date: 2026-10-19 17:14:05.772190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f37f948cb82c'
+down_revision = 'ee4af0a0f75c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tarefas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(length=50), nullable=False),
+    sa.Column('parametros', sa.Text(), nullable=False),
+    sa.Column('status', sa.Enum('Pendente', 'Executando', 'Concluída', 'Falhou', name='tarefa_status'), nullable=False),
+    sa.Column('progresso', sa.Integer(), nullable=False),
+    sa.Column('mensagem', sa.String(length=500), nullable=True),
+    sa.Column('resultado', sa.Text(), nullable=True),
+    sa.Column('tentativas', sa.Integer(), nullable=False),
+    sa.Column('max_tentativas', sa.Integer(), nullable=False),
+    sa.Column('funcionario_id', sa.Integer(), nullable=True),
+    sa.Column('criado_em', sa.DateTime(), nullable=True),
+    sa.Column('iniciado_em', sa.DateTime(), nullable=True),
+    sa.Column('finalizado_em', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['funcionario_id'], ['funcionarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tarefas_status_id', 'tarefas', ['status', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_tarefas_status_id', table_name='tarefas')
+    op.drop_table('tarefas')
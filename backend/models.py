@@ -0,0 +1,608 @@
+# -- coding: utf-8 --
+import json
+
+from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import Enum
+
+from extensions import db
+from filiais import FILIAL_PADRAO, DaFilial
+
+
+# Modelos do Banco de Dados
+class Filiais(db.Model):
+    """
+    Lojas atendidas pela instalação. As tabelas com o mixin DaFilial são
+    restritas à filial do funcionário logado (ver filiais.py).
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String(100), nullable=False)
+
+    def serialize(self):
+        return {'id': self.id, 'nome': self.nome}
+
+class Marmores(DaFilial, db.Model):
+    _tablename_ = 'marmores'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    nome = db.Column(db.String(100), nullable=False)
+    preco_m2 = db.Column(db.Numeric(10, 2), nullable=False)
+    quantidade = db.Column(db.Numeric(10, 2), nullable=False, default=0.0)
+
+    __table_args__ = (
+        db.Index('ix_marmores_filial_id', 'filial_id'),
+    )
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'nome': self.nome,
+            'preco_m2': float(self.preco_m2),
+            'quantidade': float(self.quantidade)
+        }
+
+class Funcionarios(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String(80), nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    senha_hash = db.Column(db.String(255), nullable=False)
+    cpf = db.Column(db.String(11), nullable=False)
+    # Filial em que o funcionário trabalha: vai no token do login
+    filial_id = db.Column(db.Integer, db.ForeignKey('filiais.id', name='fk_funcionarios_filial_id'), nullable=False,
+                          default=FILIAL_PADRAO, server_default=str(FILIAL_PADRAO))
+
+    # Nomeadas: services/integridade.py traduz a violação pelo nome
+    __table_args__ = (
+        db.UniqueConstraint('email', name='uq_funcionarios_email'),
+        db.UniqueConstraint('cpf', name='uq_funcionarios_cpf'),
+    )
+
+    def _repr_(self):
+        return f'<Funcionario {self.nome}>'
+
+    def set_password(self, password):
+        self.senha_hash = generate_password_hash(password)
+
+    def check_password(self, password):
+        return check_password_hash(self.senha_hash, password)
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'nome': self.nome,
+            'email': self.email,
+            'cpf': self.cpf,
+            'filial_id': self.filial_id
+        }
+
+class Clientes(DaFilial, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String(100), nullable=False)
+    cpf = db.Column(db.String(11), nullable=False)
+    telefone = db.Column(db.String(15), nullable=False) 
+    data_cadastro = db.Column(db.TIMESTAMP, default=db.func.current_timestamp())
+    data_atualizacao = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp(),
+                                 server_default=db.text('CURRENT_TIMESTAMP'))
+
+    __table_args__ = (
+        # O mesmo CPF pode ser cliente de mais de uma filial
+        db.UniqueConstraint('filial_id', 'cpf', name='uq_clientes_filial_cpf'),
+        db.Index('ix_clientes_data_atualizacao', 'data_atualizacao'),
+    )
+
+    # >>> CORREÇÃO 1 (Parte A): Adicionada a relação explícita com Orcamentos <<<
+    # Esta linha define a "outra metade" da relação, ligando de volta ao campo 'cliente' em Orcamentos.
+    orcamentos_rel = db.relationship('Orcamentos', back_populates='cliente', lazy=True)
+
+    def _repr_(self):
+        return f'<Cliente {self.nome}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'nome': self.nome,
+            'cpf': self.cpf,
+            'telefone': self.telefone,
+            'data_cadastro': self.data_cadastro.isoformat() if self.data_cadastro else None
+        }
+
+    def serialize(self):
+        return self.to_dict()
+
+class Pedidos(DaFilial, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=False)
+    tipo_marmore = db.Column(db.String(100), nullable=False)
+    metragem = db.Column(db.Numeric(10, 2), nullable=False)
+    preco_total = db.Column(db.Numeric(10, 2), nullable=False)
+    data_pedido = db.Column(db.TIMESTAMP, default=db.func.current_timestamp())
+    status = db.Column(db.Enum('Pendente', 'Aprovado', 'Rejeitado', 'Concluído'), server_default='Pendente')
+    # Orçamento que originou o pedido (no máximo um pedido por orçamento)
+    orcamento_id = db.Column(db.Integer, db.ForeignKey('orcamentos.id', name='fk_pedidos_orcamento_id'), nullable=True)
+    # preco_total menos a soma dos pagamentos, atualizado a cada pagamento
+    saldo = db.Column(db.Numeric(10, 2), nullable=False, server_default='0')
+
+    cliente = db.relationship('Clientes', backref=db.backref('pedidos', lazy=True))
+
+    __table_args__ = (
+        db.Index('ix_pedidos_cliente_id', 'cliente_id'),
+        db.Index('ix_pedidos_filial_id_status_data_pedido', 'filial_id', 'status', 'data_pedido'),
+        db.Index('ux_pedidos_orcamento_id', 'orcamento_id', unique=True),
+    )
+
+    def serialize(self):
+        # Listagens devem carregar 'cliente' com joinedload
+        return {
+            'id': self.id,
+            'cliente_id': self.cliente_id,
+            'nome_cliente': self.cliente.nome,
+            'orcamento_id': self.orcamento_id,
+            'tipo_marmore': self.tipo_marmore,
+            'metragem': float(self.metragem),
+            'preco_total': float(self.preco_total),
+            'saldo': float(self.saldo),
+            'data_pedido': self.data_pedido.isoformat(),
+            'status': self.status
+        }
+
+class Pagamentos(DaFilial, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    pedido_id = db.Column(db.Integer, db.ForeignKey('pedidos.id'), nullable=False)
+    valor = db.Column(db.Numeric(10, 2), nullable=False)
+    data_pagamento = db.Column(db.TIMESTAMP, default=db.func.current_timestamp())
+    metodo_pagamento = db.Column(db.String(50), nullable=False)
+
+    pedido = db.relationship('Pedidos', backref=db.backref('pagamentos', lazy=True))
+
+    __table_args__ = (
+        db.Index('ix_pagamentos_pedido_id', 'pedido_id'),
+    )
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'pedido_id': self.pedido_id,
+            'valor': float(self.valor),
+            'data_pagamento': self.data_pagamento.isoformat(),
+            'metodo_pagamento': self.metodo_pagamento
+        }
+
+class Entregas(DaFilial, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    pedido_id = db.Column(db.Integer, db.ForeignKey('pedidos.id'), nullable=False)
+    data_entrega = db.Column(db.Date, nullable=False)
+    endereco_entrega = db.Column(db.String(200), nullable=False)
+    status = db.Column(db.Enum('Pendente', 'Em Rota', 'Entregue', 'Atrasado'), server_default='Pendente')
+    # Coordenadas do endereço, usadas na programação das rotas
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+
+    pedido = db.relationship('Pedidos', backref=db.backref('entregas', lazy=True))
+
+    __table_args__ = (
+        db.Index('ix_entregas_pedido_id', 'pedido_id'),
+        db.Index('ix_entregas_filial_id_status_data_entrega', 'filial_id', 'status', 'data_entrega'),
+        db.Index('ix_entregas_filial_id_data_entrega', 'filial_id', 'data_entrega'),
+    )
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'pedido_id': self.pedido_id,
+            'data_entrega': self.data_entrega.isoformat(),
+            'endereco_entrega': self.endereco_entrega,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'status': self.status
+        }
+
+class Estoque(DaFilial, db.Model):
+    _tablename_ = 'estoque'
+    id = db.Column(db.Integer, primary_key=True)
+    nome = db.Column(db.String(100), nullable=False)
+    quantidade = db.Column(db.Float, nullable=False)
+    unidade_medida = db.Column(db.String(20), nullable=False)
+    preco_unitario = db.Column(db.Float, nullable=False)
+    data_cadastro = db.Column(db.DateTime, default=db.func.current_timestamp())
+    data_atualizacao = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+    # Preenchido na exclusão lógica (DELETE /estoque/<id>?arquivar=true)
+    arquivado_em = db.Column(db.DateTime, nullable=True)
+    # Soma das reservas ativas (tabela 'reservas'), mantida a cada reserva e
+    # liberação por services/reservas.py: o disponível sai desta linha, sem
+    # somar as reservas.
+    quantidade_reservada = db.Column(db.Float, nullable=False, default=0, server_default='0')
+
+    __table_args__ = (
+        db.Index('ix_estoque_filial_id_arquivado_em', 'filial_id', 'arquivado_em'),
+    )
+
+    @property
+    def disponivel(self):
+        return self.quantidade - self.quantidade_reservada
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'nome': self.nome,
+            'quantidade': float(self.quantidade),
+            'quantidade_reservada': float(self.quantidade_reservada),
+            'disponivel': float(self.disponivel),
+            'unidade_medida': self.unidade_medida,
+            'preco_unitario': float(self.preco_unitario),
+            'data_cadastro': self.data_cadastro.isoformat(),
+            'data_atualizacao': self.data_atualizacao.isoformat(),
+            'arquivado_em': self.arquivado_em.isoformat() if self.arquivado_em else None
+        }
+
+class Movimentacoes_Estoque(DaFilial, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('estoque.id'), nullable=False)
+    tipo_movimentacao = db.Column(db.Enum('Entrada', 'Saída'), nullable=False)
+    quantidade = db.Column(db.Numeric(10, 2), nullable=False)
+    data_movimentacao = db.Column(db.TIMESTAMP, default=db.func.current_timestamp())
+    observacoes = db.Column(db.String(255))
+
+    item = db.relationship('Estoque', backref=db.backref('movimentacoes', lazy=True))
+
+    __table_args__ = (
+        db.Index('ix_movimentacoes__estoque_item_id_data', 'item_id', 'data_movimentacao'),
+        # Arquivamento e ponto de reposição (todas as filiais)
+        db.Index('ix_movimentacoes__estoque_data_movimentacao', 'data_movimentacao'),
+        db.Index('ix_movimentacoes__estoque_filial_id_data', 'filial_id', 'data_movimentacao'),
+    )
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'item_id': self.item_id,
+            # >>> CORREÇÃO 4: Corrigido de 'nome_item' para 'nome' para buscar do modelo Estoque corretamente.
+            'nome_item': self.item.nome, 
+            'tipo_movimentacao': self.tipo_movimentacao,
+            'quantidade': float(self.quantidade),
+            'data_movimentacao': self.data_movimentacao.isoformat(),
+            'observacoes': self.observacoes
+        }
+    
+class ArquivoMovimentacoes(DaFilial, db.Model):
+    """
+    Movimentações antigas, retiradas de movimentacoes__estoque pelo
+    arquivamento (services/estoque.py). Mantêm o id original.
+    """
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('estoque.id'), nullable=False)
+    tipo_movimentacao = db.Column(db.Enum('Entrada', 'Saída'), nullable=False)
+    quantidade = db.Column(db.Numeric(10, 2), nullable=False)
+    data_movimentacao = db.Column(db.DateTime, nullable=False)
+    observacoes = db.Column(db.String(255))
+    arquivado_em = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    item = db.relationship('Estoque')
+
+    __table_args__ = (
+        db.Index('ix_arquivo_movimentacoes_item_id_data', 'item_id', 'data_movimentacao'),
+        db.Index('ix_arquivo_movimentacoes_filial_id_data', 'filial_id', 'data_movimentacao'),
+    )
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'item_id': self.item_id,
+            'nome_item': self.item.nome,
+            'tipo_movimentacao': self.tipo_movimentacao,
+            'quantidade': float(self.quantidade),
+            'data_movimentacao': self.data_movimentacao.isoformat(),
+            'observacoes': self.observacoes,
+            'arquivada': True
+        }
+
+class SaldosAbertura(db.Model):
+    """
+    Efeito líquido (entradas - saídas) das movimentações arquivadas de cada
+    item: o saldo de abertura do histórico que ficou na tabela principal.
+    """
+    item_id = db.Column(db.Integer, db.ForeignKey('estoque.id'), primary_key=True, autoincrement=False)
+    saldo = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    movimentacoes = db.Column(db.Integer, nullable=False, default=0)
+    # Todas as movimentações arquivadas são anteriores a esta data
+    data_corte = db.Column(db.DateTime, nullable=False)
+
+    def serialize(self):
+        return {
+            'item_id': self.item_id,
+            'saldo': float(self.saldo),
+            'movimentacoes': self.movimentacoes,
+            'data_corte': self.data_corte.isoformat()
+        }
+
+class Reservas(db.Model):
+    """
+    Reserva de estoque de um orçamento pendente: uma linha por item de
+    estoque do orçamento, somada em Estoque.quantidade_reservada enquanto
+    não expira, é liberada ou vira saída na aprovação.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('estoque.id'), nullable=False)
+    orcamento_id = db.Column(db.Integer, db.ForeignKey('orcamentos.id'), nullable=False)
+    quantidade = db.Column(db.Float, nullable=False)
+    criado_em = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())
+    expira_em = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_reservas_orcamento_id', 'orcamento_id'),
+        db.Index('ix_reservas_item_id_expira_em', 'item_id', 'expira_em'),
+        db.Index('ix_reservas_expira_em', 'expira_em'),
+    )
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'item_id': self.item_id,
+            'orcamento_id': self.orcamento_id,
+            'quantidade': float(self.quantidade),
+            'criado_em': self.criado_em.isoformat(),
+            'expira_em': self.expira_em.isoformat()
+        }
+
+class MarcasProcessamento(db.Model):
+    """
+    Até onde um processamento incremental já leu uma tabela (o maior id
+    processado ou, nas tabelas com linhas alteradas, a maior data de
+    atualização), para que a próxima execução leia só as linhas novas.
+    """
+    nome = db.Column(db.String(50), primary_key=True)
+    ultimo_id = db.Column(db.BigInteger, nullable=False, default=0)
+    ultima_data = db.Column(db.DateTime)
+    atualizado_em = db.Column(db.DateTime)
+
+class ConsumoMensal(db.Model):
+    """
+    Saídas de cada item por mês (movimentações da tabela principal e do
+    arquivo), mantidas por services/reposicao.py a partir das novas
+    movimentações apenas.
+    """
+    item_id = db.Column(db.Integer, db.ForeignKey('estoque.id'), primary_key=True, autoincrement=False)
+    # Primeiro dia do mês
+    mes = db.Column(db.Date, primary_key=True)
+    quantidade = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+class Reposicao(db.Model):
+    """
+    Previsão de consumo e ponto de reposição de cada item com saídas no
+    histórico, calculados por services/reposicao.py.
+    """
+    item_id = db.Column(db.Integer, db.ForeignKey('estoque.id'), primary_key=True, autoincrement=False)
+    # Consumo médio por dia, sem o efeito da sazonalidade
+    consumo_diario = db.Column(db.Float, nullable=False)
+    desvio_diario = db.Column(db.Float, nullable=False)
+    # Sazonalidade do período do prazo de entrega (1 = mês típico) e o
+    # consumo esperado por dia nesse período
+    fator_sazonal = db.Column(db.Float, nullable=False)
+    demanda_diaria = db.Column(db.Float, nullable=False)
+    estoque_seguranca = db.Column(db.Float, nullable=False)
+    ponto_reposicao = db.Column(db.Float, nullable=False)
+    meses_historico = db.Column(db.Integer, nullable=False)
+    # Mês em que o cálculo foi feito: na virada do mês tudo é recalculado
+    mes_referencia = db.Column(db.Date, nullable=False)
+    calculado_em = db.Column(db.DateTime, nullable=False)
+
+    def serialize(self):
+        return {
+            'item_id': self.item_id,
+            'consumo_diario': self.consumo_diario,
+            'desvio_diario': self.desvio_diario,
+            'fator_sazonal': self.fator_sazonal,
+            'demanda_diaria': self.demanda_diaria,
+            'estoque_seguranca': self.estoque_seguranca,
+            'ponto_reposicao': self.ponto_reposicao,
+            'meses_historico': self.meses_historico,
+            'calculado_em': self.calculado_em.isoformat()
+        }
+
+class Orcamentos(DaFilial, db.Model):
+    _tablename_ = 'orcamentos'
+    id = db.Column(db.Integer, primary_key=True)
+    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=False)
+    data_criacao = db.Column(db.DateTime, default=db.func.current_timestamp())
+    data_atualizacao = db.Column(db.DateTime, default=db.func.current_timestamp(), onupdate=db.func.current_timestamp())
+    total_orcamento = db.Column(db.Float, nullable=False)
+    observacoes = db.Column(db.String(500))
+    status = db.Column(Enum('Pendente', 'Aprovado', 'Rejeitado', name='orcamento_status'), default='Pendente')
+
+    # >>> CORREÇÃO 1 (Parte B): Trocado 'backref' por 'back_populates' <<<
+    # Isso resolve o erro de mapeamento ao criar uma ligação explícita com o campo 'orcamentos_rel' em Clientes.
+    cliente = db.relationship('Clientes', back_populates='orcamentos_rel')
+    
+    itens = db.relationship('ItensOrcamento', backref='orcamento', cascade='all, delete-orphan', lazy=True)
+
+    __table_args__ = (
+        db.Index('ix_orcamentos_cliente_id_data_criacao', 'cliente_id', 'data_criacao'),
+        db.Index('ix_orcamentos_filial_id_status_data_criacao', 'filial_id', 'status', 'data_criacao'),
+        db.Index('ix_orcamentos_data_atualizacao', 'data_atualizacao'),
+    )
+
+    def serialize(self, incluir_logs=False):
+        return {
+            'id': self.id,
+            'cliente_id': self.cliente_id,
+            'cliente_nome': self.cliente.nome, # Alterado de 'nome_cliente' para 'cliente_nome' para consistência
+            'data_criacao': self.data_criacao.isoformat(),
+            'data_atualizacao': self.data_atualizacao.isoformat(),
+            'total_orcamento': float(self.total_orcamento),
+            'observacoes': self.observacoes,
+            'status': self.status,
+            'itens': [item.serialize(incluir_logs) for item in self.itens]
+        }
+
+class ItensOrcamento(db.Model):
+    _tablename_ = 'itens_orcamento'
+    id = db.Column(db.Integer, primary_key=True)
+    orcamento_id = db.Column(db.Integer, db.ForeignKey('orcamentos.id'), nullable=False)
+    item_estoque_id = db.Column(db.Integer, db.ForeignKey('estoque.id'), nullable=False)
+    nome_item = db.Column(db.String(255), nullable=False)
+    quantidade = db.Column(db.Float, nullable=False)
+    unidade_medida = db.Column(db.String(50), nullable=False)
+    # >>> CORREÇÃO 2 (Parte A): O nome do campo foi mantido como no arquivo original.
+    preco_unitario_no_orcamento = db.Column(db.Float, nullable=False)
+    subtotal = db.Column(db.Float, nullable=False)
+    # Texto longo, exibido só no detalhe do orçamento: fica fora do SELECT
+    # dos itens e é carregado à parte (ou com undefer) quando pedido.
+    log_calculo = db.deferred(db.Column(db.Text, nullable=True))
+
+    item_estoque = db.relationship('Estoque', backref='itens_orcamento_rel')
+
+    __table_args__ = (
+        db.Index('ix_itens_orcamento_orcamento_id', 'orcamento_id'),
+        db.Index('ix_itens_orcamento_item_estoque_id', 'item_estoque_id'),
+    )
+
+    def serialize(self, incluir_log=False):
+        dados = {
+            'id': self.id,
+            'orcamento_id': self.orcamento_id,
+            'item_estoque_id': self.item_estoque_id,
+            'nome_item': self.nome_item,
+            'quantidade': self.quantidade,
+            'unidade_medida': self.unidade_medida,
+            # >>> CORREÇÃO 2 (Parte B): Corrigido para serializar o nome de campo correto do modelo.
+            'preco_unitario_praticado': self.preco_unitario_no_orcamento,
+            'subtotal': self.subtotal,
+        }
+        if incluir_log:
+            dados['log_calculo'] = self.log_calculo
+        return dados
+
+class RevisoesOrcamento(db.Model):
+    """
+    Uma revisão de orçamento por criação ou edição dos itens. O conteúdo
+    guarda os itens completos a cada ORCAMENTOS_REVISOES_INTERVALO revisões
+    e, nas demais, só a diferença para a revisão anterior
+    (services/revisoes.py). 'base' é o número da revisão completa da qual
+    esta depende (igual a 'numero' nas completas).
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    orcamento_id = db.Column(db.Integer, db.ForeignKey('orcamentos.id'), nullable=False)
+    numero = db.Column(db.Integer, nullable=False)
+    base = db.Column(db.Integer, nullable=False)
+    criado_em = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())
+    funcionario_id = db.Column(db.Integer, db.ForeignKey('funcionarios.id'), nullable=True)
+    total_orcamento = db.Column(db.Float, nullable=False)
+    observacoes = db.Column(db.String(500))
+    # Itens incluídos + removidos em relação à revisão anterior
+    itens_alterados = db.Column(db.Integer, nullable=False, default=0)
+    # JSON comprimido com zlib; fica fora da listagem das revisões
+    conteudo = db.deferred(db.Column(db.LargeBinary(length=2 ** 24), nullable=False))
+
+    __table_args__ = (
+        db.UniqueConstraint('orcamento_id', 'numero', name='uq_revisoes_orcamento_numero'),
+    )
+
+    def serialize(self):
+        return {
+            'numero': self.numero,
+            'completa': self.numero == self.base,
+            'criado_em': self.criado_em.isoformat(),
+            'funcionario_id': self.funcionario_id,
+            'total_orcamento': float(self.total_orcamento),
+            'observacoes': self.observacoes,
+            'itens_alterados': self.itens_alterados
+        }
+
+class Tarefas(DaFilial, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(50), nullable=False)
+    parametros = db.Column(db.Text, nullable=False)
+    status = db.Column(Enum('Pendente', 'Executando', 'Concluída', 'Falhou', name='tarefa_status'), nullable=False, default='Pendente')
+    progresso = db.Column(db.Integer, nullable=False, default=0)
+    mensagem = db.Column(db.String(500))
+    resultado = db.Column(db.Text)
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    max_tentativas = db.Column(db.Integer, nullable=False, default=3)
+    funcionario_id = db.Column(db.Integer, db.ForeignKey('funcionarios.id'), nullable=True)
+    criado_em = db.Column(db.DateTime, default=db.func.current_timestamp())
+    iniciado_em = db.Column(db.DateTime)
+    finalizado_em = db.Column(db.DateTime)
+    # Ex.: 'aprovar_orcamento:42'. Única enquanto a tarefa não termina (volta
+    # a NULL ao finalizar): duas tarefas para o mesmo registro não coexistem
+    chave = db.Column(db.String(100))
+
+    __table_args__ = (
+        db.UniqueConstraint('chave', name='uq_tarefas_chave'),
+        db.Index('ix_tarefas_status_id', 'status', 'id'),
+        db.Index('ix_tarefas_filial_id_id', 'filial_id', 'id'),
+    )
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'parametros': json.loads(self.parametros),
+            'status': self.status,
+            'progresso': self.progresso,
+            'mensagem': self.mensagem,
+            'resultado': json.loads(self.resultado) if self.resultado else None,
+            'tentativas': self.tentativas,
+            'funcionario_id': self.funcionario_id,
+            'criado_em': self.criado_em.isoformat() if self.criado_em else None,
+            'iniciado_em': self.iniciado_em.isoformat() if self.iniciado_em else None,
+            'finalizado_em': self.finalizado_em.isoformat() if self.finalizado_em else None
+        }
+
+class Alteracoes(DaFilial, db.Model):
+    """
+    Outbox transacional: uma linha por inserção, atualização ou exclusão das
+    entidades acompanhadas, gravada no mesmo commit da alteração. O id é a
+    versão usada pelo feed de alterações.
+    """
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    entidade = db.Column(db.String(30), nullable=False)
+    entidade_id = db.Column(db.Integer, nullable=False)
+    operacao = db.Column(Enum('criado', 'atualizado', 'excluido', name='alteracao_operacao'), nullable=False)
+    dados = db.Column(db.Text)
+    criado_em = db.Column(db.DateTime, default=db.func.current_timestamp())
+
+    __table_args__ = (
+        db.Index('ix_alteracoes_filial_id_entidade_id', 'filial_id', 'entidade', 'id'),
+        db.Index('ix_alteracoes_filial_id_id', 'filial_id', 'id'),
+        db.Index('ix_alteracoes_criado_em', 'criado_em'),
+    )
+
+    def serialize(self):
+        return {
+            'versao': self.id,
+            'entidade': self.entidade,
+            'entidade_id': self.entidade_id,
+            'operacao': self.operacao,
+            'dados': json.loads(self.dados) if self.dados else None,
+            'criado_em': self.criado_em.isoformat() if self.criado_em else None
+        }
+
+class Auditoria(DaFilial, db.Model):
+    """
+    Quem alterou o quê: uma linha por objeto criado, alterado ou excluído,
+    gravada em lotes fora do request (auditoria.py).
+    """
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    entidade = db.Column(db.String(30), nullable=False)
+    entidade_id = db.Column(db.Integer, nullable=False)
+    operacao = db.Column(Enum('criado', 'atualizado', 'excluido', name='auditoria_operacao'), nullable=False)
+    funcionario_id = db.Column(db.Integer, db.ForeignKey('funcionarios.id'), nullable=True)
+    # JSON: nas alterações, só as colunas que mudaram
+    antes = db.Column(db.Text)
+    depois = db.Column(db.Text)
+    alterado_em = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_auditoria_filial_id_entidade_id', 'filial_id', 'entidade', 'entidade_id', 'id'),
+        db.Index('ix_auditoria_filial_id_funcionario_id_id', 'filial_id', 'funcionario_id', 'id'),
+        db.Index('ix_auditoria_filial_id_id', 'filial_id', 'id'),
+    )
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'entidade': self.entidade,
+            'entidade_id': self.entidade_id,
+            'operacao': self.operacao,
+            'funcionario_id': self.funcionario_id,
+            'antes': json.loads(self.antes) if self.antes else None,
+            'depois': json.loads(self.depois) if self.depois else None,
+            'alterado_em': self.alterado_em.isoformat() if self.alterado_em else None
+        }
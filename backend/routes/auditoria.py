@@ -0,0 +1,48 @@
+# -- coding: utf-8 --
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import jwt_required
+
+from auditoria import ENTIDADES
+from models import Auditoria
+
+bp = Blueprint('auditoria', __name__)
+
+
+# Rotas da trilha de auditoria
+@bp.route('/auditoria', methods=['GET'])
+@jwt_required()
+def get_auditoria():
+    """
+    Registros de auditoria, mais recentes primeiro: ?entidade= (e
+    ?entidade_id=) e/ou ?funcionario_id=. Para a página seguinte, chame de
+    novo com ?antes=<proximo> da resposta enquanto ele não for null.
+    """
+    entidade = request.args.get('entidade')
+    entidade_id = request.args.get('entidade_id', type=int)
+    funcionario_id = request.args.get('funcionario_id', type=int)
+    antes = request.args.get('antes', type=int)
+    if entidade and entidade not in ENTIDADES.values():
+        return jsonify({"erro": f"Entidade inválida. Use uma de: {', '.join(ENTIDADES.values())}."}), 400
+    if entidade_id and not entidade:
+        return jsonify({"erro": "Informe a entidade junto com entidade_id."}), 400
+    limite = max(1, min(request.args.get('limite', current_app.config['AUDITORIA_LIMITE'], type=int),
+                        current_app.config['AUDITORIA_LIMITE']))
+
+    try:
+        query = Auditoria.query
+        if entidade:
+            query = query.filter(Auditoria.entidade == entidade)
+        if entidade_id:
+            query = query.filter(Auditoria.entidade_id == entidade_id)
+        if funcionario_id:
+            query = query.filter(Auditoria.funcionario_id == funcionario_id)
+        if antes:
+            query = query.filter(Auditoria.id < antes)
+        registros = query.order_by(Auditoria.id.desc()).limit(limite + 1).all()
+        proximo = registros[limite - 1].id if len(registros) > limite else None
+        return jsonify({
+            'registros': [r.serialize() for r in registros[:limite]],
+            'proximo': proximo,
+        }), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
@@ -0,0 +1,88 @@
+# -- coding: utf-8 --
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import create_access_token, jwt_required
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db, jwt
+from filiais import CLAIM, filial_para_gravar
+from models import Funcionarios
+from services.integridade import erro_integridade
+from validacao import validar
+
+bp = Blueprint('auth', __name__)
+
+# --- VERIFIQUE ESTAS CONFIGURAÇÕES JWT CRÍTICAS ---
+@jwt.user_identity_loader
+def user_identity_lookup(user_id):
+    """
+    Esta função é chamada quando um token é criado (create_access_token).
+    Ela define qual valor será usado como 'subject' no token JWT.
+    Garantimos que seja uma string.
+    """
+    print(f"DEBUG JWT - user_identity_lookup: Recebido user_id={user_id}, Tipo={type(user_id)}")
+    return str(user_id) # Garante que o ID do usuário (que é um int) é convertido para string
+
+@jwt.user_lookup_loader
+def user_lookup_callback(_jwt_header, jwt_data):
+    """
+    Esta função é chamada quando jwt_required() é usado para verificar um token.
+    Ela recebe os dados do token (incluindo o 'sub' que definimos) e deve retornar o objeto do usuário.
+    """
+    identity = jwt_data["sub"]
+    print(f"DEBUG JWT - user_lookup_callback: Subject do token={identity}, Tipo={type(identity)}")
+    # Converte a identidade de volta para o tipo esperado (int para IDs de banco de dados)
+    try:
+        user_id = int(identity)
+        user = Funcionarios.query.get(user_id)
+        print(f"DEBUG JWT - user_lookup_callback: Usuário encontrado: {user.email if user else 'Nenhum'}")
+        return user
+    except ValueError:
+        print(f"DEBUG JWT - user_lookup_callback: Erro de conversão de identidade: '{identity}' não é um inteiro.")
+        return None
+# --- FIM DAS NOVAS CONFIGURAÇÕES JWT ---
+
+
+# Rotas da API
+@bp.route('/login', methods=['POST'])
+def login():
+    data = validar('login', request.get_json(silent=True))
+    email = data['email']
+    senha = data['senha']
+
+    funcionario = Funcionarios.query.filter_by(email=email).first()
+
+    if not funcionario or not funcionario.check_password(senha):
+        return jsonify({"erro": "Email ou senha inválidos"}), 401
+
+    # A filial vai no token: as consultas do request ficam restritas a ela (filiais.py)
+    access_token = create_access_token(identity=funcionario.id, additional_claims={CLAIM: funcionario.filial_id})
+    print(f"DEBUG FLASK - Token de acesso criado para o funcionário ID: {funcionario.id}")
+    return jsonify(access_token=access_token), 200
+
+@bp.route('/funcionarios/cadastro', methods=['POST'])
+@jwt_required(optional=True)
+def add_funcionario():
+    # Senha conferida numa passada só e CPF já sem máscara (validacao.py)
+    data = validar('funcionario', request.get_json(silent=True))
+    nome = data['nome']
+    email = data['email']
+    senha = data['senha']
+    cleaned_cpf = data['cpf']
+
+    try:
+        # Cadastro público (tela /cadastro do frontend, sem token): filial padrão.
+        # Logado, o novo funcionário fica na filial de quem o cadastra (claim do token);
+        # nas outras filiais, o primeiro é cadastrado por 'flask filiais funcionario'.
+        # Email e CPF duplicados são barrados pelas restrições únicas no INSERT
+        novo_funcionario = Funcionarios(nome=nome, email=email, cpf=cleaned_cpf, filial_id=filial_para_gravar())
+        novo_funcionario.set_password(senha)
+        db.session.add(novo_funcionario)
+        db.session.commit()
+        return jsonify({"message": "Funcionário cadastrado com sucesso!"}), 201
+    except IntegrityError as e:
+        db.session.rollback()
+        erro = erro_integridade(e)
+        return jsonify({"erro": erro.mensagem}), erro.status
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"erro": str(e)}), 500
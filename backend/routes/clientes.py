@@ -0,0 +1,152 @@
+# -- coding: utf-8 --
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.exc import IntegrityError
+
+from admissao import pesada
+from alteracoes import registrar_gravacoes
+from extensions import db
+from filiais import filial_para_gravar
+from models import Clientes
+from services.integridade import erro_integridade, upsert
+from validacao import validar
+
+bp = Blueprint('clientes', __name__)
+
+@bp.route('/clientes', methods=['GET'])
+@jwt_required()
+def get_clientes():
+    try:
+        current_user_id = get_jwt_identity()
+        print(f"DEBUG FLASK - GET Clientes: Cliente ID atual: {current_user_id}")
+        clientes = Clientes.query.all()
+        serialized_clientes = [cliente.to_dict() for cliente in clientes]
+        return jsonify(serialized_clientes), 200
+    except Exception as e:
+        return jsonify({"erro": f"Erro ao listar clientes: {str(e)}"}), 500
+# ... (demais rotas de clientes permanecem iguais) ...
+@bp.route('/clientes/<int:id>', methods=['GET'])
+@jwt_required()
+def get_cliente(id):
+    try:
+        cliente = Clientes.query.get(id)
+        if not cliente:
+            return jsonify({"erro": "Cliente não encontrado"}), 404
+        return jsonify(cliente.to_dict()), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/clientes', methods=['POST'])
+@jwt_required()
+def add_cliente():
+    current_user_id = get_jwt_identity()
+    print(f"DEBUG FLASK - POST Clientes: Cliente ID atual: {current_user_id}")
+
+    # CPF e telefone chegam aqui só com dígitos (validacao.py)
+    data = validar('cliente', request.get_json(silent=True))
+    nome = data['nome']
+    cleaned_cpf = data['cpf']
+    cleaned_telefone = data['telefone']
+    print(f"DEBUG FLASK - Dados validados para adicionar cliente: {data}")
+
+    try:
+        # CPF duplicado na filial é barrado por uq_clientes_filial_cpf no próprio INSERT
+        novo_cliente = Clientes(nome=nome, cpf=cleaned_cpf, telefone=cleaned_telefone)
+        db.session.add(novo_cliente)
+        db.session.commit()
+        print("DEBUG FLASK - Cliente adicionado com sucesso.")
+        return jsonify(novo_cliente.to_dict()), 201
+    except IntegrityError as e:
+        db.session.rollback()
+        erro = erro_integridade(e)
+        print(f"DEBUG FLASK - Erro de integridade: {erro.mensagem}")
+        return jsonify({"erro": erro.mensagem}), erro.status
+    except Exception as e:
+        db.session.rollback()
+        print(f"DEBUG FLASK - Erro interno do servidor ao adicionar cliente: {str(e)}")
+        return jsonify({"erro": f"Erro interno do servidor: {str(e)}"}), 500
+
+@bp.route('/clientes/<int:id>', methods=['PUT'])
+@jwt_required()
+def update_cliente(id):
+    current_user_id = get_jwt_identity()
+    print(f"DEBUG FLASK - PUT Clientes: Cliente ID atual: {current_user_id}")
+    data = validar('cliente_atualizacao', request.get_json(silent=True))
+    print(f"DEBUG FLASK - Dados validados para atualizar cliente (ID: {id}): {data}")
+    try:
+        cliente = Clientes.query.get(id)
+        if not cliente:
+            return jsonify({"erro": "Cliente não encontrado"}), 404
+
+        # Campos ausentes mantêm o valor atual, que já está limpo
+        nome = data.get('nome', cliente.nome)
+        cleaned_cpf = data.get('cpf', cliente.cpf)
+        cleaned_telefone = data.get('telefone', cliente.telefone)
+
+        cliente.nome = nome
+        cliente.cpf = cleaned_cpf
+        cliente.telefone = cleaned_telefone
+        db.session.commit()
+        print("DEBUG FLASK - Cliente atualizado com sucesso (PUT).")
+        return jsonify(cliente.to_dict()), 200
+    except IntegrityError as e:
+        db.session.rollback()
+        erro = erro_integridade(e)
+        print(f"DEBUG FLASK - Erro de integridade (PUT): {erro.mensagem}")
+        return jsonify({"erro": erro.mensagem}), erro.status
+    except Exception as e:
+        db.session.rollback()
+        print(f"DEBUG FLASK - Erro interno do servidor ao atualizar cliente (PUT): {str(e)}")
+        return jsonify({"erro": f"Erro interno do servidor: {str(e)}"}), 500
+
+@bp.route('/clientes/lote', methods=['POST'])
+@pesada
+@jwt_required()
+def upsert_clientes():
+    """
+    Carga em massa: {"clientes": [{"nome", "cpf", "telefone"}, ...]}. Num
+    único comando, CPFs novos são inseridos e os já cadastrados têm nome e
+    telefone atualizados. Repetido no lote, vale o último.
+    """
+    data = validar('clientes_lote', request.get_json(silent=True))
+    filial_id = filial_para_gravar()
+    linhas = list({c['cpf']: {'filial_id': filial_id, 'nome': c['nome'], 'cpf': c['cpf'], 'telefone': c['telefone']}
+                   for c in data['clientes']}.values())
+    cpfs = [linha['cpf'] for linha in linhas]
+
+    try:
+        # Só para separar criados de atualizados na resposta e no feed; a
+        # unicidade continua garantida pelo upsert
+        existentes = {cpf for (cpf,) in db.session.query(Clientes.cpf).filter(Clientes.cpf.in_(cpfs))}
+        upsert(Clientes, linhas, atualizar=('nome', 'telefone', 'data_atualizacao'), chave=('filial_id', 'cpf'))
+
+        gravados = (Clientes.query.filter(Clientes.cpf.in_(cpfs))
+                    .execution_options(populate_existing=True).all())
+        registrar_gravacoes(db.session, [c for c in gravados if c.cpf not in existentes], 'criado')
+        registrar_gravacoes(db.session, [c for c in gravados if c.cpf in existentes], 'atualizado')
+        db.session.commit()
+        return jsonify({"inseridos": len(cpfs) - len(existentes), "atualizados": len(existentes)}), 200
+    except IntegrityError as e:
+        db.session.rollback()
+        erro = erro_integridade(e)
+        return jsonify({"erro": erro.mensagem}), erro.status
+    except Exception as e:
+        db.session.rollback()
+        print(f"DEBUG FLASK - Erro na carga de clientes: {str(e)}")
+        return jsonify({"erro": f"Erro interno do servidor: {str(e)}"}), 500
+
+@bp.route('/clientes/<int:id>', methods=['DELETE'])
+@jwt_required()
+def delete_cliente(id):
+    current_user_id = get_jwt_identity()
+    print(f"DEBUG FLASK - DELETE Clientes: Cliente ID atual: {current_user_id}")
+    try:
+        cliente = Clientes.query.get(id)
+        if not cliente:
+            return jsonify({"erro": "Cliente não encontrado"}), 404
+        db.session.delete(cliente)
+        db.session.commit()
+        return jsonify({"message": "Cliente excluído com sucesso"}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"erro": str(e)}), 500
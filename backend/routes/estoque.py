@@ -0,0 +1,352 @@
+# -- coding: utf-8 --
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+
+from admissao import pesada
+from extensions import db
+from models import (
+    ArquivoMovimentacoes, Marmores, MarcasProcessamento, Estoque, Movimentacoes_Estoque, Reposicao, SaldosAbertura,
+)
+from services import ErroNegocio
+from services.estoque import (
+    arquivar_item_estoque, contar_dependencias, corte_arquivamento, excluir_item_estoque,
+)
+from services.integridade import erro_integridade
+from services.reposicao import MARCA
+from services.reservas import baixar, repor
+from tarefas import fila
+from validacao import LIMITE_LOTE, validar
+
+bp = Blueprint('estoque', __name__)
+
+# Rotas de Marmores (sem alterações)
+@bp.route('/marmores', methods=['GET'])
+@jwt_required()
+def get_marmores():
+    try:
+        marmores = Marmores.query.all()
+        return jsonify([marmore.serialize() for marmore in marmores]), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+# ... (demais rotas de marmores permanecem iguais) ...
+@bp.route('/marmores', methods=['POST'])
+@jwt_required()
+def add_marmore():
+    data = validar('marmore', request.get_json(silent=True))
+
+    try:
+        novo_marmore = Marmores(nome=data['nome'], preco_m2=data['preco_m2'], quantidade=data['quantidade'])
+        db.session.add(novo_marmore)
+        db.session.commit()
+        return jsonify(novo_marmore.serialize()), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/marmores/<int:id>', methods=['PUT'])
+@jwt_required()
+def update_marmore(id):
+    data = validar('marmore_atualizacao', request.get_json(silent=True))
+    try:
+        marmore = Marmores.query.get(id)
+        if not marmore:
+            return jsonify({"erro": "Mármore não encontrado"}), 404
+
+        marmore.nome = data.get('nome', marmore.nome)
+        marmore.preco_m2 = data.get('preco_m2', marmore.preco_m2)
+        marmore.quantidade = data.get('quantidade', marmore.quantidade)
+        db.session.commit()
+        return jsonify(marmore.serialize()), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/marmores/<int:id>', methods=['DELETE'])
+@jwt_required()
+def delete_marmore(id):
+    try:
+        marmore = Marmores.query.get(id)
+        if not marmore:
+            return jsonify({"erro": "Mármore não encontrado"}), 404
+        db.session.delete(marmore)
+        db.session.commit()
+        return jsonify({"message": "Mármore excluído com sucesso"}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"erro": str(e)}), 500
+
+# Rotas de Estoque
+@bp.route('/estoque', methods=['GET'])
+@jwt_required()
+def listar_estoque():
+    try:
+        estoque_items = Estoque.query.filter(Estoque.arquivado_em.is_(None)).all()
+        return jsonify([item.serialize() for item in estoque_items]), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/estoque/disponibilidade', methods=['GET'])
+@jwt_required()
+def get_disponibilidade():
+    """
+    Quantidade, reservado e disponível dos itens em ?ids=1,2,3, lidos da
+    própria linha de cada item (sem somar as reservas).
+    """
+    try:
+        ids = [int(i) for i in request.args.get('ids', '').split(',') if i.strip()]
+    except ValueError:
+        return jsonify({"erro": "Informe os ids dos itens separados por vírgula."}), 400
+    if not ids or len(ids) > LIMITE_LOTE:
+        return jsonify({"erro": f"Informe de 1 a {LIMITE_LOTE} ids de itens."}), 400
+    try:
+        itens = (db.session.query(Estoque.id, Estoque.quantidade, Estoque.quantidade_reservada)
+                 .filter(Estoque.id.in_(ids)).all())
+        return jsonify([{
+            'id': item.id,
+            'quantidade': float(item.quantidade),
+            'quantidade_reservada': float(item.quantidade_reservada),
+            'disponivel': float(item.quantidade - item.quantidade_reservada),
+        } for item in itens]), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/estoque/reposicao', methods=['GET'])
+@jwt_required()
+def get_reposicao():
+    """
+    Previsão de consumo e ponto de reposição dos itens com saídas no
+    histórico, já calculados por 'flask --app app estoque
+    atualizar-reposicao': os que mais cedo chegam ao ponto vêm primeiro.
+    ?repor=1 traz só os que já estão no ponto de reposição ou abaixo dele.
+    """
+    disponivel = Estoque.quantidade - Estoque.quantidade_reservada
+    try:
+        query = (db.session.query(Reposicao, Estoque.nome, Estoque.unidade_medida, Estoque.quantidade, disponivel)
+                 .join(Estoque, Estoque.id == Reposicao.item_id)
+                 .filter(Estoque.arquivado_em.is_(None)))
+        if request.args.get('repor') == '1':
+            query = query.filter(disponivel <= Reposicao.ponto_reposicao)
+        itens = []
+        for previsao, nome, unidade_medida, quantidade, livre in query:
+            item = previsao.serialize()
+            item.update({
+                'nome': nome,
+                'unidade_medida': unidade_medida,
+                'quantidade': float(quantidade),
+                'disponivel': float(livre),
+                'repor': livre <= previsao.ponto_reposicao,
+                # Dias até o disponível chegar ao ponto de reposição
+                'dias_ate_reposicao': (max(livre - previsao.ponto_reposicao, 0) / previsao.demanda_diaria
+                                       if previsao.demanda_diaria > 0 else None),
+            })
+            itens.append(item)
+        itens.sort(key=lambda i: (i['dias_ate_reposicao'] is None, i['dias_ate_reposicao'] or 0))
+        marca = db.session.get(MarcasProcessamento, MARCA)
+        return jsonify({
+            'itens': itens,
+            'prazo_dias': current_app.config['REPOSICAO_PRAZO_DIAS'],
+            'atualizado_em': marca.atualizado_em.isoformat() if marca and marca.atualizado_em else None,
+        }), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/estoque', methods=['POST'])
+@jwt_required()
+def add_estoque_item():
+    data = validar('estoque', request.get_json(silent=True))
+
+    try:
+        novo_item = Estoque(
+            nome=data['nome'],
+            quantidade=data['quantidade'],
+            unidade_medida=data['unidade_medida'],
+            preco_unitario=data['preco_unitario'],
+        )
+        db.session.add(novo_item)
+        db.session.commit()
+        return jsonify(novo_item.serialize()), 201
+    except IntegrityError as e:
+        db.session.rollback()
+        erro = erro_integridade(e)
+        return jsonify({'erro': erro.mensagem}), erro.status
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'erro': str(e)}), 500
+
+@bp.route('/estoque/<int:item_id>', methods=['PUT'])
+@jwt_required()
+def update_estoque_item(item_id):
+    data = validar('estoque_atualizacao', request.get_json(silent=True))
+    query = Estoque.query.filter_by(id=item_id)
+    if 'quantidade' in data:
+        # Linha travada até o commit: nenhuma reserva entra entre a conferência e a gravação
+        query = query.with_for_update()
+    item = query.first_or_404()
+    if 'quantidade' in data and data['quantidade'] < item.quantidade_reservada:
+        db.session.rollback()
+        return jsonify({'erro': f"A quantidade não pode ficar abaixo do reservado por orçamentos pendentes "
+                                f"({item.quantidade_reservada:g})."}), 400
+
+    try:
+        item.nome = data.get('nome', item.nome)
+        item.quantidade = data.get('quantidade', item.quantidade)
+        item.unidade_medida = data.get('unidade_medida', item.unidade_medida)
+        item.preco_unitario = data.get('preco_unitario', item.preco_unitario)
+        item.data_atualizacao = db.func.current_timestamp()
+
+        db.session.commit()
+        return jsonify(item.serialize()), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'erro': str(e)}), 500
+    
+@bp.route('/estoque/<int:item_id>', methods=['DELETE'])
+@jwt_required()
+def delete_estoque(item_id):
+    current_user_id = get_jwt_identity()
+    try:
+        item_estoque = Estoque.query.get(item_id)
+        if not item_estoque:
+            return jsonify({"erro": "Item de estoque não encontrado."}), 404
+
+        # ?arquivar=true mantém o histórico (exclusão lógica)
+        if request.args.get('arquivar', '').lower() in ('1', 'true'):
+            arquivar_item_estoque(item_estoque)
+            return jsonify({"mensagem": "Item de estoque arquivado com sucesso. O histórico foi mantido."}), 200
+
+        # Itens com muito histórico são excluídos em segundo plano; o
+        # arquivamento imediato já os tira das listagens.
+        tamanho_lote = current_app.config['ESTOQUE_TAMANHO_LOTE_EXCLUSAO']
+        if contar_dependencias(item_id) > tamanho_lote:
+            arquivar_item_estoque(item_estoque)
+            nova_tarefa = fila.enfileirar('excluir_item_estoque', {'item_id': item_id},
+                                          funcionario_id=int(current_user_id),
+                                          chave=f'excluir_item_estoque:{item_id}')
+            return jsonify({
+                "mensagem": "Item de estoque arquivado. A exclusão do histórico foi enviada para processamento.",
+                "tarefa": nova_tarefa.serialize(),
+            }), 202
+
+        excluidos = excluir_item_estoque(item_estoque, tamanho_lote)
+        return jsonify({
+            "mensagem": "Item de estoque e suas dependências foram excluídos com sucesso.",
+            "excluidos": excluidos,
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        # Imprime o erro no console do backend para depuração
+        print(f"Erro ao excluir item de estoque: {e}") 
+        return jsonify({"erro": f"Erro de banco de dados ao excluir o item. Detalhes: {str(e)}"}), 500
+    
+@bp.route('/movimentacoes_estoque', methods=['GET'])
+@pesada
+@jwt_required()
+def get_movimentacoes_estoque():
+    # Só os últimos MOVIMENTACOES_MESES_ATIVOS meses; o restante está em
+    # GET /movimentacoes_estoque/arquivo
+    try:
+        movimentacoes = Movimentacoes_Estoque.query.options(joinedload(Movimentacoes_Estoque.item)).all()
+        return jsonify([mov.serialize() for mov in movimentacoes]), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/movimentacoes_estoque/arquivo', methods=['GET'])
+@pesada
+@jwt_required()
+def get_arquivo_movimentacoes():
+    """
+    Consulta ao histórico arquivado: ?item_id= e/ou o período ?de=&ate=
+    (AAAA-MM-DD), mais recentes primeiro, até ?limite= linhas. Com item_id
+    a resposta traz também o saldo de abertura do item.
+    """
+    item_id = request.args.get('item_id', type=int)
+    try:
+        de = datetime.fromisoformat(request.args['de']) if request.args.get('de') else None
+        ate = datetime.fromisoformat(request.args['ate']) if request.args.get('ate') else None
+    except ValueError:
+        return jsonify({"erro": "Datas inválidas. Use AAAA-MM-DD."}), 400
+    if not item_id and not (de and ate):
+        return jsonify({"erro": "Informe o item (item_id) ou o período (de e ate)."}), 400
+    limite = max(1, min(request.args.get('limite', 500, type=int), 5000))
+
+    try:
+        # SaldosAbertura não tem filial_id: o item é conferido na filial do token antes
+        if item_id and not db.session.get(Estoque, item_id):
+            return jsonify({"erro": "Item de estoque não encontrado."}), 404
+        query = ArquivoMovimentacoes.query.options(joinedload(ArquivoMovimentacoes.item))
+        if item_id:
+            query = query.filter(ArquivoMovimentacoes.item_id == item_id)
+        if de:
+            query = query.filter(ArquivoMovimentacoes.data_movimentacao >= de)
+        if ate:
+            # 'ate' inclui o dia inteiro
+            query = query.filter(ArquivoMovimentacoes.data_movimentacao < ate + timedelta(days=1))
+        movimentacoes = query.order_by(ArquivoMovimentacoes.data_movimentacao.desc()).limit(limite).all()
+
+        resposta = {'movimentacoes': [mov.serialize() for mov in movimentacoes]}
+        if item_id:
+            saldo = db.session.get(SaldosAbertura, item_id)
+            resposta['saldo_abertura'] = saldo.serialize() if saldo else None
+        return jsonify(resposta), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/movimentacoes_estoque/arquivar', methods=['POST'])
+@jwt_required()
+def arquivar_movimentacoes():
+    """Arquiva em segundo plano as movimentações com mais de {"meses": N} meses (padrão MOVIMENTACOES_MESES_ATIVOS)."""
+    data = validar('arquivamento', request.get_json(silent=True) or {})
+    meses = data.get('meses', current_app.config['MOVIMENTACOES_MESES_ATIVOS'])
+    try:
+        corte = corte_arquivamento(meses)
+        nova_tarefa = fila.enfileirar('arquivar_movimentacoes', {'corte': corte.isoformat()},
+                                      funcionario_id=int(get_jwt_identity()))
+        return jsonify({
+            "mensagem": f"Arquivamento das movimentações anteriores a {corte:%d/%m/%Y} enviado para processamento.",
+            "tarefa": nova_tarefa.serialize(),
+        }), 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"erro": str(e)}), 500
+@bp.route('/movimentacoes_estoque', methods=['POST'])
+@jwt_required()
+def add_movimentacao_estoque():
+    data = validar('movimentacao', request.get_json(silent=True))
+    item_id = data['item_id']
+    tipo_movimentacao = data['tipo_movimentacao']
+    quantidade = data['quantidade']
+    observacoes = data.get('observacoes')
+
+    try:
+        item_estoque = Estoque.query.get(item_id)
+        if not item_estoque:
+            return jsonify({"erro": "Item de estoque não encontrado."}), 404
+        if item_estoque.arquivado_em:
+            return jsonify({"erro": "Item de estoque arquivado não aceita movimentações."}), 400
+
+        if tipo_movimentacao == 'Saída':
+            # O disponível (descontadas as reservas) é conferido no próprio UPDATE
+            baixar([(item_id, quantidade)])
+        elif tipo_movimentacao == 'Entrada':
+            # Soma no próprio UPDATE: uma saída simultânea não se perde
+            repor([(item_id, quantidade)])
+
+        nova_movimentacao = Movimentacoes_Estoque(
+            item_id=item_id,
+            tipo_movimentacao=tipo_movimentacao,
+            quantidade=quantidade,
+            observacoes=observacoes
+        )
+        db.session.add(nova_movimentacao)
+        db.session.commit()
+        return jsonify(nova_movimentacao.serialize()), 201
+    except ErroNegocio as e:
+        db.session.rollback()
+        return jsonify({"erro": e.mensagem}), e.status
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"erro": str(e)}), 500
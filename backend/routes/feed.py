@@ -0,0 +1,112 @@
+# -- coding: utf-8 --
+import json
+import time
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from flask_jwt_extended import decode_token, jwt_required
+
+from admissao import sem_vaga
+from alteracoes import historico_expirado, versao_visivel
+from extensions import db
+from filiais import CLAIM
+from models import Alteracoes
+
+bp = Blueprint('feed', __name__)
+
+
+def _versao_inicial():
+    return request.args.get('desde', type=int) or request.headers.get('Last-Event-ID', 0, type=int)
+
+
+def _historico_expirado(desde):
+    """True se alterações posteriores a 'desde' já foram removidas pela limpeza."""
+    # desde=0 no feed é "a partir do histórico retido"
+    return desde > 0 and historico_expirado(desde)
+
+
+def _buscar(desde, ate, limite, entidades=None):
+    query = Alteracoes.query.filter(Alteracoes.id > desde, Alteracoes.id <= ate)
+    if entidades:
+        query = query.filter(Alteracoes.entidade.in_(entidades))
+    return query.order_by(Alteracoes.id).limit(limite).all()
+
+
+# Rotas do feed de alterações
+@bp.route('/alteracoes', methods=['GET'])
+@jwt_required()
+def get_alteracoes():
+    """
+    Alterações com versão maior que ?desde=, em ordem. Para continuar, chame
+    de novo com desde=<versao> da resposta enquanto 'mais' for true.
+    """
+    try:
+        desde = _versao_inicial()
+        limite = max(1, min(request.args.get('limite', current_app.config['ALTERACOES_LIMITE'], type=int),
+                            current_app.config['ALTERACOES_LIMITE']))
+        entidades = [e for e in request.args.get('entidades', '').split(',') if e]
+
+        if _historico_expirado(desde):
+            return jsonify({"erro": "Versão muito antiga. Recarregue os dados completos.", "recarregar": True}), 410
+
+        ate = versao_visivel()
+        alteracoes = _buscar(desde, ate, limite + 1, entidades)
+        mais = len(alteracoes) > limite
+        alteracoes = alteracoes[:limite]
+        if alteracoes:
+            versao = alteracoes[-1].id
+        else:
+            # Sem novidades: devolve a versão visível para o próximo pedido já partir dela.
+            versao = max(desde, ate)
+        return jsonify({
+            'versao': versao,
+            'mais': mais,
+            'alteracoes': [a.serialize() for a in alteracoes],
+        }), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/alteracoes/stream', methods=['GET'])
+@sem_vaga
+def stream_alteracoes():
+    """
+    Server-Sent Events com as alterações commitadas. O EventSource do
+    navegador não envia headers, então o token vem em ?token=.
+    """
+    try:
+        claims = decode_token(request.args.get('token', ''))
+    except Exception:
+        return jsonify({"erro": "Token inválido ou ausente."}), 401
+    if CLAIM not in claims:
+        return jsonify({"erro": "Sessão expirada. Faça login novamente."}), 401
+
+    desde = _versao_inicial()
+    if _historico_expirado(desde):
+        return jsonify({"erro": "Versão muito antiga. Recarregue os dados completos.", "recarregar": True}), 410
+    entidades = [e for e in request.args.get('entidades', '').split(',') if e]
+    intervalo = current_app.config['ALTERACOES_INTERVALO_SSE']
+    duracao = current_app.config['ALTERACOES_DURACAO_SSE']
+    limite = current_app.config['ALTERACOES_LIMITE']
+
+    def eventos():
+        nonlocal desde
+        fim = time.monotonic() + duracao
+        ultimo_envio = time.monotonic()
+        yield 'retry: 3000\n\n'
+        while time.monotonic() < fim:
+            alteracoes = _buscar(desde, versao_visivel(), limite, entidades)
+            # Encerra a transação e devolve a conexão ao pool entre as
+            # consultas (no MySQL, REPEATABLE READ esconderia os novos commits).
+            db.session.close()
+            for alteracao in alteracoes:
+                desde = alteracao.id
+                yield f"id: {alteracao.id}\nevent: alteracao\ndata: {json.dumps(alteracao.serialize())}\n\n"
+                ultimo_envio = time.monotonic()
+            if not alteracoes:
+                if time.monotonic() - ultimo_envio > 15:
+                    # Comentário SSE: mantém proxies e balanceadores com a conexão aberta
+                    yield ': ping\n\n'
+                    ultimo_envio = time.monotonic()
+                time.sleep(intervalo)
+
+    return Response(stream_with_context(eventos()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
@@ -0,0 +1,244 @@
+# -- coding: utf-8 --
+from flask import Blueprint, current_app, jsonify, request, send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
+
+from admissao import pesada
+from extensions import db
+from models import Clientes, Orcamentos, ItensOrcamento, Reservas, RevisoesOrcamento
+from services import ErroNegocio
+from services.documentos import FORMATOS, descartar, documento_orcamento
+from services.integridade import erro_integridade
+from services.orcamentos import adicionar_itens, aprovar_orcamento, estornar_aprovacao
+from services.reservas import liberar, reservar
+from services.revisoes import estado, registrar_revisao, remontar
+from tarefas import fila
+from validacao import validar
+
+bp = Blueprint('orcamentos', __name__)
+
+# Rotas para Orçamentos
+@bp.route('/orcamentos', methods=['GET'])
+@pesada
+@jwt_required()
+def get_orcamentos():
+    """
+    Lista os orçamentos com os itens, sem o log de cálculo (só usado no
+    detalhe). ?incluir=logs traz os logs junto, num único SELECT dos itens.
+    """
+    try:
+        incluir_logs = request.args.get('incluir') == 'logs'
+        itens = selectinload(Orcamentos.itens)
+        if incluir_logs:
+            itens = itens.undefer(ItensOrcamento.log_calculo)
+        query = Orcamentos.query.options(joinedload(Orcamentos.cliente), itens)
+        status = request.args.get('status')
+        if status:
+            query = query.filter_by(status=status)
+        orcamentos = query.all()
+        return jsonify([orcamento.serialize(incluir_logs) for orcamento in orcamentos]), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/orcamentos/<int:id>', methods=['GET'])
+@jwt_required()
+def get_orcamento(id):
+    try:
+        orcamento = (Orcamentos.query
+                     .options(joinedload(Orcamentos.cliente),
+                              selectinload(Orcamentos.itens).undefer(ItensOrcamento.log_calculo))
+                     .filter_by(id=id).first())
+        if not orcamento:
+            return jsonify({"erro": "Orçamento não encontrado."}), 404
+        dados = orcamento.serialize(incluir_logs=True)
+        dados['reservas'] = [r.serialize() for r in Reservas.query.filter_by(orcamento_id=id)]
+        return jsonify(dados), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/orcamentos/<int:id>/revisoes', methods=['GET'])
+@jwt_required()
+def get_revisoes_orcamento(id):
+    """Revisões do orçamento, da mais recente para a mais antiga, sem os itens."""
+    try:
+        # O join restringe as revisões à filial do orçamento (filiais.py)
+        revisoes = (RevisoesOrcamento.query.join(Orcamentos, Orcamentos.id == RevisoesOrcamento.orcamento_id)
+                    .filter(RevisoesOrcamento.orcamento_id == id)
+                    .order_by(RevisoesOrcamento.numero.desc()).all())
+        if not revisoes and not db.session.query(Orcamentos.id).filter_by(id=id).first():
+            return jsonify({"erro": "Orçamento não encontrado."}), 404
+        return jsonify([revisao.serialize() for revisao in revisoes]), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/orcamentos/<int:id>/revisoes/<int:numero>', methods=['GET'])
+@jwt_required()
+def get_revisao_orcamento(id, numero):
+    """Uma revisão do orçamento com os itens como estavam nela."""
+    try:
+        revisao = remontar(id, numero)
+        if not revisao:
+            return jsonify({"erro": "Revisão não encontrada."}), 404
+        return jsonify(revisao), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/orcamentos/<int:id>/documento', methods=['GET'])
+@jwt_required()
+def get_documento_orcamento(id):
+    """
+    Orçamento para impressão, com os itens e os logs de cálculo
+    (?formato=html, padrão, ou pdf). Reimpressões saem do arquivo já gravado.
+    """
+    formato = request.args.get('formato', 'html')
+    try:
+        caminho, gerado = documento_orcamento(id, formato)
+        resposta = send_file(caminho, mimetype=FORMATOS[formato], conditional=True, etag=True,
+                             download_name=f'orcamento-{id}.{formato}')
+        resposta.headers['X-Documento-Cache'] = 'MISS' if gerado else 'HIT'
+        return resposta
+    except ErroNegocio as e:
+        return jsonify({"erro": e.mensagem}), e.status
+    except Exception as e:
+        print(f"Erro ao gerar documento do orçamento: {e}")
+        return jsonify({"erro": "Erro interno do servidor ao gerar o documento."}), 500
+
+@bp.route('/orcamentos', methods=['POST'])
+@jwt_required()
+def create_orcamento():
+    data = validar('orcamento', request.get_json(silent=True))
+
+    try:
+        cliente = Clientes.query.get(data['cliente_id'])
+        if not cliente:
+            return jsonify({"erro": "Cliente não encontrado."}), 404
+
+        novo_orcamento = Orcamentos(
+            cliente_id=cliente.id,
+            observacoes=data.get('observacoes'),
+            total_orcamento=0,
+            # Coleção já carregada (vazia): os itens entram nela sem um SELECT depois do flush
+            itens=[]
+        )
+        db.session.add(novo_orcamento)
+        db.session.flush()
+
+        novo_orcamento.total_orcamento = adicionar_itens(novo_orcamento, data['itens'])
+        registrar_revisao(novo_orcamento, funcionario_id=int(get_jwt_identity()))
+        db.session.commit()
+        return jsonify(novo_orcamento.serialize()), 201
+
+    except ErroNegocio as e:
+        db.session.rollback()
+        return jsonify({"erro": e.mensagem}), e.status
+    except IntegrityError as e:
+        db.session.rollback()
+        erro = erro_integridade(e)
+        return jsonify({"erro": erro.mensagem}), erro.status
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro ao criar orçamento: {e}")
+        return jsonify({"erro": "Erro interno do servidor ao criar orçamento."}), 500
+
+@bp.route('/orcamentos/<int:orcamento_id>', methods=['PUT'])
+@jwt_required()
+def update_orcamento(orcamento_id):
+    data = validar('orcamento_atualizacao', request.get_json(silent=True))
+
+    try:
+        orcamento = (Orcamentos.query
+                     .options(selectinload(Orcamentos.itens).undefer(ItensOrcamento.log_calculo))
+                     .filter_by(id=orcamento_id).first())
+        if not orcamento:
+            return jsonify({"erro": "Orçamento não encontrado."}), 404
+        anterior = estado(orcamento)
+
+        if data.get('observacoes') is not None:
+            orcamento.observacoes = data['observacoes']
+
+        # Os itens novos reservam de novo (com validade renovada)
+        liberar(orcamento.id)
+        orcamento.itens.clear()
+        db.session.flush()
+
+        orcamento.total_orcamento = adicionar_itens(orcamento, data.get('itens', []))
+        orcamento.data_atualizacao = db.func.current_timestamp()
+        registrar_revisao(orcamento, anterior, int(get_jwt_identity()))
+        db.session.commit()
+        return jsonify(orcamento.serialize()), 200
+
+    except ErroNegocio as e:
+        db.session.rollback()
+        return jsonify({"erro": e.mensagem}), e.status
+    except IntegrityError as e:
+        db.session.rollback()
+        erro = erro_integridade(e)
+        return jsonify({"erro": erro.mensagem}), erro.status
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro ao atualizar orçamento: {e}")
+        return jsonify({"erro": "Erro interno do servidor ao atualizar orçamento."}), 500
+
+@bp.route('/orcamentos/<int:id>', methods=['DELETE'])
+@jwt_required()
+def delete_orcamento(id):
+    try:
+        orcamento = Orcamentos.query.get(id)
+        if not orcamento:
+            return jsonify({"erro": "Orçamento não encontrado."}), 404
+
+        liberar(orcamento.id)
+        RevisoesOrcamento.query.filter_by(orcamento_id=id).delete(synchronize_session=False)
+        db.session.delete(orcamento)
+        db.session.commit()
+        descartar(id)
+        return jsonify({"mensagem": "Orçamento excluído com sucesso."}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/orcamentos/<int:id>/status', methods=['PUT'])
+@jwt_required()
+def update_orcamento_status(id):
+    status = validar('orcamento_status', request.get_json(silent=True))['status']
+
+    orcamento = Orcamentos.query.get(id)
+    if not orcamento:
+        return jsonify({"erro": "Orçamento não encontrado."}), 404
+
+    try:
+        if status == 'Aprovado' and orcamento.status != 'Aprovado':
+            # Orçamentos grandes são aprovados em segundo plano
+            total_itens = ItensOrcamento.query.filter_by(orcamento_id=orcamento.id).count()
+            if total_itens > current_app.config['TAREFAS_LIMITE_ITENS_APROVACAO']:
+                # Com a chave, pedidos repetidos recebem a tarefa que já está na fila
+                nova_tarefa = fila.enfileirar('aprovar_orcamento', {'orcamento_id': orcamento.id},
+                                              funcionario_id=int(get_jwt_identity()),
+                                              chave=f'aprovar_orcamento:{orcamento.id}')
+                return jsonify({
+                    "mensagem": f"Aprovação do Orçamento #{orcamento.id} enviada para processamento.",
+                    "tarefa": nova_tarefa.serialize(),
+                }), 202
+            aprovar_orcamento(orcamento)
+        elif status == 'Rejeitado' and orcamento.status == 'Pendente':
+            liberar(orcamento.id)
+        elif orcamento.status == 'Aprovado' and status != 'Aprovado':
+            # A baixa da aprovação volta ao estoque; de volta a Pendente, o orçamento reserva de novo
+            estornar_aprovacao(orcamento)
+            if status == 'Pendente':
+                reservar(orcamento.id, [(item.item_estoque_id, item.quantidade) for item in orcamento.itens],
+                         current_app.config['RESERVAS_VALIDADE_DIAS'])
+        elif status == 'Pendente' and orcamento.status == 'Rejeitado':
+            reservar(orcamento.id, [(item.item_estoque_id, item.quantidade) for item in orcamento.itens],
+                     current_app.config['RESERVAS_VALIDADE_DIAS'])
+
+        orcamento.status = status
+        db.session.commit()
+        return jsonify(orcamento.serialize()), 200
+    except ErroNegocio as e:
+        db.session.rollback()
+        return jsonify({"erro": e.mensagem}), e.status
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"erro": str(e)}), 500
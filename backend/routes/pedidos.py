@@ -0,0 +1,212 @@
+# -- coding: utf-8 --
+from datetime import date
+
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
+
+from extensions import db
+from models import Entregas, Orcamentos, Pagamentos, Pedidos
+from services import ErroNegocio
+from services.integridade import erro_integridade
+from services.pedidos import (
+    TRANSICOES_ENTREGA, TRANSICOES_PEDIDO, criar_entrega, criar_pedido,
+    estornar_pagamento, registrar_pagamento, transicionar_status,
+)
+from services.roteirizacao import programar_entregas
+from validacao import validar
+
+bp = Blueprint('pedidos', __name__)
+
+
+def _pedido_completo(pedido):
+    dados = pedido.serialize()
+    dados['pagamentos'] = [p.serialize() for p in pedido.pagamentos]
+    dados['entregas'] = [e.serialize() for e in pedido.entregas]
+    return dados
+
+
+# Rotas de Pedidos
+@bp.route('/pedidos', methods=['GET'])
+@jwt_required()
+def get_pedidos():
+    try:
+        # Cliente no mesmo SELECT: serialize() lê pedido.cliente.nome
+        query = Pedidos.query.options(joinedload(Pedidos.cliente))
+        status = request.args.get('status')
+        if status:
+            query = query.filter(Pedidos.status == status)
+        cliente_id = request.args.get('cliente_id', type=int)
+        if cliente_id:
+            query = query.filter(Pedidos.cliente_id == cliente_id)
+        if request.args.get('em_aberto', '').lower() in ('1', 'true'):
+            query = query.filter(Pedidos.saldo > 0)
+        pedidos = query.order_by(Pedidos.data_pedido.desc()).all()
+        return jsonify([pedido.serialize() for pedido in pedidos]), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/pedidos/<int:id>', methods=['GET'])
+@jwt_required()
+def get_pedido(id):
+    try:
+        pedido = (Pedidos.query
+                  .options(joinedload(Pedidos.cliente), selectinload(Pedidos.pagamentos), selectinload(Pedidos.entregas))
+                  .filter_by(id=id).first())
+        if not pedido:
+            return jsonify({"erro": "Pedido não encontrado."}), 404
+        return jsonify(_pedido_completo(pedido)), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/pedidos', methods=['POST'])
+@jwt_required()
+def add_pedido():
+    orcamento_id = validar('pedido', request.get_json(silent=True))['orcamento_id']
+
+    try:
+        orcamento = (Orcamentos.query.options(selectinload(Orcamentos.itens))
+                     .filter_by(id=orcamento_id).first())
+        if not orcamento:
+            return jsonify({"erro": "Orçamento não encontrado."}), 404
+
+        pedido = criar_pedido(orcamento)
+        db.session.commit()
+        return jsonify(pedido.serialize()), 201
+    except ErroNegocio as e:
+        db.session.rollback()
+        return jsonify({"erro": e.mensagem}), e.status
+    except IntegrityError as e:
+        # ux_pedidos_orcamento_id: o orçamento já foi convertido
+        db.session.rollback()
+        erro = erro_integridade(e)
+        return jsonify({"erro": erro.mensagem}), erro.status
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro ao criar pedido: {e}")
+        return jsonify({"erro": "Erro interno do servidor ao criar pedido."}), 500
+
+@bp.route('/pedidos/status', methods=['PUT'])
+@jwt_required()
+def update_pedidos_status():
+    """Transição em massa: {"ids": [...], "status": "Aprovado"}."""
+    data = validar('pedido_status', request.get_json(silent=True))
+    try:
+        atualizados, total = transicionar_status(Pedidos, data.get('ids'), data.get('status'), TRANSICOES_PEDIDO)
+        db.session.commit()
+        return jsonify({"atualizados": atualizados, "ignorados": total - atualizados}), 200
+    except ErroNegocio as e:
+        db.session.rollback()
+        return jsonify({"erro": e.mensagem}), e.status
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"erro": str(e)}), 500
+
+# Rotas de Pagamentos
+@bp.route('/pedidos/<int:id>/pagamentos', methods=['GET'])
+@jwt_required()
+def get_pagamentos(id):
+    try:
+        pagamentos = Pagamentos.query.filter_by(pedido_id=id).order_by(Pagamentos.data_pagamento).all()
+        return jsonify([p.serialize() for p in pagamentos]), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/pedidos/<int:id>/pagamentos', methods=['POST'])
+@jwt_required()
+def add_pagamento(id):
+    data = validar('pagamento', request.get_json(silent=True))
+    try:
+        pagamento = registrar_pagamento(id, data.get('valor'), data.get('metodo_pagamento'))
+        db.session.commit()
+        saldo = db.session.query(Pedidos.saldo).filter_by(id=id).scalar()
+        return jsonify({**pagamento.serialize(), 'saldo_pedido': float(saldo)}), 201
+    except ErroNegocio as e:
+        db.session.rollback()
+        return jsonify({"erro": e.mensagem}), e.status
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro ao registrar pagamento: {e}")
+        return jsonify({"erro": "Erro interno do servidor ao registrar pagamento."}), 500
+
+@bp.route('/pagamentos/<int:id>', methods=['DELETE'])
+@jwt_required()
+def delete_pagamento(id):
+    try:
+        pagamento = db.session.get(Pagamentos, id)
+        if not pagamento:
+            return jsonify({"erro": "Pagamento não encontrado."}), 404
+        estornar_pagamento(pagamento)
+        db.session.commit()
+        return jsonify({"mensagem": "Pagamento estornado com sucesso."}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"erro": str(e)}), 500
+
+# Rotas de Entregas
+@bp.route('/entregas', methods=['GET'])
+@jwt_required()
+def get_entregas():
+    try:
+        query = Entregas.query
+        status = request.args.get('status')
+        if status:
+            query = query.filter(Entregas.status == status)
+        data_entrega = request.args.get('data')
+        if data_entrega:
+            query = query.filter(Entregas.data_entrega == data_entrega)
+        entregas = query.order_by(Entregas.data_entrega).all()
+        return jsonify([e.serialize() for e in entregas]), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/entregas/programacao', methods=['GET'])
+@jwt_required()
+def get_programacao_entregas():
+    """Cargas e ordem de visita das entregas do dia (?data=AAAA-MM-DD, padrão hoje)."""
+    try:
+        data_entrega = date.fromisoformat(request.args['data']) if request.args.get('data') else date.today()
+    except ValueError:
+        return jsonify({"erro": "Data inválida. Use AAAA-MM-DD."}), 400
+    try:
+        return jsonify(programar_entregas(data_entrega)), 200
+    except Exception as e:
+        print(f"Erro ao programar entregas: {e}")
+        return jsonify({"erro": "Erro interno do servidor ao programar entregas."}), 500
+
+@bp.route('/pedidos/<int:id>/entregas', methods=['POST'])
+@jwt_required()
+def add_entrega(id):
+    data = validar('entrega', request.get_json(silent=True))
+    try:
+        pedido = db.session.get(Pedidos, id)
+        if not pedido:
+            return jsonify({"erro": "Pedido não encontrado."}), 404
+        entrega = criar_entrega(pedido, data.get('data_entrega'), data.get('endereco_entrega'),
+                                data.get('latitude'), data.get('longitude'))
+        db.session.commit()
+        return jsonify(entrega.serialize()), 201
+    except ErroNegocio as e:
+        db.session.rollback()
+        return jsonify({"erro": e.mensagem}), e.status
+    except Exception as e:
+        db.session.rollback()
+        print(f"Erro ao agendar entrega: {e}")
+        return jsonify({"erro": "Erro interno do servidor ao agendar entrega."}), 500
+
+@bp.route('/entregas/status', methods=['PUT'])
+@jwt_required()
+def update_entregas_status():
+    """Transição em massa: {"ids": [...], "status": "Em Rota"}."""
+    data = validar('entrega_status', request.get_json(silent=True))
+    try:
+        atualizados, total = transicionar_status(Entregas, data.get('ids'), data.get('status'), TRANSICOES_ENTREGA)
+        db.session.commit()
+        return jsonify({"atualizados": atualizados, "ignorados": total - atualizados}), 200
+    except ErroNegocio as e:
+        db.session.rollback()
+        return jsonify({"erro": e.mensagem}), e.status
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"erro": str(e)}), 500
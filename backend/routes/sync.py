@@ -0,0 +1,125 @@
+# -- coding: utf-8 --
+import gzip
+import json
+
+from flask import Blueprint, Response, current_app, jsonify, request
+from flask_jwt_extended import jwt_required
+from sqlalchemy.orm import joinedload, selectinload
+
+from admissao import pesada
+from alteracoes import historico_expirado, versao_visivel
+from extensions import db
+from models import Alteracoes, Clientes, Estoque, Marmores, Orcamentos
+
+bp = Blueprint('sync', __name__)
+
+# Entidade -> (modelo, opções de carga, serialização)
+ENTIDADES_SYNC = {
+    'clientes': (Clientes, (), Clientes.to_dict),
+    'marmores': (Marmores, (), Marmores.serialize),
+    'estoque': (Estoque, (), Estoque.serialize),
+    'orcamentos': (Orcamentos, (joinedload(Orcamentos.cliente), selectinload(Orcamentos.itens)),
+                   Orcamentos.serialize),
+}
+
+
+def _carregar(entidade, ids=None):
+    """Estado atual das linhas (todas, ou só 'ids'), indexado pelo id."""
+    model, opcoes, serializar = ENTIDADES_SYNC[entidade]
+    query = model.query.options(*opcoes)
+    if ids is not None:
+        query = query.filter(model.id.in_(ids))
+    if model is Estoque:
+        # Itens arquivados somem do catálogo, como em GET /estoque
+        query = query.filter(Estoque.arquivado_em.is_(None))
+    return {obj.id: serializar(obj) for obj in query}
+
+
+def _resposta(dados):
+    """JSON sem espaços, comprimido com gzip quando o cliente aceita."""
+    corpo = json.dumps(dados, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    resposta = Response(corpo, mimetype='application/json')
+    if len(corpo) > 1024 and 'gzip' in request.headers.get('Accept-Encoding', ''):
+        resposta.set_data(gzip.compress(corpo, compresslevel=6))
+        resposta.headers['Content-Encoding'] = 'gzip'
+    resposta.headers['Vary'] = 'Accept-Encoding'
+    return resposta
+
+
+# Rota de sincronização
+@bp.route('/sync', methods=['GET'])
+@pesada
+@jwt_required()
+def sync():
+    """
+    Sincronização incremental de clientes, mármores, estoque e orçamentos.
+
+    Sem ?desde= devolve todas as linhas e a versão atual. Com ?desde=<versao>
+    devolve, por entidade, as linhas alteradas (no estado atual, cada uma com
+    a 'versao' da sua última alteração) e os ids excluídos. Enquanto 'mais'
+    for true, chame de novo com desde=<versao> da resposta.
+    """
+    try:
+        desde = request.args.get('desde', type=int)
+        entidades = [e for e in request.args.get('entidades', '').split(',') if e] or list(ENTIDADES_SYNC)
+        desconhecidas = [e for e in entidades if e not in ENTIDADES_SYNC]
+        if desconhecidas:
+            return jsonify({"erro": f"Entidades desconhecidas: {', '.join(desconhecidas)}."}), 400
+
+        if desde is None:
+            # A versão é lida antes das tabelas: o que mudar durante a leitura
+            # volta no próximo delta (reaplicar uma linha não tem efeito).
+            versao = versao_visivel()
+            return _resposta({
+                'versao': versao,
+                'completo': True,
+                'mais': False,
+                'entidades': {e: {'alterados': list(_carregar(e).values()), 'excluidos': []} for e in entidades},
+            })
+
+        # Ao contrário do feed, desde=0 aqui é uma versão de verdade (a de um
+        # snapshot com a outbox vazia): se a limpeza já apagou alterações
+        # posteriores a ela, o cliente perdeu exclusões e precisa recomeçar.
+        if historico_expirado(desde):
+            return jsonify({"erro": "Versão muito antiga. Sincronize novamente sem 'desde'.", "recarregar": True}), 410
+
+        limite = current_app.config['SYNC_LIMITE']
+        ate = versao_visivel()
+        # Só as colunas de controle: o conteúdo vem das próprias tabelas
+        alteracoes = (
+            db.session.query(Alteracoes.id, Alteracoes.entidade, Alteracoes.entidade_id, Alteracoes.operacao)
+            .filter(Alteracoes.id > desde, Alteracoes.id <= ate, Alteracoes.entidade.in_(entidades))
+            .order_by(Alteracoes.id)
+            .limit(limite + 1)
+            .all()
+        )
+        mais = len(alteracoes) > limite
+        alteracoes = alteracoes[:limite]
+
+        # Uma linha alterada várias vezes na página é enviada uma vez só
+        ultimas = {entidade: {} for entidade in entidades}
+        for alteracao in alteracoes:
+            ultimas[alteracao.entidade][alteracao.entidade_id] = alteracao
+
+        resultado = {}
+        for entidade, linhas in ultimas.items():
+            if not linhas:
+                continue
+            ids = [i for i, a in linhas.items() if a.operacao != 'excluido']
+            atuais = _carregar(entidade, ids) if ids else {}
+            alterados = []
+            for i in ids:
+                if i in atuais:
+                    atuais[i]['versao'] = linhas[i].id
+                    alterados.append(atuais[i])
+            # Excluídas, arquivadas ou apagadas depois desta página
+            resultado[entidade] = {'alterados': alterados, 'excluidos': [i for i in linhas if i not in atuais]}
+
+        if alteracoes:
+            versao = alteracoes[-1].id
+        else:
+            versao = max(desde, ate)
+        return _resposta({'versao': versao, 'completo': False, 'mais': mais, 'entidades': resultado})
+    except Exception as e:
+        print(f"Erro na sincronização: {e}")
+        return jsonify({"erro": "Erro interno do servidor ao sincronizar."}), 500
@@ -0,0 +1,35 @@
+# -- coding: utf-8 --
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
+
+from extensions import db
+from models import Tarefas
+
+bp = Blueprint('tarefas', __name__)
+
+
+# Rotas de Tarefas em segundo plano
+@bp.route('/tarefas', methods=['GET'])
+@jwt_required()
+def get_tarefas():
+    try:
+        query = Tarefas.query
+        status = request.args.get('status')
+        if status:
+            query = query.filter_by(status=status)
+        limite = max(1, min(request.args.get('limite', 50, type=int), 200))
+        tarefas = query.order_by(Tarefas.id.desc()).limit(limite).all()
+        return jsonify([t.serialize() for t in tarefas]), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@bp.route('/tarefas/<int:id>', methods=['GET'])
+@jwt_required()
+def get_tarefa(id):
+    try:
+        tarefa = db.session.get(Tarefas, id)
+        if not tarefa:
+            return jsonify({"erro": "Tarefa não encontrada."}), 404
+        return jsonify(tarefa.serialize()), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
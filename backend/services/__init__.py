@@ -0,0 +1,13 @@
+# -- coding: utf-8 --
+
+
+class ErroNegocio(Exception):
+    """
+    Erro de regra de negócio, com a mensagem e o status HTTP que a rota deve
+    devolver ao cliente. Tarefas em segundo plano não repetem esses erros.
+    """
+
+    def __init__(self, mensagem, status=400):
+        super().__init__(mensagem)
+        self.mensagem = mensagem
+        self.status = status
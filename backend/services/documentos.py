@@ -0,0 +1,245 @@
+# -- coding: utf-8 --
+"""
+Documento do orçamento para impressão (HTML, ou PDF com o weasyprint).
+
+O template (templates/orcamento.html) é compilado uma vez, na importação
+do módulo em create_app(). Cada documento gerado fica gravado em
+DOCUMENTOS_PASTA com um nome que identifica a versão do orçamento: id,
+data_atualizacao (que muda a cada edição ou troca de status) e um hash do
+template, dos dados do cliente e de status, total e observações (a
+data_atualizacao tem resolução de segundos: duas alterações no mesmo
+segundo mudam ao menos o hash). Reimpressões saem direto do arquivo,
+com uma consulta só ao banco; quando o orçamento muda, o nome muda, e os
+arquivos das versões anteriores são apagados ao gravar o novo.
+
+'flask --app app documentos renderizar --data AAAA-MM-DD' gera de uma vez
+os documentos dos orçamentos aprovados no dia. Os dados são lidos do banco
+no processo principal e os documentos são gerados em paralelo por um pool
+de processos (a geração do PDF é CPU pura).
+
+O PDF depende do pacote weasyprint (e das bibliotecas do sistema que ele
+usa), que não faz parte do requirements.txt: sem ele só o HTML é gerado.
+"""
+import contextlib
+import glob
+import os
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import click
+from flask import current_app
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from sqlalchemy.orm import joinedload, selectinload
+
+from extensions import db
+from models import Clientes, ItensOrcamento, Orcamentos
+from services import ErroNegocio
+
+PASTA_TEMPLATES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
+
+FORMATOS = {'html': 'text/html; charset=utf-8', 'pdf': 'application/pdf'}
+
+
+def _moeda(valor):
+    texto = f'{valor:,.2f}'.replace(',', '_').replace('.', ',').replace('_', '.')
+    return f'R$ {texto}'
+
+
+def _quantidade(valor):
+    return f'{valor:g}'.replace('.', ',')
+
+
+def _data(valor):
+    return valor.strftime('%d/%m/%Y') if valor else ''
+
+
+def _cpf(valor):
+    return f'{valor[:3]}.{valor[3:6]}.{valor[6:9]}-{valor[9:]}' if len(valor or '') == 11 else valor
+
+
+_ambiente = Environment(loader=FileSystemLoader(PASTA_TEMPLATES), autoescape=select_autoescape(['html']),
+                        auto_reload=False)
+_ambiente.filters.update(moeda=_moeda, quantidade=_quantidade, data=_data, cpf=_cpf)
+_template = _ambiente.get_template('orcamento.html')
+with open(os.path.join(PASTA_TEMPLATES, 'orcamento.html'), 'rb') as arquivo:
+    _VERSAO_TEMPLATE = zlib.crc32(arquivo.read())
+
+
+def contexto(orcamento, empresa, validade_dias):
+    """Dados do template em tipos simples (vão para outro processo no modo em lote)."""
+    cliente = orcamento.cliente
+    return {
+        'empresa': empresa,
+        'validade_dias': validade_dias,
+        'orcamento': {
+            'id': orcamento.id,
+            'data_criacao': orcamento.data_criacao,
+            'data_atualizacao': orcamento.data_atualizacao,
+            'status': orcamento.status,
+            'total_orcamento': float(orcamento.total_orcamento),
+            'observacoes': orcamento.observacoes,
+        },
+        'cliente': {'nome': cliente.nome, 'cpf': cliente.cpf, 'telefone': cliente.telefone},
+        'itens': [{
+            'nome_item': item.nome_item,
+            'quantidade': item.quantidade,
+            'unidade_medida': item.unidade_medida,
+            'preco_unitario': item.preco_unitario_no_orcamento,
+            'subtotal': item.subtotal,
+            'log_calculo': item.log_calculo,
+        } for item in orcamento.itens],
+    }
+
+
+# Colunas que identificam a versão do documento, além do id
+_COLUNAS_VERSAO = (Orcamentos.data_atualizacao, Orcamentos.status, Orcamentos.total_orcamento,
+                   Orcamentos.observacoes, Clientes.nome, Clientes.cpf, Clientes.telefone)
+
+
+def nome_arquivo(orcamento_id, versao, formato):
+    """
+    Nome do documento de uma versão do orçamento ('versao': valores de
+    _COLUNAS_VERSAO); muda com o orçamento, o cliente ou o template.
+    """
+    data_atualizacao, *demais = versao
+    hash_versao = zlib.crc32('|'.join(map(str, demais)).encode('utf-8'), _VERSAO_TEMPLATE)
+    return f'orcamento-{orcamento_id}-{data_atualizacao:%Y%m%d%H%M%S%f}-{hash_versao:08x}.{formato}'
+
+
+def _versao(orcamento):
+    cliente = orcamento.cliente
+    return (orcamento.data_atualizacao, orcamento.status, orcamento.total_orcamento, orcamento.observacoes,
+            cliente.nome, cliente.cpf, cliente.telefone)
+
+
+def renderizar(dados, formato):
+    """Bytes do documento no formato pedido."""
+    html = _template.render(**dados)
+    if formato == 'html':
+        return html.encode('utf-8')
+    try:
+        from weasyprint import HTML
+    except ImportError:
+        raise ErroNegocio("Geração de PDF indisponível no servidor (pacote weasyprint não instalado).", 501)
+    return HTML(string=html).write_pdf()
+
+
+def gravar(pasta, nome, dados, formato):
+    """
+    Renderiza e grava o documento em pasta/nome (arquivo temporário e
+    os.replace: quem lê nunca vê um arquivo pela metade) e apaga os
+    documentos das versões anteriores do mesmo orçamento. Roda também nos
+    processos do modo em lote.
+    """
+    conteudo = renderizar(dados, formato)
+    os.makedirs(pasta, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=pasta, prefix='.tmp-')
+    with os.fdopen(descritor, 'wb') as arquivo:
+        arquivo.write(conteudo)
+    os.replace(temporario, os.path.join(pasta, nome))
+
+    entidade, orcamento_id, _ = nome.split('-', 2)
+    versao_atual = nome.rsplit('.', 1)[0]
+    for antigo in glob.glob(os.path.join(pasta, f'{entidade}-{orcamento_id}-*')):
+        if os.path.basename(antigo).rsplit('.', 1)[0] != versao_atual:
+            # Outro processo pode ter apagado antes
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(antigo)
+    return nome
+
+
+def _carregar(query):
+    return query.options(joinedload(Orcamentos.cliente),
+                         selectinload(Orcamentos.itens).undefer(ItensOrcamento.log_calculo))
+
+
+def documento_orcamento(orcamento_id, formato):
+    """
+    (caminho, gerado_agora) do documento do orçamento. Com o documento da
+    versão atual já gravado, só uma consulta (orçamento + cliente) é feita.
+    """
+    if formato not in FORMATOS:
+        raise ErroNegocio("Formato inválido. Use html ou pdf.", 400)
+    versao = (db.session.query(*_COLUNAS_VERSAO)
+              .join(Clientes, Orcamentos.cliente_id == Clientes.id)
+              .filter(Orcamentos.id == orcamento_id).first())
+    if versao is None:
+        raise ErroNegocio("Orçamento não encontrado.", 404)
+
+    pasta = current_app.config['DOCUMENTOS_PASTA']
+    nome = nome_arquivo(orcamento_id, tuple(versao), formato)
+    caminho = os.path.join(pasta, nome)
+    if os.path.exists(caminho):
+        return caminho, False
+
+    orcamento = _carregar(Orcamentos.query).filter_by(id=orcamento_id).one()
+    gravar(pasta, nome, contexto(orcamento, current_app.config['DOCUMENTOS_EMPRESA'],
+                                 current_app.config['RESERVAS_VALIDADE_DIAS']), formato)
+    return caminho, True
+
+
+def descartar(orcamento_id):
+    """Apaga os documentos gravados de um orçamento (ex.: ao excluí-lo)."""
+    for arquivo in glob.glob(os.path.join(current_app.config['DOCUMENTOS_PASTA'], f'orcamento-{orcamento_id}-*')):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(arquivo)
+
+
+def _gravar_tarefa(argumentos):
+    return gravar(*argumentos)
+
+
+def renderizar_aprovados(dia, formato, processos=None):
+    """
+    Gera os documentos dos orçamentos aprovados em 'dia' (pela
+    data_atualizacao) que ainda não estão gravados. Retorna
+    (gerados, já gravados).
+    """
+    inicio = datetime.combine(dia, datetime.min.time())
+    orcamentos = (_carregar(Orcamentos.query)
+                  .filter(Orcamentos.status == 'Aprovado',
+                          Orcamentos.data_atualizacao >= inicio,
+                          Orcamentos.data_atualizacao < inicio + timedelta(days=1))
+                  .order_by(Orcamentos.id).all())
+
+    pasta = current_app.config['DOCUMENTOS_PASTA']
+    empresa = current_app.config['DOCUMENTOS_EMPRESA']
+    validade = current_app.config['RESERVAS_VALIDADE_DIAS']
+    pendentes = []
+    for orcamento in orcamentos:
+        nome = nome_arquivo(orcamento.id, _versao(orcamento), formato)
+        if not os.path.exists(os.path.join(pasta, nome)):
+            pendentes.append((pasta, nome, contexto(orcamento, empresa, validade), formato))
+
+    if pendentes:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            # Lotes de vários documentos por envio: menos idas e voltas entre processos
+            lote = max(1, len(pendentes) // ((processos or os.cpu_count() or 1) * 4))
+            for _ in executor.map(_gravar_tarefa, pendentes, chunksize=lote):
+                pass
+    return len(pendentes), len(orcamentos) - len(pendentes)
+
+
+@click.group('documentos')
+def comandos():
+    """Documentos dos orçamentos para impressão."""
+
+
+@comandos.command('renderizar')
+@click.option('--data', 'dia', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Dia da aprovação (padrão: hoje).')
+@click.option('--formato', type=click.Choice(sorted(FORMATOS)), default='pdf')
+@click.option('--processos', type=int, default=None, help='Processos em paralelo (padrão: um por CPU).')
+def renderizar_comando(dia, formato, processos):
+    """Gera os documentos dos orçamentos aprovados no dia que ainda não estão gravados."""
+    dia = dia.date() if dia else date.today()
+    if formato == 'pdf':
+        # Falha aqui, e não em cada processo do pool
+        try:
+            import weasyprint  # noqa: F401
+        except ImportError:
+            raise click.ClickException("O formato pdf precisa do pacote weasyprint (pip install weasyprint).")
+    gerados, existentes = renderizar_aprovados(dia, formato, processos)
+    click.echo(f'{gerados} documento(s) gerado(s) e {existentes} já gravado(s) para {dia:%d/%m/%Y}.')
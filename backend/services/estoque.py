@@ -0,0 +1,204 @@
+# -- coding: utf-8 --
+from datetime import date, datetime
+
+import click
+from flask import current_app
+from sqlalchemy import case, insert, select
+
+from alteracoes import registrar_exclusoes, registrar_gravacoes
+from extensions import db
+from models import (
+    ArquivoMovimentacoes, ConsumoMensal, Estoque, ItensOrcamento, Movimentacoes_Estoque, Orcamentos, Reposicao,
+    Reservas, SaldosAbertura,
+)
+from services.reposicao import atualizar_reposicao
+from services.reservas import expirar_reservas
+from tarefas import tarefa
+
+
+def arquivar_item_estoque(item):
+    """
+    Exclusão lógica: o item some das listagens e não aceita novas
+    movimentações nem orçamentos, mas todo o histórico é mantido.
+    """
+    item.arquivado_em = db.func.current_timestamp()
+    db.session.commit()
+
+
+def contar_dependencias(item_id):
+    """Quantas linhas de outras tabelas apontam para o item de estoque."""
+    return (ItensOrcamento.query.filter_by(item_estoque_id=item_id).count()
+            + Movimentacoes_Estoque.query.filter_by(item_id=item_id).count()
+            + ArquivoMovimentacoes.query.filter_by(item_id=item_id).count())
+
+
+def _excluir_em_lotes(model, coluna, valor, tamanho_lote, ao_excluir=None, antes_de_excluir=None):
+    """
+    Apaga as linhas de 'model' com coluna == valor em lotes de 'tamanho_lote',
+    um commit por lote, para que nenhum lock fique aberto por muito tempo.
+    antes_de_excluir(ids) roda na transação de cada lote, antes do DELETE.
+    Retorna o total de linhas apagadas.
+    """
+    total = 0
+    while True:
+        ids = [id_ for (id_,) in db.session.query(model.id).filter(coluna == valor).limit(tamanho_lote)]
+        if not ids:
+            return total
+        if antes_de_excluir:
+            antes_de_excluir(ids)
+        apagadas = db.session.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+        registrar_exclusoes(db.session, model, ids)
+        db.session.commit()
+        total += apagadas
+        if ao_excluir:
+            ao_excluir(apagadas)
+
+
+def _registrar_orcamentos_dos_itens(ids):
+    """
+    Registra na outbox os orçamentos que perdem as linhas 'ids' de
+    ItensOrcamento: o DELETE em massa não passa pelo flush, e o feed e o
+    /sync continuariam mostrando os orçamentos com os itens apagados.
+    """
+    orcamento_ids = [o for (o,) in db.session.query(ItensOrcamento.orcamento_id)
+                     .filter(ItensOrcamento.id.in_(ids)).distinct()]
+    if orcamento_ids:
+        registrar_gravacoes(db.session, Orcamentos.query.filter(Orcamentos.id.in_(orcamento_ids)).all(), 'atualizado')
+
+
+def excluir_item_estoque(item, tamanho_lote, progresso=None):
+    """
+    Exclui definitivamente um item de estoque e as linhas que dependem dele.
+
+    O item é arquivado antes (e o commit libera o lock da linha), então
+    enquanto os lotes de itens de orçamento e movimentações são apagados
+    ninguém consegue usá-lo. Se o processo for interrompido, o item fica
+    apenas arquivado e a exclusão pode ser repetida.
+    """
+    item_id = item.id
+    if item.arquivado_em is None:
+        arquivar_item_estoque(item)
+
+    ao_excluir = None
+    if progresso:
+        total = max(contar_dependencias(item_id), 1)
+        apagadas = [0]
+
+        def ao_excluir(quantidade):
+            apagadas[0] += quantidade
+            progresso(apagadas[0] * 100 // total, f'{apagadas[0]} de {total} registros excluídos')
+
+    itens_orcamento = _excluir_em_lotes(ItensOrcamento, ItensOrcamento.item_estoque_id, item_id, tamanho_lote, ao_excluir,
+                                        antes_de_excluir=_registrar_orcamentos_dos_itens)
+    movimentacoes = _excluir_em_lotes(Movimentacoes_Estoque, Movimentacoes_Estoque.item_id, item_id, tamanho_lote, ao_excluir)
+    movimentacoes += _excluir_em_lotes(ArquivoMovimentacoes, ArquivoMovimentacoes.item_id, item_id, tamanho_lote, ao_excluir)
+
+    Reservas.query.filter_by(item_id=item_id).delete(synchronize_session=False)
+    SaldosAbertura.query.filter_by(item_id=item_id).delete(synchronize_session=False)
+    ConsumoMensal.query.filter_by(item_id=item_id).delete(synchronize_session=False)
+    Reposicao.query.filter_by(item_id=item_id).delete(synchronize_session=False)
+    Estoque.query.filter_by(id=item_id).delete(synchronize_session=False)
+    registrar_exclusoes(db.session, Estoque, [item_id])
+    db.session.commit()
+    return {'itens_orcamento': itens_orcamento, 'movimentacoes': movimentacoes}
+
+
+@tarefa('excluir_item_estoque', concorrencia=1)
+def tarefa_excluir_item_estoque(parametros, progresso):
+    item = db.session.get(Estoque, parametros['item_id'])
+    if not item:
+        return {'itens_orcamento': 0, 'movimentacoes': 0}
+    return excluir_item_estoque(item, current_app.config['ESTOQUE_TAMANHO_LOTE_EXCLUSAO'], progresso)
+
+
+def corte_arquivamento(meses, hoje=None):
+    """Primeiro dia do mês de 'meses' meses atrás: o que for anterior é arquivado."""
+    hoje = hoje or date.today()
+    mes = hoje.year * 12 + hoje.month - 1 - meses
+    return datetime(mes // 12, mes % 12 + 1, 1)
+
+
+def arquivar_movimentacoes(corte, tamanho_lote, progresso=None):
+    """
+    Move as movimentações anteriores a 'corte' para arquivo_movimentacoes,
+    em lotes de 'tamanho_lote', somando o efeito de cada lote ao saldo de
+    abertura do item. Cada lote é copiado, somado e apagado na mesma
+    transação, então uma interrupção não perde nem duplica movimentações.
+    Retorna o total arquivado.
+    """
+    antigas = Movimentacoes_Estoque.data_movimentacao < corte
+    total = db.session.query(db.func.count(Movimentacoes_Estoque.id)).filter(antigas).scalar() if progresso else None
+    colunas = ['id', 'filial_id', 'item_id', 'tipo_movimentacao', 'quantidade', 'data_movimentacao', 'observacoes']
+    efeito = case((Movimentacoes_Estoque.tipo_movimentacao == 'Entrada', Movimentacoes_Estoque.quantidade),
+                  else_=-Movimentacoes_Estoque.quantidade)
+
+    arquivadas = 0
+    while True:
+        ids = [id_ for (id_,) in db.session.query(Movimentacoes_Estoque.id).filter(antigas)
+               .order_by(Movimentacoes_Estoque.id).limit(tamanho_lote)]
+        if not ids:
+            return arquivadas
+
+        db.session.execute(insert(ArquivoMovimentacoes).from_select(
+            colunas,
+            select(*[getattr(Movimentacoes_Estoque, c) for c in colunas]).where(Movimentacoes_Estoque.id.in_(ids)),
+        ))
+
+        por_item = (db.session.query(Movimentacoes_Estoque.item_id, db.func.sum(efeito), db.func.count())
+                    .filter(Movimentacoes_Estoque.id.in_(ids))
+                    .group_by(Movimentacoes_Estoque.item_id)
+                    .all())
+        saldos = {s.item_id: s for s in SaldosAbertura.query.filter(
+            SaldosAbertura.item_id.in_([item_id for item_id, _, _ in por_item]))}
+        for item_id, soma, quantidade in por_item:
+            saldo = saldos.get(item_id)
+            if saldo is None:
+                db.session.add(SaldosAbertura(item_id=item_id, saldo=soma, movimentacoes=quantidade, data_corte=corte))
+            else:
+                saldo.saldo += soma
+                saldo.movimentacoes += quantidade
+                saldo.data_corte = max(saldo.data_corte, corte)
+
+        db.session.query(Movimentacoes_Estoque).filter(Movimentacoes_Estoque.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        arquivadas += len(ids)
+        if progresso:
+            progresso(arquivadas * 100 // max(total, 1), f'{arquivadas} de {total} movimentações arquivadas')
+
+
+@tarefa('arquivar_movimentacoes', concorrencia=1)
+def tarefa_arquivar_movimentacoes(parametros, progresso):
+    corte = datetime.fromisoformat(parametros['corte'])
+    arquivadas = arquivar_movimentacoes(corte, current_app.config['ESTOQUE_TAMANHO_LOTE_EXCLUSAO'], progresso)
+    return {'corte': parametros['corte'], 'arquivadas': arquivadas}
+
+
+@click.group('estoque')
+def comandos():
+    """Manutenção do estoque."""
+
+
+@comandos.command('arquivar-movimentacoes')
+@click.option('--meses', type=int, default=None,
+              help='Meses mantidos na tabela principal (padrão: MOVIMENTACOES_MESES_ATIVOS).')
+def arquivar_movimentacoes_comando(meses):
+    """Move as movimentações antigas para o arquivo e atualiza os saldos de abertura."""
+    meses = meses if meses is not None else current_app.config['MOVIMENTACOES_MESES_ATIVOS']
+    corte = corte_arquivamento(meses)
+    arquivadas = arquivar_movimentacoes(corte, current_app.config['ESTOQUE_TAMANHO_LOTE_EXCLUSAO'])
+    click.echo(f'{arquivadas} movimentação(ões) anterior(es) a {corte:%d/%m/%Y} arquivada(s).')
+
+
+@comandos.command('expirar-reservas')
+def expirar_reservas_comando():
+    """Remove as reservas vencidas dos orçamentos e devolve as quantidades ao disponível."""
+    removidas = expirar_reservas(current_app.config['ESTOQUE_TAMANHO_LOTE_EXCLUSAO'])
+    click.echo(f'{removidas} reserva(s) vencida(s) removida(s).')
+
+
+@comandos.command('atualizar-reposicao')
+def atualizar_reposicao_comando():
+    """Soma as movimentações novas ao consumo mensal e recalcula os pontos de reposição."""
+    resultado = atualizar_reposicao()
+    click.echo(f"Consumo atualizado até a movimentação {resultado['movimentacoes_ate']}; "
+               f"{resultado['itens']} previsão(ões) recalculada(s).")
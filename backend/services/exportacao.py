@@ -0,0 +1,250 @@
+# -- coding: utf-8 --
+"""
+Exportação analítica incremental para arquivos colunares (Parquet ou Arrow IPC).
+
+Para que o BI não precise copiar as tabelas do banco de produção, cada
+execução de 'flask --app app exportacao executar' grava só o que mudou
+desde a anterior, em EXPORTACAO_PASTA/<tabela>/exportado_em=AAAA-MM-DD/
+(partições no formato chave=valor, que pyarrow.dataset, DuckDB e Spark
+leem direto):
+
+  - clientes e orcamentos: linhas com data_atualizacao na janela
+    (marca, limite]; clientes sem cpf e telefone (dados pessoais);
+  - itens_orcamento: todos os itens dos orçamentos da janela, com a
+    orcamento_atualizado_em (uma edição troca a lista inteira de itens:
+    o BI substitui os itens do orçamento pelos do arquivo mais novo);
+  - movimentacoes_estoque: movimentações com id acima da marca, da tabela
+    principal e do arquivo (que mantém os ids originais), pela mesma regra
+    de faixa contínua de ids do ponto de reposição.
+
+Todas as filiais vão para os mesmos arquivos, com a coluna filial_id
+(itens_orcamento, pela do orçamento).
+
+'limite' é o relógio do banco menos EXPORTACAO_MARGEM_SEGUNDOS: linhas
+mais novas podem pertencer a transações ainda sem commit e ficam para a
+próxima execução. As marcas ficam em marcas_processamento
+('exportacao:<tabela>') e só avançam depois que o arquivo da tabela foi
+renomeado para o lugar; o arquivo leva no nome o início da janela, então
+uma execução interrompida e repetida sobrescreve o mesmo arquivo. Uma
+linha alterada aparece de novo em arquivos seguintes: o BI fica com a de
+data_atualizacao mais recente por id. Exclusões não são exportadas.
+
+As linhas são lidas em lotes de EXPORTACAO_TAMANHO_LOTE com o cursor do
+banco no modo streaming e cada lote é gravado no arquivo antes do
+próximo, então a memória não cresce com o tamanho da tabela. Com
+EXPORTACAO_DATABASE_URL as leituras vão para uma réplica (a margem
+precisa cobrir o atraso dela); as marcas são gravadas no banco principal.
+
+Depende do pacote pyarrow, que não faz parte do requirements.txt (só quem
+roda a exportação precisa dele).
+"""
+import os
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from sqlalchemy import create_engine, or_, select
+from sqlalchemy import types as tipos
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import (
+    ArquivoMovimentacoes, Clientes, ItensOrcamento, MarcasProcessamento, Movimentacoes_Estoque, Orcamentos,
+)
+from services.reposicao import fim_das_movimentacoes
+
+TABELAS = ('clientes', 'orcamentos', 'itens_orcamento', 'movimentacoes_estoque')
+FORMATOS = {'parquet': 'parquet', 'arrow': 'arrow'}
+COLUNAS_MOVIMENTACOES = ('id', 'filial_id', 'item_id', 'tipo_movimentacao', 'quantidade', 'data_movimentacao',
+                         'observacoes')
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise click.ClickException("A exportação precisa do pacote pyarrow (pip install pyarrow).")
+    return pyarrow
+
+
+def _tipo_arrow(pa, tipo):
+    """Tipo do Arrow para o tipo da coluna no SQLAlchemy."""
+    if isinstance(tipo, tipos.Numeric) and not isinstance(tipo, tipos.Float):
+        return pa.decimal128(tipo.precision or 18, tipo.scale or 0)
+    if isinstance(tipo, tipos.Float):
+        return pa.float64()
+    if isinstance(tipo, tipos.Integer):
+        return pa.int64()
+    if isinstance(tipo, tipos.DateTime):
+        return pa.timestamp('us')
+    if isinstance(tipo, tipos.Date):
+        return pa.date32()
+    if isinstance(tipo, tipos.Boolean):
+        return pa.bool_()
+    return pa.string()
+
+
+def _consultas(tabela, marca, limite, sessao):
+    """
+    Consultas (select) com as linhas da janela de 'tabela' e a nova marca.
+    'marca' é a data (ou o id, em movimentacoes_estoque) da execução
+    anterior, None na primeira.
+    """
+    if tabela == 'movimentacoes_estoque':
+        inicio = marca or 0
+        fim = fim_das_movimentacoes(sessao, inicio, limite)
+        consultas = [select(*[getattr(model, c) for c in COLUNAS_MOVIMENTACOES])
+                     .where(model.id > inicio, model.id <= fim).order_by(model.id)
+                     for model in (Movimentacoes_Estoque, ArquivoMovimentacoes)]
+        return consultas, fim
+
+    model = Clientes if tabela == 'clientes' else Orcamentos
+    janela = model.data_atualizacao <= limite
+    if marca is None:
+        # Primeira execução: inclui linhas antigas sem data de atualização
+        janela = or_(janela, model.data_atualizacao.is_(None))
+    else:
+        janela = (model.data_atualizacao > marca) & janela
+
+    if tabela == 'clientes':
+        consulta = select(Clientes.id, Clientes.filial_id, Clientes.nome, Clientes.data_cadastro,
+                          Clientes.data_atualizacao)
+    elif tabela == 'orcamentos':
+        consulta = select(Orcamentos.id, Orcamentos.filial_id, Orcamentos.cliente_id, Orcamentos.status,
+                          Orcamentos.total_orcamento, Orcamentos.observacoes, Orcamentos.data_criacao, Orcamentos.data_atualizacao)
+    else:
+        consulta = (select(ItensOrcamento.id, ItensOrcamento.orcamento_id, ItensOrcamento.item_estoque_id,
+                           ItensOrcamento.nome_item, ItensOrcamento.quantidade, ItensOrcamento.unidade_medida,
+                           ItensOrcamento.preco_unitario_no_orcamento, ItensOrcamento.subtotal,
+                           Orcamentos.data_atualizacao.label('orcamento_atualizado_em'))
+                    .join(Orcamentos, ItensOrcamento.orcamento_id == Orcamentos.id))
+    return [consulta.where(janela).order_by(model.data_atualizacao)], limite
+
+
+def _nome_arquivo(marca, formato):
+    if marca is None:
+        desde = 'inicio'
+    elif isinstance(marca, datetime):
+        desde = f'{marca:%Y%m%dT%H%M%S}'
+    else:
+        desde = f'id-{marca}'
+    return f'desde-{desde}.{FORMATOS[formato]}'
+
+
+def _gravar(pa, sessao, consultas, caminho, formato, tamanho_lote):
+    """
+    Grava as linhas das consultas em 'caminho', um lote por vez (arquivo
+    temporário e os.replace). Retorna o total de linhas; sem linhas, não
+    cria o arquivo.
+    """
+    colunas = consultas[0].selected_columns
+    esquema = pa.schema([(c.name, _tipo_arrow(pa, c.type)) for c in colunas])
+    temporario = caminho + '.tmp'
+    escritor = None
+    linhas = 0
+    try:
+        for consulta in consultas:
+            resultado = sessao.execute(consulta.execution_options(stream_results=True, yield_per=tamanho_lote))
+            for lote in resultado.partitions():
+                if escritor is None:
+                    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                    if formato == 'parquet':
+                        escritor = pa.parquet.ParquetWriter(temporario, esquema)
+                    else:
+                        escritor = pa.ipc.new_file(temporario, esquema)
+                valores = list(zip(*lote))
+                escritor.write_batch(pa.RecordBatch.from_arrays(
+                    [pa.array(valores[i], type=campo.type) for i, campo in enumerate(esquema)], schema=esquema))
+                linhas += len(lote)
+    except BaseException:
+        if escritor is not None:
+            escritor.close()
+            os.remove(temporario)
+        raise
+    if escritor is not None:
+        escritor.close()
+        os.replace(temporario, caminho)
+    return linhas
+
+
+def _sessao_leitura():
+    url = current_app.config['EXPORTACAO_DATABASE_URL']
+    if not url:
+        return db.session, None
+    engine = create_engine(url, pool_pre_ping=True)
+    return Session(engine), engine
+
+
+def exportar(tabelas=TABELAS, formato=None, pasta=None):
+    """
+    Exporta as linhas novas ou alteradas de cada tabela e avança as marcas
+    (um commit por tabela). Retorna {tabela: {'linhas', 'segundos', 'arquivo'}}
+    ('arquivo' é None quando não havia nada novo).
+    """
+    pa = _pyarrow()
+    config = current_app.config
+    formato = formato or config['EXPORTACAO_FORMATO']
+    pasta = pasta or config['EXPORTACAO_PASTA']
+    if formato not in FORMATOS:
+        raise click.ClickException(f'Formato de exportação desconhecido: {formato}.')
+
+    sessao, engine = _sessao_leitura()
+    resultado = {}
+    try:
+        limite = (sessao.query(db.func.current_timestamp()).scalar()
+                  - timedelta(seconds=config['EXPORTACAO_MARGEM_SEGUNDOS']))
+        particao = f'exportado_em={datetime.now():%Y-%m-%d}'
+        for tabela in tabelas:
+            inicio = time.perf_counter()
+            nome = f'exportacao:{tabela}'
+            registro = db.session.get(MarcasProcessamento, nome)
+            if registro is None:
+                registro = MarcasProcessamento(nome=nome, ultimo_id=0)
+                db.session.add(registro)
+            por_id = tabela == 'movimentacoes_estoque'
+            marca = (registro.ultimo_id or None) if por_id else registro.ultima_data
+
+            consultas, nova_marca = _consultas(tabela, marca, limite, sessao)
+            caminho = os.path.join(pasta, tabela, particao, _nome_arquivo(marca, formato))
+            linhas = _gravar(pa, sessao, consultas, caminho, formato, config['EXPORTACAO_TAMANHO_LOTE'])
+            if sessao is not db.session:
+                sessao.rollback()
+
+            if por_id:
+                registro.ultimo_id = max(nova_marca, registro.ultimo_id or 0)
+            else:
+                registro.ultima_data = nova_marca
+            registro.atualizado_em = datetime.now()
+            db.session.commit()
+            resultado[tabela] = {'linhas': linhas, 'segundos': time.perf_counter() - inicio,
+                                 'arquivo': caminho if linhas else None}
+    finally:
+        if engine is not None:
+            sessao.close()
+            engine.dispose()
+    return resultado
+
+
+@click.group('exportacao')
+def comandos():
+    """Exportação analítica para arquivos colunares."""
+
+
+@comandos.command('executar')
+@click.option('--tabelas', default=','.join(TABELAS), show_default=True,
+              help='Tabelas exportadas, separadas por vírgula.')
+@click.option('--formato', type=click.Choice(sorted(FORMATOS)), default=None,
+              help='Formato dos arquivos (padrão: EXPORTACAO_FORMATO).')
+def executar_comando(tabelas, formato):
+    """Grava as linhas novas ou alteradas desde a última exportação."""
+    escolhidas = [t.strip() for t in tabelas.split(',') if t.strip()]
+    desconhecidas = set(escolhidas) - set(TABELAS)
+    if desconhecidas:
+        raise click.ClickException(f"Tabela(s) desconhecida(s): {', '.join(sorted(desconhecidas))}.")
+    for tabela, dados in exportar(escolhidas, formato).items():
+        por_segundo = dados['linhas'] / dados['segundos'] if dados['segundos'] else 0
+        click.echo(f"{tabela}: {dados['linhas']} linha(s) em {dados['segundos']:.2f} s "
+                   f"({por_segundo:.0f} linhas/s){' -> ' + dados['arquivo'] if dados['arquivo'] else ''}")
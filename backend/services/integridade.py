@@ -0,0 +1,159 @@
+# -- coding: utf-8 --
+"""
+Gravações que deixam o banco conferir a unicidade.
+
+As rotas gravam direto, sem SELECT antes do INSERT (que custa uma ida ao
+banco e ainda deixa uma janela para duas requisições passarem juntas), e
+traduzem a violação com erro_integridade(). A restrição é identificada
+pelo texto do erro do driver, que muda com o banco:
+  - MySQL (1062): "Duplicate entry '...' for key 'clientes.uq_clientes_filial_cpf'",
+    com o nome da restrição (sem o prefixo da tabela antes do 8.0.19);
+  - SQLite: "UNIQUE constraint failed: clientes.filial_id, clientes.cpf", só com as colunas,
+    ligadas ao nome pelas restrições declaradas nos modelos.
+
+upsert() grava lotes com INSERT ... ON DUPLICATE KEY UPDATE (MySQL) ou
+INSERT ... ON CONFLICT DO UPDATE (SQLite). Nos demais bancos, trava as
+linhas já existentes com SELECT ... FOR UPDATE, atualiza essas e insere o
+resto: duas cargas simultâneas com a mesma chave nova ainda podem colidir
+no INSERT, e a segunda recebe o IntegrityError como qualquer gravação.
+"""
+import re
+from functools import lru_cache
+
+from sqlalchemy import UniqueConstraint, and_, bindparam, insert, or_, select, update
+
+from extensions import db
+from services import ErroNegocio
+
+# Nome da restrição -> mensagem para o cliente (status 409)
+MENSAGENS = {
+    'uq_clientes_filial_cpf': "CPF já cadastrado.",
+    'uq_funcionarios_email': "Este email já está cadastrado.",
+    'uq_funcionarios_cpf': "Este CPF já está cadastrado.",
+    'ux_pedidos_orcamento_id': "Este orçamento já tem um pedido.",
+    'uq_revisoes_orcamento_numero': "O orçamento foi alterado por outra pessoa ao mesmo tempo. Tente novamente.",
+}
+
+_MYSQL_DUPLICADO = 1062
+_MYSQL_FK_FILHO = 1452   # referência a um registro que não existe
+_MYSQL_FK_PAI = 1451     # exclusão de um registro ainda referenciado
+_MYSQL_CHAVE = re.compile(r"for key '(?:[^'.]*\.)?([^'.]+)'$")
+_SQLITE_UNICO = re.compile(r'UNIQUE constraint failed: (.+)$')
+
+
+@lru_cache(maxsize=None)
+def _restricoes_por_colunas():
+    """
+    (tabela, colunas) -> nome de cada restrição/índice único dos modelos.
+    Montado na primeira violação, quando todos os modelos já estão no metadata.
+    """
+    mapa = {}
+    for tabela in db.metadata.tables.values():
+        unicas = [r for r in tabela.constraints if isinstance(r, UniqueConstraint)]
+        unicas += [i for i in tabela.indexes if i.unique]
+        for restricao in unicas:
+            if restricao.name:
+                mapa[(tabela.name, tuple(c.name for c in restricao.columns))] = restricao.name
+    return mapa
+
+
+def _erro_driver(erro):
+    """(código, mensagem) do erro original do driver (código None no SQLite)."""
+    original = getattr(erro, 'orig', erro)
+    args = getattr(original, 'args', ())
+    if len(args) >= 2 and isinstance(args[0], int):
+        return args[0], str(args[1])
+    return None, str(original)
+
+
+def restricao_violada(erro, dialeto=None):
+    """Nome da restrição única violada por um IntegrityError, ou None."""
+    dialeto = dialeto or db.session.get_bind().dialect.name
+    codigo, mensagem = _erro_driver(erro)
+    if dialeto == 'mysql':
+        if codigo == _MYSQL_DUPLICADO:
+            encontrado = _MYSQL_CHAVE.search(mensagem)
+            return encontrado.group(1) if encontrado else None
+        return None
+    if dialeto == 'sqlite':
+        encontrado = _SQLITE_UNICO.search(mensagem)
+        if not encontrado:
+            return None
+        colunas = [c.strip().split('.', 1) for c in encontrado.group(1).split(',')]
+        return _restricoes_por_colunas().get((colunas[0][0], tuple(c[1] for c in colunas)))
+    return None
+
+
+def erro_integridade(erro, dialeto=None):
+    """
+    ErroNegocio equivalente a um IntegrityError: 409 com a mensagem de
+    MENSAGENS para duplicidades conhecidas, 400/409 para chave estrangeira
+    e 500 para o resto. Quem chama faz o rollback.
+    """
+    dialeto = dialeto or db.session.get_bind().dialect.name
+    nome = restricao_violada(erro, dialeto)
+    if nome in MENSAGENS:
+        return ErroNegocio(MENSAGENS[nome], 409)
+
+    codigo, mensagem = _erro_driver(erro)
+    if codigo == _MYSQL_FK_FILHO:
+        return ErroNegocio("Registro relacionado não encontrado.", 400)
+    if codigo == _MYSQL_FK_PAI:
+        return ErroNegocio("O registro está em uso e não pode ser excluído.", 409)
+    if dialeto == 'sqlite' and 'FOREIGN KEY constraint failed' in mensagem:
+        # O SQLite não diz qual lado da chave falhou
+        return ErroNegocio("Registro relacionado não encontrado ou em uso.", 409)
+    if nome is not None or (dialeto == 'sqlite' and _SQLITE_UNICO.search(mensagem)):
+        return ErroNegocio("Registro duplicado.", 409)
+    print(f"Erro de integridade não mapeado: {mensagem}")
+    return ErroNegocio("Erro de integridade no banco de dados.", 500)
+
+
+def upsert(model, linhas, atualizar, chave):
+    """
+    Insere 'linhas' (dicts de colunas) em lote; as que colidem na chave
+    única 'chave' (tupla de colunas) têm só as colunas 'atualizar' sobrescritas. Um comando
+    só por lote (executemany). Não passa pela sessão nem pela outbox: quem
+    chama registra as alterações. Não faz commit.
+    """
+    dialeto = db.session.get_bind().dialect.name
+    if dialeto == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        comando = insert(model.__table__)
+        comando = comando.on_duplicate_key_update({c: comando.inserted[c] for c in atualizar})
+    elif dialeto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        comando = insert(model.__table__)
+        comando = comando.on_conflict_do_update(index_elements=list(chave),
+                                                set_={c: comando.excluded[c] for c in atualizar})
+    else:
+        _upsert_generico(model.__table__, linhas, atualizar, chave)
+        return
+    db.session.execute(comando, linhas)
+
+
+def _upsert_generico(tabela, linhas, atualizar, chave):
+    # Repetida no lote, vale a última linha, como no ON CONFLICT
+    por_chave = {tuple(linha[c] for c in chave): linha for linha in linhas}
+    if not por_chave:
+        return
+    colunas = [tabela.c[c] for c in chave]
+    existentes = {tuple(linha) for linha in db.session.execute(
+        select(*colunas)
+        .where(or_(*(and_(*(coluna == valor for coluna, valor in zip(colunas, valores))) for valores in por_chave)))
+        .with_for_update()
+    )}
+
+    # Colunas de 'atualizar' fora das linhas (ex.: data_atualizacao) ficam com o onupdate do modelo
+    informadas = [c for c in atualizar if c in next(iter(por_chave.values()))]
+    atualizadas = [linha for valores, linha in por_chave.items() if valores in existentes]
+    if atualizadas and informadas:
+        db.session.execute(
+            update(tabela)
+            .where(*(tabela.c[c] == bindparam(f'chave_{c}') for c in chave))
+            .values({c: bindparam(f'novo_{c}') for c in informadas}),
+            [{**{f'chave_{c}': linha[c] for c in chave}, **{f'novo_{c}': linha[c] for c in informadas}}
+             for linha in atualizadas])
+    novas = [linha for valores, linha in por_chave.items() if valores not in existentes]
+    if novas:
+        db.session.execute(insert(tabela), novas)
@@ -0,0 +1,102 @@
+# -- coding: utf-8 --
+from flask import current_app
+
+from extensions import db
+from models import Estoque, ItensOrcamento, Movimentacoes_Estoque, Orcamentos, Pedidos
+from services import ErroNegocio
+from services.reservas import baixar, liberar, repor, reservar
+from tarefas import tarefa
+
+
+def adicionar_itens(orcamento, itens):
+    """
+    Cria os itens do orçamento a partir dos dados já validados (validacao.py),
+    na coleção orcamento.itens, e devolve o total. Os itens de estoque são buscados num único SELECT.
+    Orçamentos pendentes reservam as quantidades (services/reservas.py).
+    Não faz commit; levanta ErroNegocio se algum item não existe, está
+    arquivado ou não tem disponível suficiente.
+    """
+    ids = {item['item_estoque_id'] for item in itens}
+    estoque = {e.id: e for e in Estoque.query.filter(Estoque.id.in_(ids))} if ids else {}
+
+    total = 0
+    for item in itens:
+        item_estoque = estoque.get(item['item_estoque_id'])
+        if not item_estoque:
+            raise ErroNegocio(f"Item de estoque com ID {item['item_estoque_id']} não encontrado.", 404)
+        if item_estoque.arquivado_em:
+            raise ErroNegocio(f"Item de estoque com ID {item_estoque.id} está arquivado.", 400)
+
+        orcamento.itens.append(ItensOrcamento(
+            item_estoque_id=item_estoque.id,
+            nome_item=item_estoque.nome,
+            quantidade=item['quantidade'],
+            unidade_medida=item_estoque.unidade_medida,
+            preco_unitario_no_orcamento=item['preco_unitario_praticado'],
+            subtotal=item['subtotal'],
+            log_calculo=item.get('log_calculo'),
+        ))
+        total += item['subtotal']
+
+    if orcamento.status == 'Pendente':
+        reservar(orcamento.id, [(item['item_estoque_id'], item['quantidade']) for item in itens],
+                 current_app.config['RESERVAS_VALIDADE_DIAS'])
+    return total
+
+
+def aprovar_orcamento(orcamento, progresso=None):
+    """
+    Dá baixa no estoque de cada item do orçamento e o marca como aprovado.
+    As reservas do orçamento são liberadas antes: a baixa (reservas.baixar)
+    confere o disponível descontadas só as reservas de outros orçamentos, no
+    próprio UPDATE, então duas aprovações simultâneas não passam do estoque.
+    Não faz commit; em caso de erro levanta ErroNegocio e o chamador faz rollback.
+    """
+    liberar(orcamento.id)
+    itens = orcamento.itens
+    baixar((item.item_estoque_id, item.quantidade) for item in itens)
+
+    for n, item_orcamento in enumerate(itens, 1):
+        db.session.add(Movimentacoes_Estoque(
+            item_id=item_orcamento.item_estoque_id,
+            tipo_movimentacao='Saída',
+            quantidade=item_orcamento.quantidade,
+            observacoes=f"Saída por aprovação do Orçamento #{orcamento.id}"
+        ))
+        if progresso and n % 25 == 0:
+            progresso(n * 100 // len(itens), f'{n} de {len(itens)} itens registrados')
+
+    orcamento.status = 'Aprovado'
+
+
+def estornar_aprovacao(orcamento):
+    """
+    Devolve ao estoque as saídas da aprovação, com uma Entrada por item,
+    quando o orçamento deixa de estar aprovado. Não muda o status nem faz
+    commit; levanta ErroNegocio (409) se o orçamento já virou pedido.
+    """
+    if Pedidos.query.filter_by(orcamento_id=orcamento.id).first():
+        raise ErroNegocio("O orçamento já virou pedido e não pode deixar de estar aprovado.", 409)
+    itens = orcamento.itens
+    repor((item.item_estoque_id, item.quantidade) for item in itens)
+    for item_orcamento in itens:
+        db.session.add(Movimentacoes_Estoque(
+            item_id=item_orcamento.item_estoque_id,
+            tipo_movimentacao='Entrada',
+            quantidade=item_orcamento.quantidade,
+            observacoes=f"Estorno da aprovação do Orçamento #{orcamento.id}"
+        ))
+
+
+@tarefa('aprovar_orcamento', concorrencia=1)
+def tarefa_aprovar_orcamento(parametros, progresso):
+    # Uma aprovação por vez no processo: todas disputam as mesmas linhas de
+    # estoque. Entre processos, a baixa condicional (reservas.baixar) impede
+    # passar do disponível e a chave da tarefa impede aprovar duas vezes.
+    orcamento = db.session.get(Orcamentos, parametros['orcamento_id'])
+    if not orcamento:
+        raise ErroNegocio("Orçamento não encontrado.", 404)
+    if orcamento.status != 'Aprovado':
+        aprovar_orcamento(orcamento, progresso)
+        db.session.commit()
+    return {'orcamento_id': orcamento.id, 'status': orcamento.status}
@@ -0,0 +1,155 @@
+# -- coding: utf-8 --
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from extensions import db
+from models import Entregas, Pagamentos, Pedidos
+from services import ErroNegocio
+
+# Status de destino -> status de origem permitidos
+TRANSICOES_PEDIDO = {
+    'Aprovado': ('Pendente',),
+    'Rejeitado': ('Pendente',),
+    'Concluído': ('Aprovado',),
+}
+TRANSICOES_ENTREGA = {
+    'Em Rota': ('Pendente', 'Atrasado'),
+    'Atrasado': ('Pendente', 'Em Rota'),
+    'Entregue': ('Em Rota', 'Atrasado'),
+}
+
+# Ids aceitos por transição em massa (limite do IN)
+LIMITE_IDS_TRANSICAO = 1000
+
+
+def _valor_monetario(valor):
+    try:
+        valor = Decimal(str(valor)).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        raise ErroNegocio("Valor inválido.", 400)
+    if valor <= 0:
+        raise ErroNegocio("O valor deve ser maior que zero.", 400)
+    return valor
+
+
+def criar_pedido(orcamento):
+    """
+    Converte um orçamento aprovado em pedido, com saldo igual ao total.
+    Não faz commit; um orçamento já convertido é barrado pelo índice único
+    em orcamento_id no INSERT (ver services/integridade.py).
+    """
+    if orcamento.status != 'Aprovado':
+        raise ErroNegocio("Só orçamentos aprovados podem virar pedido.", 400)
+
+    itens = orcamento.itens
+    tipo_marmore = ', '.join(dict.fromkeys(item.nome_item for item in itens)) or f'Orçamento #{orcamento.id}'
+    if len(tipo_marmore) > 100:
+        tipo_marmore = tipo_marmore[:97] + '...'
+    metragem = sum(item.quantidade for item in itens if item.unidade_medida == 'm²')
+    total = Decimal(str(orcamento.total_orcamento)).quantize(Decimal('0.01'))
+
+    pedido = Pedidos(
+        cliente_id=orcamento.cliente_id,
+        orcamento_id=orcamento.id,
+        tipo_marmore=tipo_marmore,
+        metragem=round(metragem, 2),
+        preco_total=total,
+        saldo=total,
+        status='Pendente',
+    )
+    db.session.add(pedido)
+    return pedido
+
+
+def registrar_pagamento(pedido_id, valor, metodo_pagamento):
+    """
+    Grava o pagamento e abate o valor do saldo do pedido.
+
+    O saldo é atualizado no próprio UPDATE (saldo = saldo - valor), com a
+    condição de não ficar negativo: dois pagamentos simultâneos nunca
+    passam do total, e nenhuma listagem precisa somar os pagamentos.
+    Não faz commit.
+    """
+    valor = _valor_monetario(valor)
+    if not metodo_pagamento:
+        raise ErroNegocio("Método de pagamento é obrigatório.", 400)
+
+    resultado = db.session.execute(
+        db.update(Pedidos)
+        .where(Pedidos.id == pedido_id, Pedidos.status != 'Rejeitado', Pedidos.saldo >= valor)
+        .values(saldo=Pedidos.saldo - valor)
+    )
+    if resultado.rowcount == 0:
+        pedido = db.session.get(Pedidos, pedido_id)
+        if not pedido:
+            raise ErroNegocio("Pedido não encontrado.", 404)
+        if pedido.status == 'Rejeitado':
+            raise ErroNegocio("Pedido rejeitado não recebe pagamentos.", 400)
+        raise ErroNegocio(f"O valor excede o saldo do pedido (R$ {pedido.saldo}).", 400)
+
+    pagamento = Pagamentos(pedido_id=pedido_id, valor=valor, metodo_pagamento=metodo_pagamento)
+    db.session.add(pagamento)
+    return pagamento
+
+
+def estornar_pagamento(pagamento):
+    """Exclui o pagamento e devolve o valor ao saldo do pedido. Não faz commit."""
+    db.session.execute(
+        db.update(Pedidos)
+        .where(Pedidos.id == pagamento.pedido_id)
+        .values(saldo=Pedidos.saldo + pagamento.valor)
+    )
+    db.session.delete(pagamento)
+
+
+def criar_entrega(pedido, data_entrega, endereco_entrega, latitude=None, longitude=None):
+    """
+    Agenda uma entrega para o pedido. As coordenadas são opcionais, mas só
+    entregas com coordenadas entram na programação das rotas. Não faz commit.
+    """
+    if pedido.status == 'Rejeitado':
+        raise ErroNegocio("Pedido rejeitado não pode ter entregas.", 400)
+    if not data_entrega or not endereco_entrega:
+        raise ErroNegocio("Data e endereço de entrega são obrigatórios.", 400)
+    try:
+        data_entrega = date.fromisoformat(data_entrega)
+    except (TypeError, ValueError):
+        raise ErroNegocio("Data de entrega inválida. Use AAAA-MM-DD.", 400)
+
+    if (latitude is None) != (longitude is None):
+        raise ErroNegocio("Informe latitude e longitude juntas.", 400)
+    if latitude is not None:
+        try:
+            latitude, longitude = float(latitude), float(longitude)
+        except (TypeError, ValueError):
+            raise ErroNegocio("Coordenadas inválidas.", 400)
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ErroNegocio("Coordenadas inválidas.", 400)
+
+    entrega = Entregas(pedido_id=pedido.id, data_entrega=data_entrega, endereco_entrega=endereco_entrega,
+                       latitude=latitude, longitude=longitude)
+    db.session.add(entrega)
+    return entrega
+
+
+def transicionar_status(model, ids, status, transicoes):
+    """
+    Muda o status de vários registros com um único UPDATE ... WHERE id IN,
+    só para os que estão num status de origem permitido.
+    Retorna (atualizados, total de ids distintos). Não faz commit.
+    """
+    if status not in transicoes:
+        raise ErroNegocio(f"Status inválido. Use {', '.join(repr(s) for s in transicoes)}.", 400)
+    if not ids or not all(isinstance(i, int) for i in ids):
+        raise ErroNegocio("Informe a lista de ids.", 400)
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > LIMITE_IDS_TRANSICAO:
+        raise ErroNegocio(f"No máximo {LIMITE_IDS_TRANSICAO} ids por vez.", 400)
+
+    resultado = db.session.execute(
+        db.update(model)
+        .where(model.id.in_(ids), model.status.in_(transicoes[status]))
+        .values(status=status)
+        .execution_options(synchronize_session=False)
+    )
+    return resultado.rowcount, len(ids)
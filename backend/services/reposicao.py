@@ -0,0 +1,197 @@
+# -- coding: utf-8 --
+"""
+Previsão de consumo e ponto de reposição dos itens de estoque.
+
+As saídas são somadas por item e mês em consumo_mensal. Cada atualização
+lê só as movimentações com id acima da marca 'reposicao' (tabela
+marcas_processamento), agregadas pelo banco num GROUP BY por item e mês,
+da tabela principal e do arquivo (que mantém os ids originais). Quem
+consulta GET /estoque/reposicao só lê a tabela reposicao, já calculada.
+
+Para cada item, sobre os últimos REPOSICAO_MESES_HISTORICO meses fechados
+(a partir do primeiro mês com saída):
+
+  - fator sazonal de cada mês do ano: média das saídas naquele mês sobre a
+    média geral, puxada para 1 por uma observação a mais com a média geral
+    (com um ou dois anos de histórico, um mês atípico não vira tendência);
+  - consumo diário: média mensal dessazonalizada / dias de um mês médio, e
+    o desvio padrão correspondente;
+  - demanda durante o prazo de entrega (REPOSICAO_PRAZO_DIAS): consumo
+    diário x fator sazonal do período do prazo;
+  - estoque de segurança: z(REPOSICAO_NIVEL_SERVICO) x desvio diário x
+    raiz do prazo;
+  - ponto de reposição: demanda no prazo + estoque de segurança.
+
+O cálculo é refeito para os itens com movimentações novas e, na virada do
+mês, para todos. Rode 'flask --app app estoque atualizar-reposicao' no
+cron (por exemplo, a cada hora).
+"""
+import math
+import statistics
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import bindparam, extract, insert, update
+
+from extensions import db
+from models import ArquivoMovimentacoes, ConsumoMensal, MarcasProcessamento, Movimentacoes_Estoque, Reposicao
+
+MARCA = 'reposicao'
+DIAS_MES = 365.25 / 12
+# Movimentações mais novas que isso ainda podem ter transações com ids
+# menores sem commit: ficam para a próxima atualização
+MARGEM = timedelta(minutes=1)
+
+
+def _mes(dia):
+    return date(dia.year, dia.month, 1)
+
+
+def _somar_meses(mes, meses):
+    indice = mes.year * 12 + mes.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def _saidas_por_mes(model, marca, fim):
+    """(item_id, ano, mes, quantidade) das saídas com id em (marca, fim]."""
+    ano = extract('year', model.data_movimentacao)
+    mes = extract('month', model.data_movimentacao)
+    return (db.session.query(model.item_id, ano, mes, db.func.sum(model.quantidade))
+            .filter(model.id > marca, model.id <= fim, model.tipo_movimentacao == 'Saída')
+            .group_by(model.item_id, ano, mes))
+
+
+def fim_das_movimentacoes(sessao, marca, limite):
+    """
+    Maior id de movimentação que pode ser processado depois de 'marca': o
+    anterior à primeira movimentação mais nova que 'limite', para que os
+    ids processados sejam sempre uma faixa contínua a partir da marca.
+    Também usado pela exportação analítica (services/exportacao.py).
+    """
+    recente = (sessao.query(db.func.min(Movimentacoes_Estoque.id))
+               .filter(Movimentacoes_Estoque.id > marca, Movimentacoes_Estoque.data_movimentacao >= limite)
+               .scalar())
+    if recente is not None:
+        return recente - 1
+    return max(sessao.query(db.func.max(Movimentacoes_Estoque.id)).scalar() or 0,
+               sessao.query(db.func.max(ArquivoMovimentacoes.id)).scalar() or 0)
+
+
+def _acumular(novas):
+    """Soma as saídas novas ({(item_id, mes): quantidade}) em consumo_mensal."""
+    existentes = {(c.item_id, c.mes) for c in db.session.query(ConsumoMensal.item_id, ConsumoMensal.mes)
+                  .filter(ConsumoMensal.item_id.in_({item_id for item_id, _ in novas}))}
+    somar = [{'i': item_id, 'm': mes, 'q': quantidade} for (item_id, mes), quantidade in novas.items()
+             if (item_id, mes) in existentes]
+    inserir = [{'item_id': item_id, 'mes': mes, 'quantidade': quantidade}
+               for (item_id, mes), quantidade in novas.items() if (item_id, mes) not in existentes]
+    if somar:
+        tabela = ConsumoMensal.__table__
+        db.session.execute(
+            update(tabela).where(tabela.c.item_id == bindparam('i'), tabela.c.mes == bindparam('m'))
+            .values(quantidade=tabela.c.quantidade + bindparam('q')), somar)
+    if inserir:
+        db.session.execute(insert(ConsumoMensal), inserir)
+
+
+def prever(consumo, meses, mes_prazo, prazo_dias, z):
+    """
+    Previsão de um item. 'consumo' é {mes: quantidade} e 'meses' a janela de
+    meses fechados, em ordem; 'mes_prazo' é o mês do ano (1 a 12) em que cai
+    o prazo de entrega. Retorna None se o item não teve saídas na janela.
+    """
+    com_saida = [m for m in meses if consumo.get(m)]
+    if not com_saida:
+        return None
+    serie = [(m, consumo.get(m, 0.0)) for m in meses if m >= com_saida[0]]
+    media = sum(q for _, q in serie) / len(serie)
+
+    por_mes_do_ano = defaultdict(list)
+    for m, q in serie:
+        por_mes_do_ano[m.month].append(q)
+    fatores = {mes_do_ano: (sum(valores) + media) / ((len(valores) + 1) * media)
+               for mes_do_ano, valores in por_mes_do_ano.items()}
+
+    dessazonalizada = [q / fatores[m.month] for m, q in serie]
+    consumo_diario = statistics.fmean(dessazonalizada) / DIAS_MES
+    desvio_diario = (statistics.stdev(dessazonalizada) if len(serie) > 1 else 0.0) / math.sqrt(DIAS_MES)
+    fator = fatores.get(mes_prazo, 1.0)
+    demanda_diaria = consumo_diario * fator
+    seguranca = max(z, 0.0) * desvio_diario * math.sqrt(prazo_dias)
+    return {
+        'consumo_diario': consumo_diario,
+        'desvio_diario': desvio_diario,
+        'fator_sazonal': fator,
+        'demanda_diaria': demanda_diaria,
+        'estoque_seguranca': seguranca,
+        'ponto_reposicao': demanda_diaria * prazo_dias + seguranca,
+        'meses_historico': len(serie),
+    }
+
+
+def _recalcular(item_ids, hoje):
+    """Refaz a previsão dos itens (todos, com item_ids None). Retorna quantos têm previsão."""
+    config = current_app.config
+    mes_atual = _mes(hoje)
+    meses = [_somar_meses(mes_atual, -n) for n in range(config['REPOSICAO_MESES_HISTORICO'], 0, -1)]
+    prazo = config['REPOSICAO_PRAZO_DIAS']
+    mes_prazo = (hoje + timedelta(days=prazo / 2)).month
+    z = statistics.NormalDist().inv_cdf(config['REPOSICAO_NIVEL_SERVICO'])
+
+    query = (db.session.query(ConsumoMensal.item_id, ConsumoMensal.mes, ConsumoMensal.quantidade)
+             .filter(ConsumoMensal.mes >= meses[0], ConsumoMensal.mes < mes_atual))
+    anteriores = db.session.query(Reposicao)
+    if item_ids is not None:
+        query = query.filter(ConsumoMensal.item_id.in_(item_ids))
+        anteriores = anteriores.filter(Reposicao.item_id.in_(item_ids))
+    consumo = defaultdict(dict)
+    for item_id, mes, quantidade in query:
+        consumo[item_id][mes] = float(quantidade)
+
+    agora = datetime.now()
+    linhas = []
+    for item_id in sorted(consumo):
+        previsao = prever(consumo[item_id], meses, mes_prazo, prazo, z)
+        if previsao:
+            linhas.append(dict(previsao, item_id=item_id, mes_referencia=mes_atual, calculado_em=agora))
+    anteriores.delete(synchronize_session=False)
+    if linhas:
+        db.session.execute(insert(Reposicao), linhas)
+    return len(linhas)
+
+
+def atualizar_reposicao(hoje=None):
+    """
+    Soma as movimentações novas ao consumo mensal e refaz as previsões
+    afetadas, numa transação só (com commit): a marca só avança junto com
+    o consumo. Retorna {'movimentacoes_ate': id, 'itens': recalculados}.
+    """
+    hoje = hoje or date.today()
+    marca = db.session.query(MarcasProcessamento).filter_by(nome=MARCA).with_for_update().first()
+    if marca is None:
+        marca = MarcasProcessamento(nome=MARCA, ultimo_id=0)
+        db.session.add(marca)
+
+    limite = db.session.query(db.func.current_timestamp()).scalar() - MARGEM
+    fim = fim_das_movimentacoes(db.session, marca.ultimo_id, limite)
+    novas = defaultdict(float)
+    if fim > marca.ultimo_id:
+        for model in (Movimentacoes_Estoque, ArquivoMovimentacoes):
+            for item_id, ano, mes, quantidade in _saidas_por_mes(model, marca.ultimo_id, fim):
+                novas[(item_id, date(int(ano), int(mes), 1))] += float(quantidade)
+        if novas:
+            _acumular(novas)
+        marca.ultimo_id = fim
+
+    desatualizada = (db.session.query(Reposicao.item_id)
+                     .filter(Reposicao.mes_referencia != _mes(hoje)).first() is not None)
+    if desatualizada or marca.atualizado_em is None:
+        itens = _recalcular(None, hoje)
+    elif novas:
+        itens = _recalcular({item_id for item_id, _ in novas}, hoje)
+    else:
+        itens = 0
+    marca.atualizado_em = datetime.now()
+    db.session.commit()
+    return {'movimentacoes_ate': marca.ultimo_id, 'itens': itens}
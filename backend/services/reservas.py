@@ -0,0 +1,181 @@
+# -- coding: utf-8 --
+"""
+Reservas de estoque dos orçamentos pendentes.
+
+Ao criar (ou editar) um orçamento, cada item de estoque recebe uma reserva
+com validade de RESERVAS_VALIDADE_DIAS dias. Estoque.quantidade_reservada
+guarda a soma das reservas ativas e é alterada só por comandos atômicos
+(quantidade_reservada = quantidade_reservada ± x), então o disponível de um
+item é lido da própria linha, sem somar reservas, e duas reservas
+simultâneas não passam do que existe: a reserva é um UPDATE com a condição
+de disponível suficiente no WHERE.
+
+As saídas (aprovação de orçamento e movimentação de Saída) usam a mesma
+condição: baixar() tira a quantidade com um UPDATE que só passa se o
+disponível, descontadas as reservas, cobre a saída. As entradas (repor())
+também somam no próprio UPDATE, para não perder uma saída simultânea.
+
+As reservas deixam de contar quando o orçamento é aprovado (viram saída),
+rejeitado, editado ou excluído, e quando vencem: expirar_reservas() as
+remove em lotes (flask --app app estoque expirar-reservas, no cron).
+Enquanto a varredura não passa, uma reserva vencida ainda conta; se ela
+impedir uma reserva nova, as vencidas daquele item são liberadas na hora.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, insert, update
+
+from alteracoes import registrar_gravacoes
+from extensions import db
+from models import Estoque, Reservas
+from services import ErroNegocio
+
+
+def _somar(pares):
+    """{item_id: quantidade} a partir de pares (item_id, quantidade), somando repetidos."""
+    quantidades = defaultdict(float)
+    for item_id, quantidade in pares:
+        quantidades[item_id] += quantidade
+    return quantidades
+
+
+def _registrar_estoque(coluna, variacoes):
+    """
+    Recarrega os itens alterados por comandos em massa e os registra na
+    outbox e na auditoria. 'variacoes' é {item_id: quanto a coluna mudou}:
+    o valor de antes é o recarregado menos a variação (o UPDATE da própria
+    transação trava a linha, ninguém mais a altera até o commit).
+    """
+    if variacoes:
+        itens = Estoque.query.filter(Estoque.id.in_(variacoes)).populate_existing().all()
+        antes = {item.id: {coluna: getattr(item, coluna) - variacoes[item.id]} for item in itens}
+        registrar_gravacoes(db.session, itens, 'atualizado', antes=antes)
+
+
+def _devolver(reservas):
+    """
+    Remove as reservas (linhas de Reservas.id, item_id, quantidade) e
+    devolve as quantidades ao disponível dos itens. Devolve {item_id:
+    variação de quantidade_reservada}. Não faz commit.
+    """
+    if not reservas:
+        return {}
+    por_item = _somar((r.item_id, r.quantidade) for r in reservas)
+    # Um comando só (executemany), com os itens em ordem fixa: duas
+    # transações nunca esperam uma pela outra
+    tabela = Estoque.__table__
+    db.session.execute(
+        update(tabela).where(tabela.c.id == bindparam('item_id'))
+        .values(quantidade_reservada=tabela.c.quantidade_reservada - bindparam('devolvido')),
+        [{'item_id': item_id, 'devolvido': por_item[item_id]} for item_id in sorted(por_item)])
+    db.session.query(Reservas).filter(Reservas.id.in_([r.id for r in reservas])).delete(synchronize_session=False)
+    return {item_id: -devolvido for item_id, devolvido in por_item.items()}
+
+
+def _vencidas(agora, item_id=None):
+    query = db.session.query(Reservas.id, Reservas.item_id, Reservas.quantidade).filter(Reservas.expira_em <= agora)
+    if item_id is not None:
+        query = query.filter(Reservas.item_id == item_id)
+    return query
+
+
+def reservar(orcamento_id, pares, validade_dias, agora=None):
+    """
+    Reserva as quantidades dos pares (item_estoque_id, quantidade) para o
+    orçamento. Levanta ErroNegocio (409) se algum item não tem disponível
+    suficiente, descontadas as reservas de outros orçamentos. Não faz commit.
+    """
+    agora = agora or datetime.now()
+    quantidades = _somar(pares)
+    variacoes = defaultdict(float)
+    for item_id in sorted(quantidades):
+        quantidade = quantidades[item_id]
+        comando = (update(Estoque)
+                   .where(Estoque.id == item_id,
+                          Estoque.quantidade - Estoque.quantidade_reservada >= quantidade)
+                   .values(quantidade_reservada=Estoque.quantidade_reservada + quantidade)
+                   .execution_options(synchronize_session=False))
+        if db.session.execute(comando).rowcount == 0:
+            # Reservas vencidas que a varredura ainda não removeu podem estar no caminho
+            for vencido, variacao in _devolver(_vencidas(agora, item_id).all()).items():
+                variacoes[vencido] += variacao
+            if db.session.execute(comando).rowcount == 0:
+                item = db.session.get(Estoque, item_id, populate_existing=True)
+                raise ErroNegocio(
+                    f"Quantidade indisponível para o item '{item.nome}'. Disponível: {item.disponivel:g}, "
+                    f"reservado por outros orçamentos: {item.quantidade_reservada:g}, necessário: {quantidade:g}.",
+                    409)
+        variacoes[item_id] += quantidade
+
+    if quantidades:
+        expira_em = agora + timedelta(days=validade_dias)
+        db.session.execute(insert(Reservas), [
+            {'item_id': item_id, 'orcamento_id': orcamento_id, 'quantidade': quantidade,
+             'criado_em': agora, 'expira_em': expira_em}
+            for item_id, quantidade in quantidades.items()
+        ])
+    _registrar_estoque('quantidade_reservada', variacoes)
+
+
+def baixar(pares):
+    """
+    Dá baixa das quantidades dos pares (item_id, quantidade) no estoque, um
+    UPDATE condicional por item, em ordem fixa. Levanta ErroNegocio (404 se
+    o item não existe, 400 se o disponível não cobre a saída). Não faz commit.
+    """
+    quantidades = _somar(pares)
+    for item_id in sorted(quantidades):
+        quantidade = quantidades[item_id]
+        comando = (update(Estoque)
+                   .where(Estoque.id == item_id,
+                          Estoque.quantidade - Estoque.quantidade_reservada >= quantidade)
+                   .values(quantidade=Estoque.quantidade - quantidade,
+                           data_atualizacao=db.func.current_timestamp())
+                   .execution_options(synchronize_session=False))
+        if db.session.execute(comando).rowcount == 0:
+            item = db.session.get(Estoque, item_id, populate_existing=True)
+            if not item:
+                raise ErroNegocio(f"Item de estoque {item_id} não encontrado para movimentação.", 404)
+            raise ErroNegocio(
+                f"Quantidade insuficiente em estoque para o item '{item.nome}'. "
+                f"Disponível: {item.disponivel:g}, Necessário: {quantidade:g}", 400)
+    _registrar_estoque('quantidade', {item_id: -quantidade for item_id, quantidade in quantidades.items()})
+
+
+def repor(pares):
+    """
+    Dá entrada das quantidades dos pares (item_id, quantidade) no estoque,
+    um UPDATE atômico por item, em ordem fixa. Não faz commit.
+    """
+    quantidades = _somar(pares)
+    for item_id in sorted(quantidades):
+        db.session.execute(
+            update(Estoque).where(Estoque.id == item_id)
+            .values(quantidade=Estoque.quantidade + quantidades[item_id],
+                    data_atualizacao=db.func.current_timestamp())
+            .execution_options(synchronize_session=False))
+    _registrar_estoque('quantidade', quantidades)
+
+
+def liberar(orcamento_id):
+    """Remove as reservas do orçamento e devolve as quantidades ao disponível. Não faz commit."""
+    reservas = (db.session.query(Reservas.id, Reservas.item_id, Reservas.quantidade)
+                .filter(Reservas.orcamento_id == orcamento_id).all())
+    _registrar_estoque('quantidade_reservada', _devolver(reservas))
+
+
+def expirar_reservas(tamanho_lote, agora=None):
+    """
+    Remove as reservas vencidas em lotes de 'tamanho_lote', um commit por
+    lote, devolvendo as quantidades ao disponível. Retorna o total removido.
+    """
+    agora = agora or datetime.now()
+    total = 0
+    while True:
+        reservas = _vencidas(agora).order_by(Reservas.id).limit(tamanho_lote).all()
+        if not reservas:
+            return total
+        _registrar_estoque('quantidade_reservada', _devolver(reservas))
+        db.session.commit()
+        total += len(reservas)
@@ -0,0 +1,144 @@
+# -- coding: utf-8 --
+"""
+Histórico de revisões dos orçamentos.
+
+Cada criação ou edição dos itens grava uma linha em revisoes_orcamento. A
+cada ORCAMENTOS_REVISOES_INTERVALO revisões o conteúdo traz a lista
+completa dos itens; nas demais, só as operações que transformam os itens
+da revisão anterior nos atuais ([inicio, fim, itens novos]: troca o trecho
+inicio:fim da lista anterior pelos itens novos), calculadas com difflib.
+O espaço ocupado acompanha o que mudou, e qualquer revisão é remontada
+lendo a completa anterior e no máximo INTERVALO - 1 diferenças, numa
+consulta só.
+
+A diferença de cada edição é calculada contra os itens remontados da
+última revisão, e não contra o estado de antes da edição: se os itens
+mudaram sem revisão (ex.: exclusão em massa de um item de estoque), a
+mudança entra na revisão seguinte e o histórico continua remontando certo.
+
+Orçamentos criados antes do histórico ganham, na primeira edição, uma
+revisão completa com o estado anterior a ela.
+"""
+import difflib
+import json
+import zlib
+
+from flask import current_app
+from sqlalchemy.orm import undefer
+
+from extensions import db
+from models import Orcamentos, RevisoesOrcamento
+
+# Ordem dos campos de cada item no conteúdo (listas, sem repetir as chaves)
+CAMPOS = ('item_estoque_id', 'nome_item', 'quantidade', 'unidade_medida', 'preco_unitario_praticado',
+          'subtotal', 'log_calculo')
+
+
+def estado(orcamento):
+    """Observações, total e itens do orçamento (os itens precisam do log_calculo carregado)."""
+    return {
+        'observacoes': orcamento.observacoes,
+        'total_orcamento': orcamento.total_orcamento,
+        'itens': [(item.item_estoque_id, item.nome_item, item.quantidade, item.unidade_medida,
+                   item.preco_unitario_no_orcamento, item.subtotal, item.log_calculo)
+                  for item in orcamento.itens],
+    }
+
+
+def _comprimir(dados):
+    return zlib.compress(json.dumps(dados, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+
+
+def _descomprimir(conteudo):
+    return json.loads(zlib.decompress(conteudo).decode('utf-8'))
+
+
+def diferenca(anteriores, atuais):
+    """Operações [inicio, fim, itens] que transformam 'anteriores' em 'atuais'."""
+    operacoes = difflib.SequenceMatcher(None, anteriores, atuais, autojunk=False).get_opcodes()
+    return [[i1, i2, [list(item) for item in atuais[j1:j2]]]
+            for tag, i1, i2, j1, j2 in operacoes if tag != 'equal']
+
+
+def aplicar(itens, operacoes):
+    """Aplica as operações de diferenca() a uma cópia de 'itens'."""
+    itens = list(itens)
+    # Do fim para o começo: os índices de cada operação continuam valendo
+    for inicio, fim, novos in reversed(operacoes):
+        itens[inicio:fim] = [tuple(item) for item in novos]
+    return itens
+
+
+def _nova(orcamento_id, numero, base, dados, itens_alterados, conteudo, funcionario_id):
+    db.session.add(RevisoesOrcamento(
+        orcamento_id=orcamento_id, numero=numero, base=base, funcionario_id=funcionario_id,
+        total_orcamento=dados['total_orcamento'], observacoes=dados['observacoes'],
+        itens_alterados=itens_alterados, conteudo=_comprimir(conteudo)))
+
+
+def registrar_revisao(orcamento, anterior=None, funcionario_id=None):
+    """
+    Grava a revisão com o estado atual do orçamento. 'anterior' é o estado()
+    de antes da edição (None na criação); uma edição que não muda nada não
+    gera revisão. Não faz commit.
+    """
+    atual = estado(orcamento)
+    if anterior is None:
+        _nova(orcamento.id, 1, 1, atual, len(atual['itens']), atual['itens'], funcionario_id)
+        return
+
+    ultima, gravados = _remontar(orcamento.id)
+    if ultima is None:
+        if anterior['itens'] == atual['itens'] and anterior['observacoes'] == atual['observacoes']:
+            return
+        # Orçamento anterior ao histórico: a primeira revisão é o estado de antes da edição
+        _nova(orcamento.id, 1, 1, anterior, len(anterior['itens']), anterior['itens'], None)
+        numero, base, gravados = 2, 1, anterior['itens']
+    else:
+        if gravados == atual['itens'] and ultima.observacoes == atual['observacoes']:
+            return
+        numero, base = ultima.numero + 1, ultima.base
+    operacoes = diferenca(gravados, atual['itens'])
+    alterados = sum(fim - inicio + len(novos) for inicio, fim, novos in operacoes)
+    if numero - base >= current_app.config['ORCAMENTOS_REVISOES_INTERVALO']:
+        _nova(orcamento.id, numero, numero, atual, alterados, atual['itens'], funcionario_id)
+    else:
+        _nova(orcamento.id, numero, base, atual, alterados, operacoes, funcionario_id)
+
+
+def remontar(orcamento_id, numero):
+    """
+    A revisão 'numero' com os itens completos, ou None se ela não existe.
+    Lê a revisão completa em que ela se baseia e as diferenças seguintes
+    até ela, numa consulta só.
+    """
+    revisao, itens = _remontar(orcamento_id, numero)
+    if revisao is None:
+        return None
+    dados = revisao.serialize()
+    dados['itens'] = [dict(zip(CAMPOS, item)) for item in itens]
+    return dados
+
+
+def _remontar(orcamento_id, numero=None):
+    """(revisão, itens em tuplas) da revisão 'numero' (sem ele, a última), ou (None, None)."""
+    if numero is None:
+        numero = (db.session.query(db.func.max(RevisoesOrcamento.numero))
+                  .filter(RevisoesOrcamento.orcamento_id == orcamento_id)
+                  .scalar_subquery())
+    base = (db.session.query(RevisoesOrcamento.base)
+            .filter(RevisoesOrcamento.orcamento_id == orcamento_id, RevisoesOrcamento.numero == numero)
+            .scalar_subquery())
+    # O join com o orçamento restringe a busca à filial do request (filiais.py)
+    revisoes = (RevisoesOrcamento.query.options(undefer(RevisoesOrcamento.conteudo))
+                .join(Orcamentos, Orcamentos.id == RevisoesOrcamento.orcamento_id)
+                .filter(RevisoesOrcamento.orcamento_id == orcamento_id,
+                        RevisoesOrcamento.numero >= base, RevisoesOrcamento.numero <= numero)
+                .order_by(RevisoesOrcamento.numero).all())
+    if not revisoes:
+        return None, None
+
+    itens = [tuple(item) for item in _descomprimir(revisoes[0].conteudo)]
+    for revisao in revisoes[1:]:
+        itens = aplicar(itens, _descomprimir(revisao.conteudo))
+    return revisoes[-1], itens
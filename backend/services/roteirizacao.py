@@ -0,0 +1,174 @@
+# -- coding: utf-8 --
+"""
+Programação diária das entregas.
+
+As entregas pendentes do dia são divididas em cargas de caminhão pelo
+método de varredura: as paradas são ordenadas pelo ângulo em relação ao
+depósito e vão enchendo o caminhão até o limite de peso ou de área das
+chapas. Cada carga vira uma rota que sai do depósito e volta a ele,
+montada pelo vizinho mais próximo e melhorada com 2-opt sobre a matriz de
+distâncias (em linha reta, pelas coordenadas das entregas).
+
+As funções de cálculo não acessam o banco; programar_entregas() busca as
+entregas e monta o resultado da rota GET /entregas/programacao.
+"""
+import math
+
+from flask import current_app
+
+from extensions import db
+from models import Clientes, Entregas, Pedidos
+
+RAIO_TERRA_KM = 6371.0
+
+
+def distancia_km(a, b):
+    """Distância em linha reta (haversine) entre dois pontos (lat, lon)."""
+    lat1, lon1 = math.radians(a[0]), math.radians(a[1])
+    lat2, lon2 = math.radians(b[0]), math.radians(b[1])
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAIO_TERRA_KM * math.asin(math.sqrt(h))
+
+
+def matriz_distancias(pontos):
+    n = len(pontos)
+    matriz = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1, n):
+            matriz[i][j] = matriz[j][i] = distancia_km(pontos[i], pontos[j])
+    return matriz
+
+
+def agrupar_em_cargas(paradas, deposito, capacidade_kg, capacidade_m2):
+    """
+    Varredura: ordena as paradas pelo ângulo em torno do depósito e fecha
+    uma carga sempre que a próxima parada estouraria o peso ou a área.
+    Uma parada maior que o caminhão sozinha ocupa uma carga inteira.
+    """
+    def angulo(parada):
+        return math.atan2(parada['latitude'] - deposito[0], parada['longitude'] - deposito[1])
+
+    cargas, atual, peso, area = [], [], 0.0, 0.0
+    for parada in sorted(paradas, key=angulo):
+        if atual and (peso + parada['peso_kg'] > capacidade_kg or area + parada['area_m2'] > capacidade_m2):
+            cargas.append(atual)
+            atual, peso, area = [], 0.0, 0.0
+        atual.append(parada)
+        peso += parada['peso_kg']
+        area += parada['area_m2']
+    if atual:
+        cargas.append(atual)
+    return cargas
+
+
+def vizinho_mais_proximo(matriz):
+    """Rota fechada a partir do ponto 0 (depósito): [0, ..., 0]."""
+    restantes = set(range(1, len(matriz)))
+    rota = [0]
+    while restantes:
+        ultimo = matriz[rota[-1]]
+        proximo = min(restantes, key=ultimo.__getitem__)
+        rota.append(proximo)
+        restantes.remove(proximo)
+    rota.append(0)
+    return rota
+
+
+def melhorar_2opt(rota, matriz, max_passadas=50):
+    """
+    Inverte trechos da rota enquanto isso encurtar o percurso (2-opt,
+    primeira melhoria). As pontas (depósito) ficam fixas.
+    """
+    rota = list(rota)
+    n = len(rota)
+    for _ in range(max_passadas):
+        melhorou = False
+        for i in range(1, n - 2):
+            a, b = rota[i - 1], rota[i]
+            d_ab = matriz[a][b]
+            linha_a = matriz[a]
+            linha_b = matriz[b]
+            for j in range(i + 1, n - 1):
+                c, d = rota[j], rota[j + 1]
+                ganho = d_ab + matriz[c][d] - linha_a[c] - linha_b[d]
+                if ganho > 1e-9:
+                    rota[i:j + 1] = reversed(rota[i:j + 1])
+                    b = rota[i]
+                    d_ab = matriz[a][b]
+                    linha_b = matriz[b]
+                    melhorou = True
+        if not melhorou:
+            break
+    return rota
+
+
+def comprimento(rota, matriz):
+    return sum(matriz[rota[k]][rota[k + 1]] for k in range(len(rota) - 1))
+
+
+def montar_rotas(paradas, deposito, capacidade_kg, capacidade_m2):
+    """
+    Divide as paradas em cargas e ordena cada uma. Retorna uma lista de
+    cargas com as paradas na ordem de visita e a distância total em km.
+    """
+    resultado = []
+    for carga in agrupar_em_cargas(paradas, deposito, capacidade_kg, capacidade_m2):
+        pontos = [deposito] + [(p['latitude'], p['longitude']) for p in carga]
+        matriz = matriz_distancias(pontos)
+        rota = melhorar_2opt(vizinho_mais_proximo(matriz), matriz)
+        resultado.append({
+            'peso_kg': round(sum(p['peso_kg'] for p in carga), 1),
+            'area_m2': round(sum(p['area_m2'] for p in carga), 2),
+            'distancia_km': round(comprimento(rota, matriz), 2),
+            'paradas': [{**carga[i - 1], 'ordem': ordem} for ordem, i in enumerate(rota[1:-1], 1)],
+        })
+    return resultado
+
+
+def programar_entregas(data_entrega):
+    """Programação das entregas pendentes (ou atrasadas) marcadas para o dia."""
+    config = current_app.config
+    deposito = (config['ENTREGAS_DEPOSITO_LAT'], config['ENTREGAS_DEPOSITO_LON'])
+    peso_m2 = config['ENTREGAS_PESO_KG_M2']
+
+    linhas = (
+        db.session.query(Entregas.id, Entregas.pedido_id, Entregas.endereco_entrega,
+                         Entregas.latitude, Entregas.longitude, Pedidos.metragem, Clientes.nome)
+        .join(Pedidos, Pedidos.id == Entregas.pedido_id)
+        .join(Clientes, Clientes.id == Pedidos.cliente_id)
+        .filter(Entregas.status.in_(['Pendente', 'Atrasado']), Entregas.data_entrega == data_entrega)
+        .all()
+    )
+
+    paradas, sem_coordenadas = [], []
+    for linha in linhas:
+        # A metragem do pedido é a soma dos itens em m² do orçamento
+        area = float(linha.metragem)
+        parada = {
+            'entrega_id': linha.id,
+            'pedido_id': linha.pedido_id,
+            'cliente': linha.nome,
+            'endereco_entrega': linha.endereco_entrega,
+            'latitude': linha.latitude,
+            'longitude': linha.longitude,
+            'area_m2': area,
+            'peso_kg': round(area * peso_m2, 1),
+        }
+        if linha.latitude is None or linha.longitude is None:
+            sem_coordenadas.append(parada)
+        else:
+            paradas.append(parada)
+
+    cargas = montar_rotas(paradas, deposito, config['ENTREGAS_CAPACIDADE_KG'], config['ENTREGAS_CAPACIDADE_M2'])
+    for numero, carga in enumerate(cargas, 1):
+        carga['caminhao'] = numero
+        carga['excede_capacidade'] = (carga['peso_kg'] > config['ENTREGAS_CAPACIDADE_KG']
+                                      or carga['area_m2'] > config['ENTREGAS_CAPACIDADE_M2'])
+    return {
+        'data': data_entrega.isoformat(),
+        'deposito': {'latitude': deposito[0], 'longitude': deposito[1]},
+        'cargas': cargas,
+        'distancia_total_km': round(sum(c['distancia_km'] for c in cargas), 2),
+        # Entregas sem coordenadas precisam ser encaixadas manualmente
+        'sem_coordenadas': sem_coordenadas,
+    }
@@ -0,0 +1,270 @@
+# -- coding: utf-8 --
+"""
+Tarefas em segundo plano.
+
+Operações longas (aprovação de orçamentos grandes, exclusão de itens com
+muito histórico) são gravadas na tabela 'tarefas' e executadas fora do
+request. O cliente recebe 202 com o id da tarefa e acompanha o andamento
+em GET /tarefas/<id>.
+
+Dois modos de execução:
+  - sem TAREFAS_BROKER_URL: um pool de threads dentro do próprio processo
+    do Gunicorn executa as tarefas (bom para desenvolvimento e instalações
+    pequenas; tarefas em andamento se perdem se o worker reiniciar);
+  - com TAREFAS_BROKER_URL (ex.: amqp://..., ou sqla+sqlite:///tarefas.db
+    para um broker local em SQLite): o id da tarefa é publicado via kombu e
+    executado por 'flask --app app tarefas worker', em outro processo. A
+    mensagem só é confirmada (ack) depois que a tarefa termina.
+
+Qualquer que seja o modo, quem executa primeiro toma a tarefa com um
+UPDATE condicional (status 'Pendente' -> 'Executando'): mensagens
+repetidas, vários workers e 'tarefas executar-pendentes' nunca rodam a
+mesma tarefa duas vezes ao mesmo tempo. Tarefas com 'chave' (ex.:
+'aprovar_orcamento:42') não são duplicadas: enfileirar() devolve a que
+ainda não terminou.
+"""
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from auditoria import em_nome_de
+from extensions import db
+from filiais import na_filial
+from models import Tarefas
+from services import ErroNegocio
+
+FILA_KOMBU = 'tarefas'
+
+# nome -> (função, semáforo de concorrência ou None)
+_registro = {}
+
+
+def tarefa(nome, concorrencia=None):
+    """
+    Registra uma função como tarefa.
+
+    A função recebe (parametros, progresso), onde progresso(pct, mensagem=None)
+    atualiza o andamento, e devolve um resultado serializável em JSON.
+    'concorrencia' limita quantas tarefas desse tipo rodam ao mesmo tempo
+    em cada processo (não entre processos: use uma chave em enfileirar()).
+    """
+    def decorador(fn):
+        semaforo = threading.BoundedSemaphore(concorrencia) if concorrencia else None
+        _registro[nome] = (fn, semaforo)
+        return fn
+    return decorador
+
+
+class FilaTarefas:
+    def __init__(self, app=None):
+        self._executor = None
+        self._trava = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['tarefas'] = self
+        app.cli.add_command(comandos)
+
+    def enfileirar(self, tipo, parametros, funcionario_id=None, chave=None):
+        """
+        Grava a tarefa, faz commit e a despacha para execução. Com 'chave',
+        se já existe uma tarefa com ela ainda não terminada, devolve essa.
+        """
+        if tipo not in _registro:
+            raise ValueError(f'Tarefa desconhecida: {tipo}')
+        nova = Tarefas(
+            tipo=tipo,
+            parametros=json.dumps(parametros),
+            funcionario_id=funcionario_id,
+            max_tentativas=current_app.config['TAREFAS_MAX_TENTATIVAS'],
+            chave=chave,
+        )
+        db.session.add(nova)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A restrição única decide entre pedidos simultâneos, em qualquer processo
+            db.session.rollback()
+            existente = (Tarefas.query.filter_by(chave=chave)
+                         .execution_options(todas_as_filiais=True).one_or_none()) if chave else None
+            if existente is None:
+                raise
+            return existente
+
+        app = current_app._get_current_object()
+        broker = app.config.get('TAREFAS_BROKER_URL')
+        if broker:
+            from kombu import Connection
+            with Connection(broker) as conexao:
+                conexao.SimpleQueue(FILA_KOMBU).put({'id': nova.id})
+        else:
+            self._pool(app).submit(self.executar, app, nova.id)
+        return nova
+
+    def _pool(self, app):
+        # Criado sob demanda: com --preload, threads criadas antes do fork
+        # não existiriam nos workers.
+        with self._trava:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=app.config['TAREFAS_CONCORRENCIA'], thread_name_prefix='tarefa')
+            return self._executor
+
+    def executar(self, app, tarefa_id):
+        with app.app_context():
+            try:
+                self._executar(app, tarefa_id)
+            finally:
+                db.session.remove()
+
+    def _executar(self, app, tarefa_id):
+        registro = db.session.get(Tarefas, tarefa_id)
+        if registro is None or registro.status != 'Pendente':
+            return
+        fn, semaforo = _registro[registro.tipo]
+        parametros = json.loads(registro.parametros)
+
+        if semaforo:
+            semaforo.acquire()
+        try:
+            while True:
+                if not _tomar(tarefa_id):
+                    # Outro worker já a executa (ou ela terminou enquanto esperávamos)
+                    return
+                registro = db.session.get(Tarefas, tarefa_id, populate_existing=True)
+                try:
+                    # Na filial e em nome de quem criou a tarefa, como o request que a criou
+                    with na_filial(registro.filial_id), em_nome_de(registro.funcionario_id):
+                        resultado = fn(parametros, lambda pct, mensagem=None: _progresso(tarefa_id, pct, mensagem))
+                except ErroNegocio as e:
+                    db.session.rollback()
+                    _finalizar(tarefa_id, 'Falhou', mensagem=e.mensagem)
+                    return
+                except Exception as e:
+                    db.session.rollback()
+                    registro = db.session.get(Tarefas, tarefa_id)
+                    print(f"Erro na tarefa #{tarefa_id} ({registro.tipo}), tentativa {registro.tentativas}: {e}")
+                    if registro.tentativas >= registro.max_tentativas:
+                        _finalizar(tarefa_id, 'Falhou', mensagem=str(e)[:500])
+                        return
+                    registro.status = 'Pendente'
+                    registro.mensagem = f'Tentativa {registro.tentativas} falhou: {e}'[:500]
+                    db.session.commit()
+                    time.sleep(app.config['TAREFAS_ESPERA_RETENTATIVA'] * 2 ** (registro.tentativas - 1))
+                    continue
+                _finalizar(tarefa_id, 'Concluída', resultado=resultado)
+                return
+        finally:
+            if semaforo:
+                semaforo.release()
+
+
+def _tomar(tarefa_id):
+    """Passa a tarefa de 'Pendente' para 'Executando'; False se outro já a tomou."""
+    tomada = db.session.execute(
+        db.update(Tarefas)
+        .where(Tarefas.id == tarefa_id, Tarefas.status == 'Pendente')
+        .values(status='Executando', tentativas=Tarefas.tentativas + 1, iniciado_em=db.func.current_timestamp())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return tomada == 1
+
+
+def _progresso(tarefa_id, pct, mensagem=None):
+    # Conexão própria: a sessão da tarefa pode estar no meio da transação.
+    valores = {'progresso': max(0, min(100, int(pct)))}
+    if mensagem is not None:
+        valores['mensagem'] = mensagem[:500]
+    with db.engine.begin() as conexao:
+        conexao.execute(db.update(Tarefas).where(Tarefas.id == tarefa_id).values(**valores))
+
+
+def _finalizar(tarefa_id, status, mensagem=None, resultado=None):
+    registro = db.session.get(Tarefas, tarefa_id)
+    registro.status = status
+    registro.mensagem = mensagem
+    registro.finalizado_em = db.func.current_timestamp()
+    # Libera a chave: uma nova tarefa para o mesmo registro pode ser criada
+    registro.chave = None
+    if status == 'Concluída':
+        registro.progresso = 100
+        registro.resultado = json.dumps(resultado)
+    db.session.commit()
+
+
+fila = FilaTarefas()
+
+
+@click.group('tarefas')
+def comandos():
+    """Tarefas em segundo plano."""
+
+
+@comandos.command('worker')
+def worker():
+    """Consome as tarefas publicadas em TAREFAS_BROKER_URL."""
+    from kombu import Connection
+
+    app = current_app._get_current_object()
+    broker = app.config.get('TAREFAS_BROKER_URL')
+    if not broker:
+        raise click.ClickException('Defina TAREFAS_BROKER_URL para usar o worker.')
+
+    concorrencia = app.config['TAREFAS_CONCORRENCIA']
+    executor = ThreadPoolExecutor(max_workers=concorrencia, thread_name_prefix='tarefa')
+    click.echo(f"Consumindo a fila '{FILA_KOMBU}' com {concorrencia} threads.")
+    # Execução -> mensagem. A confirmação é feita aqui, na thread da conexão
+    # (os canais do kombu não são thread-safe), depois que a tarefa termina:
+    # se o worker morrer antes, o broker entrega a mensagem de novo.
+    em_andamento = {}
+    with Connection(broker) as conexao:
+        fila_kombu = conexao.SimpleQueue(FILA_KOMBU)
+        while True:
+            if em_andamento:
+                # Com todas as threads ocupadas, espera uma terminar antes de buscar outra mensagem
+                cheio = len(em_andamento) >= concorrencia
+                prontas, _ = wait(list(em_andamento), timeout=5 if cheio else 0, return_when=FIRST_COMPLETED)
+                for futuro in prontas:
+                    mensagem = em_andamento.pop(futuro)
+                    if futuro.exception() is None:
+                        mensagem.ack()
+                    else:
+                        print(f"Erro ao executar a tarefa #{mensagem.payload['id']}: {futuro.exception()}")
+                        mensagem.requeue()
+                if len(em_andamento) >= concorrencia:
+                    continue
+            try:
+                mensagem = fila_kombu.get(block=True, timeout=1 if em_andamento else 5)
+            except fila_kombu.Empty:
+                continue
+            em_andamento[executor.submit(fila.executar, app, mensagem.payload['id'])] = mensagem
+
+
+@comandos.command('executar-pendentes')
+@click.option('--travadas-ha', type=int, default=None,
+              help="Antes, devolve a 'Pendente' as tarefas em execução iniciadas há mais de N minutos.")
+def executar_pendentes(travadas_ha):
+    """
+    Executa as tarefas pendentes (ex.: após um restart do worker). As que
+    ficaram 'Executando' só voltam com --travadas-ha, para quando o processo
+    que as executava morreu; use um tempo maior que o da tarefa mais longa.
+    """
+    app = current_app._get_current_object()
+    if travadas_ha is not None:
+        limite = datetime.now() - timedelta(minutes=travadas_ha)
+        devolvidas = (Tarefas.query.filter(Tarefas.status == 'Executando', Tarefas.iniciado_em < limite)
+                      .update({'status': 'Pendente'}, synchronize_session=False))
+        db.session.commit()
+        click.echo(f'{devolvidas} tarefa(s) travada(s) devolvida(s) à fila.')
+    pendentes = [t.id for t in Tarefas.query.filter(Tarefas.status == 'Pendente')]
+    for tarefa_id in pendentes:
+        fila.executar(app, tarefa_id)
+    click.echo(f'{len(pendentes)} tarefa(s) executada(s).')
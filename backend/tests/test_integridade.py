@@ -0,0 +1,106 @@
+# -- coding: utf-8 --
+"""Tradução dos IntegrityError do MySQL e do SQLite (services/integridade.py)."""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app import create_app
+from extensions import db
+from models import Clientes, Filiais, Funcionarios, Pedidos
+from services.integridade import erro_integridade, restricao_violada
+
+
+def _mysql(codigo, mensagem):
+    """IntegrityError como o do PyMySQL: args = (código, mensagem)."""
+    return IntegrityError('INSERT ...', {}, Exception(codigo, mensagem))
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'integridade.db'}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+        'JWT_SECRET_KEY': 'teste-secret-key-com-tamanho-suficiente',
+        'ADMISSAO_ATIVA': False,
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.add(Filiais(id=1, nome='Matriz'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+
+def _erro_sqlite(*objetos):
+    """IntegrityError real do SQLite ao gravar os objetos, um commit por objeto."""
+    for obj in objetos[:-1]:
+        db.session.add(obj)
+        db.session.commit()
+    db.session.add(objetos[-1])
+    with pytest.raises(IntegrityError) as erro:
+        db.session.commit()
+    db.session.rollback()
+    return erro.value
+
+
+@pytest.mark.parametrize('chave', ['clientes.uq_clientes_filial_cpf', 'uq_clientes_filial_cpf'])
+def test_mysql_duplicado_com_e_sem_prefixo_da_tabela(chave):
+    erro = _mysql(1062, f"Duplicate entry '1-12345678901' for key '{chave}'")
+    assert restricao_violada(erro, 'mysql') == 'uq_clientes_filial_cpf'
+    traduzido = erro_integridade(erro, 'mysql')
+    assert (traduzido.mensagem, traduzido.status) == ("CPF já cadastrado.", 409)
+
+
+def test_mysql_duplicado_em_restricao_sem_mensagem():
+    erro = _mysql(1062, "Duplicate entry 'x' for key 'tabela.uq_outra'")
+    assert restricao_violada(erro, 'mysql') == 'uq_outra'
+    traduzido = erro_integridade(erro, 'mysql')
+    assert (traduzido.mensagem, traduzido.status) == ("Registro duplicado.", 409)
+
+
+def test_mysql_chave_estrangeira_do_pai():
+    erro = _mysql(1451, "Cannot delete or update a parent row: a foreign key constraint fails "
+                        "(`marmoraria`.`pedidos`, CONSTRAINT `pedidos_ibfk_1` FOREIGN KEY (`cliente_id`) "
+                        "REFERENCES `clientes` (`id`))")
+    assert restricao_violada(erro, 'mysql') is None
+    traduzido = erro_integridade(erro, 'mysql')
+    assert (traduzido.mensagem, traduzido.status) == ("O registro está em uso e não pode ser excluído.", 409)
+
+
+def test_mysql_chave_estrangeira_do_filho():
+    erro = _mysql(1452, "Cannot add or update a child row: a foreign key constraint fails "
+                        "(`marmoraria`.`pedidos`, CONSTRAINT `pedidos_ibfk_1` FOREIGN KEY (`cliente_id`) "
+                        "REFERENCES `clientes` (`id`))")
+    assert restricao_violada(erro, 'mysql') is None
+    traduzido = erro_integridade(erro, 'mysql')
+    assert (traduzido.mensagem, traduzido.status) == ("Registro relacionado não encontrado.", 400)
+
+
+def test_sqlite_unico_de_varias_colunas(app):
+    erro = _erro_sqlite(Clientes(nome='A', cpf='52998224725', telefone='21988887777'),
+                        Clientes(nome='B', cpf='52998224725', telefone='21977776666'))
+    assert 'UNIQUE constraint failed: clientes.filial_id, clientes.cpf' in str(erro.orig)
+    assert restricao_violada(erro) == 'uq_clientes_filial_cpf'
+    traduzido = erro_integridade(erro)
+    assert (traduzido.mensagem, traduzido.status) == ("CPF já cadastrado.", 409)
+
+
+def test_sqlite_unico_de_uma_coluna(app):
+    def funcionario(cpf):
+        novo = Funcionarios(nome='F', email='f@marmoraria.com', cpf=cpf)
+        novo.set_password('Senha123!')
+        return novo
+
+    erro = _erro_sqlite(funcionario('52998224725'), funcionario('11144477735'))
+    assert restricao_violada(erro) == 'uq_funcionarios_email'
+    assert erro_integridade(erro).mensagem == "Este email já está cadastrado."
+
+
+def test_sqlite_chave_estrangeira(app):
+    # O SQLite só confere chaves estrangeiras com o pragma, por conexão
+    db.session.execute(text('PRAGMA foreign_keys=ON'))
+    erro = _erro_sqlite(Pedidos(cliente_id=999, tipo_marmore='Carrara', metragem=1, preco_total=10))
+    assert 'FOREIGN KEY constraint failed' in str(erro.orig)
+    assert restricao_violada(erro) is None
+    traduzido = erro_integridade(erro)
+    assert (traduzido.mensagem, traduzido.status) == ("Registro relacionado não encontrado ou em uso.", 409)
@@ -0,0 +1,9 @@
+# -- coding: utf-8 --
+"""Planos de execução das consultas de cada rota (benchmarks/planos.py), num SQLite pequeno."""
+from benchmarks.planos import verificar
+
+
+def test_consultas_filtradas_nao_varrem_a_tabela_inteira(tmp_path):
+    falhas = {nome: problemas for nome, problemas in verificar(f"sqlite:///{tmp_path / 'planos.db'}", escala=0.1)
+              if problemas}
+    assert not falhas, '\n'.join(f'{nome}:\n    ' + '\n    '.join(problemas) for nome, problemas in falhas.items())
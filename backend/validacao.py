@@ -0,0 +1,459 @@
+# -- coding: utf-8 --
+"""
+Validação dos corpos JSON das rotas.
+
+Cada esquema (JSON Schema) é conferido e compilado uma vez só, quando o
+módulo é importado na criação da app: o subconjunto de palavras-chave
+usado aqui vira uma função Python que responde só "válido ou não", e o
+jsonschema roda apenas para corpos inválidos, para montar a mensagem
+(ele é bem mais lento: ~65 µs por item de orçamento). As rotas chamam
+validar('nome', request.get_json(silent=True)) antes de tocar no banco e
+recebem os dados já normalizados (CPF e telefone só com dígitos, números
+em float). Corpo inválido vira ErroValidacao, respondido com 400 pelo
+handler registrado em init_app().
+
+A mensagem de erro de cada campo fica na chave 'erro' do próprio
+subesquema (o jsonschema ignora chaves desconhecidas); a do objeto vale
+para campos obrigatórios ausentes. Em listas de itens todos os itens são
+conferidos de uma vez e a resposta traz os índices de todos os inválidos.
+"""
+import re
+
+from flask import jsonify
+from jsonschema import Draft202012Validator
+from jsonschema.exceptions import best_match
+
+from services import ErroNegocio
+
+
+class ErroValidacao(ErroNegocio):
+    """ErroNegocio com detalhes extras para o corpo da resposta (ex.: itens inválidos)."""
+
+    def __init__(self, mensagem, status=400, **detalhes):
+        super().__init__(mensagem, status)
+        self.detalhes = detalhes
+
+
+# Normalizadores: recebem o valor já validado pelo esquema e devolvem o
+# valor limpo, ou levantam ErroValidacao.
+_NAO_DIGITO = re.compile(r'\D')
+_ESPECIAIS = frozenset('!@#$%^&*(),.?":{}|<>_+-')
+
+
+def cpf(valor):
+    limpo = _NAO_DIGITO.sub('', valor)
+    if len(limpo) != 11:
+        raise ErroValidacao("CPF deve conter exatamente 11 dígitos.")
+    return limpo
+
+
+def telefone(valor):
+    limpo = _NAO_DIGITO.sub('', valor)
+    if not 8 <= len(limpo) <= 11:
+        raise ErroValidacao("Telefone deve conter entre 8 e 11 dígitos numéricos.")
+    return limpo
+
+
+def senha(valor):
+    """Confere todas as regras da senha numa única passada pelos caracteres."""
+    if len(valor) < 8:
+        raise ErroValidacao("A senha deve ter pelo menos 8 caracteres.")
+    maiuscula = minuscula = numero = especial = False
+    for c in valor:
+        if 'A' <= c <= 'Z':
+            maiuscula = True
+        elif 'a' <= c <= 'z':
+            minuscula = True
+        elif '0' <= c <= '9':
+            numero = True
+        elif c in _ESPECIAIS:
+            especial = True
+    if not maiuscula:
+        raise ErroValidacao("A senha deve conter pelo menos uma letra maiúscula.")
+    if not minuscula:
+        raise ErroValidacao("A senha deve conter pelo menos uma letra minúscula.")
+    if not numero:
+        raise ErroValidacao("A senha deve conter pelo menos um número.")
+    if not especial:
+        raise ErroValidacao("A senha deve conter pelo menos um caractere especial (!@#$%^&*(),.?:{}|<>_+-).")
+    return valor
+
+
+def numero(valor):
+    # O esquema já garantiu número ou texto numérico
+    return float(valor)
+
+
+def quantidade(valor):
+    valor = float(valor)
+    if valor <= 0:
+        raise ErroValidacao("A quantidade deve ser maior que zero.")
+    return valor
+
+
+def _texto(erro):
+    return {'type': 'string', 'minLength': 1, 'erro': erro}
+
+
+def _numero(erro):
+    """Número JSON ou texto numérico ("2.5"), como o float() das rotas sempre aceitou."""
+    return {'type': ['number', 'string'], 'pattern': r'^\s*-?\d+(\.\d+)?\s*$', 'erro': erro}
+
+
+def _id(erro):
+    return {'type': 'integer', 'minimum': 1, 'erro': erro}
+
+
+_ERRO_ITEM = "Dados incompletos para um item do orçamento."
+_VALOR_ITEM = {'type': 'number', 'exclusiveMinimum': 0, 'erro': _ERRO_ITEM}
+_ITEM_ORCAMENTO = {
+    'type': 'object',
+    'required': ['item_estoque_id', 'quantidade', 'preco_unitario_praticado', 'subtotal'],
+    'erro': _ERRO_ITEM,
+    'properties': {
+        'item_estoque_id': _id(_ERRO_ITEM),
+        'quantidade': _VALOR_ITEM,
+        'preco_unitario_praticado': _VALOR_ITEM,
+        'subtotal': _VALOR_ITEM,
+        'log_calculo': {'type': ['string', 'null'], 'erro': "O log de cálculo deve ser um texto."},
+    },
+}
+
+_ITENS_ORCAMENTO = {'type': 'array', 'items': _ITEM_ORCAMENTO, 'erro': "Os itens devem ser uma lista."}
+
+_TRANSICAO = {
+    'type': 'object',
+    'required': ['ids', 'status'],
+    'erro': "Informe a lista de ids e o status.",
+    'properties': {
+        'ids': {'type': 'array', 'minItems': 1, 'items': {'type': 'integer', 'erro': "Os ids devem ser inteiros."},
+                'erro': "Informe a lista de ids."},
+        'status': {'type': 'string', 'erro': "Status inválido."},
+    },
+}
+
+# Itens por carga em massa (ex.: POST /clientes/lote)
+LIMITE_LOTE = 1000
+
+# nome -> (esquema, {campo: normalizador}); numa lista, {campo: {subcampo: normalizador}}
+ESQUEMAS = {
+    'login': ({
+        'type': 'object',
+        'required': ['email', 'senha'],
+        'erro': "Email e senha são obrigatórios.",
+        'properties': {
+            'email': {'type': 'string', 'erro': "Email ou senha inválidos"},
+            'senha': {'type': 'string', 'erro': "Email ou senha inválidos"},
+        },
+    }, {}),
+    'funcionario': ({
+        'type': 'object',
+        'required': ['nome', 'email', 'senha', 'cpf'],
+        'erro': "Todos os campos (nome, email, senha, cpf) são obrigatórios.",
+        'properties': {
+            'nome': _texto("Todos os campos (nome, email, senha, cpf) são obrigatórios."),
+            'email': {'type': 'string', 'pattern': r'^[^@]+@[^@]+\.[^@]+', 'erro': "Formato de email inválido."},
+            'senha': _texto("Todos os campos (nome, email, senha, cpf) são obrigatórios."),
+            'cpf': _texto("Todos os campos (nome, email, senha, cpf) são obrigatórios."),
+        },
+    }, {'senha': senha, 'cpf': cpf}),
+    'cliente': ({
+        'type': 'object',
+        'required': ['nome', 'cpf', 'telefone'],
+        'erro': "Nome, CPF e Telefone são obrigatórios.",
+        'properties': {
+            'nome': _texto("Nome, CPF e Telefone são obrigatórios."),
+            'cpf': _texto("Nome, CPF e Telefone são obrigatórios."),
+            'telefone': _texto("Nome, CPF e Telefone são obrigatórios."),
+        },
+    }, {'cpf': cpf, 'telefone': telefone}),
+    'cliente_atualizacao': ({
+        'type': 'object',
+        'properties': {
+            'nome': _texto("O nome do cliente não pode ficar vazio."),
+            'cpf': {'type': 'string', 'erro': "CPF deve conter exatamente 11 dígitos."},
+            'telefone': {'type': 'string', 'erro': "Telefone deve conter entre 8 e 11 dígitos numéricos."},
+        },
+    }, {'cpf': cpf, 'telefone': telefone}),
+    'clientes_lote': ({
+        'type': 'object',
+        'required': ['clientes'],
+        'erro': "Informe a lista de clientes.",
+        'properties': {
+            'clientes': {
+                'type': 'array', 'minItems': 1, 'maxItems': LIMITE_LOTE,
+                'erro': f"Informe de 1 a {LIMITE_LOTE} clientes.",
+                'items': {
+                    'type': 'object',
+                    'required': ['nome', 'cpf', 'telefone'],
+                    'erro': "Nome, CPF e Telefone são obrigatórios.",
+                    'properties': {
+                        'nome': _texto("Nome, CPF e Telefone são obrigatórios."),
+                        'cpf': _texto("Nome, CPF e Telefone são obrigatórios."),
+                        'telefone': _texto("Nome, CPF e Telefone são obrigatórios."),
+                    },
+                },
+            },
+        },
+    }, {'clientes': {'cpf': cpf, 'telefone': telefone}}),
+    'marmore': ({
+        'type': 'object',
+        'required': ['nome', 'preco_m2', 'quantidade'],
+        'erro': "Nome, preco_m2 e quantidade são obrigatórios.",
+        'properties': {
+            'nome': _texto("Nome, preco_m2 e quantidade são obrigatórios."),
+            'preco_m2': _numero("preco_m2 e quantidade devem ser números."),
+            'quantidade': _numero("preco_m2 e quantidade devem ser números."),
+        },
+    }, {'preco_m2': numero, 'quantidade': numero}),
+    'marmore_atualizacao': ({
+        'type': 'object',
+        'properties': {
+            'nome': _texto("O nome do mármore não pode ficar vazio."),
+            'preco_m2': _numero("preco_m2 e quantidade devem ser números."),
+            'quantidade': _numero("preco_m2 e quantidade devem ser números."),
+        },
+    }, {'preco_m2': numero, 'quantidade': numero}),
+    'estoque': ({
+        'type': 'object',
+        'required': ['nome', 'quantidade', 'unidade_medida', 'preco_unitario'],
+        'erro': "Nome, quantidade, unidade de medida e preço unitário são obrigatórios.",
+        'properties': {
+            'nome': _texto("Nome, quantidade, unidade de medida e preço unitário são obrigatórios."),
+            'unidade_medida': _texto("Nome, quantidade, unidade de medida e preço unitário são obrigatórios."),
+            'quantidade': _numero("Quantidade ou preço unitário inválidos."),
+            'preco_unitario': _numero("Quantidade ou preço unitário inválidos."),
+        },
+    }, {'quantidade': numero, 'preco_unitario': numero}),
+    'estoque_atualizacao': ({
+        'type': 'object',
+        'properties': {
+            'nome': _texto("O nome do item não pode ficar vazio."),
+            'unidade_medida': _texto("A unidade de medida não pode ficar vazia."),
+            'quantidade': _numero("Quantidade ou preço unitário inválidos."),
+            'preco_unitario': _numero("Quantidade ou preço unitário inválidos."),
+        },
+    }, {'quantidade': numero, 'preco_unitario': numero}),
+    'movimentacao': ({
+        'type': 'object',
+        'required': ['item_id', 'tipo_movimentacao', 'quantidade'],
+        'erro': "Item, tipo de movimentação e quantidade são obrigatórios.",
+        'properties': {
+            'item_id': _id("Item, tipo de movimentação e quantidade são obrigatórios."),
+            'tipo_movimentacao': {'enum': ['Entrada', 'Saída'],
+                                  'erro': "Tipo de movimentação inválido. Use 'Entrada' ou 'Saída'."},
+            'quantidade': _numero("A quantidade deve ser um número maior que zero."),
+            'observacoes': {'type': ['string', 'null'], 'erro': "As observações devem ser um texto."},
+        },
+    }, {'quantidade': quantidade}),
+    'arquivamento': ({
+        'type': 'object',
+        'properties': {
+            'meses': {'type': 'integer', 'minimum': 1, 'erro': "Informe 'meses' como um inteiro maior que zero."},
+        },
+    }, {}),
+    'orcamento': ({
+        'type': 'object',
+        'required': ['cliente_id', 'itens'],
+        'erro': "Cliente e itens do orçamento são obrigatórios.",
+        'properties': {
+            'cliente_id': _id("Cliente e itens do orçamento são obrigatórios."),
+            'observacoes': {'type': ['string', 'null'], 'erro': "As observações devem ser um texto."},
+            'itens': {**_ITENS_ORCAMENTO, 'minItems': 1, 'erro': "Cliente e itens do orçamento são obrigatórios."},
+        },
+    }, {}),
+    'orcamento_atualizacao': ({
+        'type': 'object',
+        'properties': {
+            'observacoes': {'type': ['string', 'null'], 'erro': "As observações devem ser um texto."},
+            'itens': _ITENS_ORCAMENTO,
+        },
+    }, {}),
+    'orcamento_status': ({
+        'type': 'object',
+        'required': ['status'],
+        'erro': "Status é obrigatório.",
+        'properties': {
+            'status': {'enum': ['Pendente', 'Aprovado', 'Rejeitado'],
+                       'erro': "Status inválido. Use 'Pendente', 'Aprovado' ou 'Rejeitado'."},
+        },
+    }, {}),
+    'pedido': ({
+        'type': 'object',
+        'required': ['orcamento_id'],
+        'erro': "O ID do orçamento é obrigatório.",
+        'properties': {
+            'orcamento_id': _id("O ID do orçamento é obrigatório."),
+        },
+    }, {}),
+    'pedido_status': (_TRANSICAO, {}),
+    'pagamento': ({
+        'type': 'object',
+        'required': ['valor', 'metodo_pagamento'],
+        'erro': "Valor e método de pagamento são obrigatórios.",
+        'properties': {
+            # O valor segue como veio: o serviço o converte para Decimal
+            'valor': _numero("Valor inválido."),
+            'metodo_pagamento': _texto("Método de pagamento é obrigatório."),
+        },
+    }, {}),
+    'entrega': ({
+        'type': 'object',
+        'required': ['data_entrega', 'endereco_entrega'],
+        'erro': "Data e endereço de entrega são obrigatórios.",
+        'properties': {
+            'data_entrega': _texto("Data e endereço de entrega são obrigatórios."),
+            'endereco_entrega': _texto("Data e endereço de entrega são obrigatórios."),
+            'latitude': {'type': ['number', 'null'], 'erro': "Coordenadas inválidas."},
+            'longitude': {'type': ['number', 'null'], 'erro': "Coordenadas inválidas."},
+        },
+    }, {}),
+    'entrega_status': (_TRANSICAO, {}),
+}
+
+
+def _e_numero(valor):
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+
+_TIPOS = {
+    'object': lambda v: isinstance(v, dict),
+    'array': lambda v: isinstance(v, list),
+    'string': lambda v: isinstance(v, str),
+    'number': _e_numero,
+    # 2.0 também é 'integer' para o jsonschema: aqui cai no caminho lento, que aceita
+    'integer': lambda v: isinstance(v, int) and not isinstance(v, bool),
+    'null': lambda v: v is None,
+}
+_PALAVRAS_COMPILADAS = {'type', 'required', 'properties', 'items', 'minItems', 'maxItems', 'minLength', 'pattern',
+                        'enum', 'minimum', 'exclusiveMinimum', 'erro'}
+
+
+def _compilar_verificacao(esquema):
+    """
+    Traduz o esquema numa função valor -> bool. Pode ser mais rígida que o
+    jsonschema (um False só manda para o caminho lento), nunca mais
+    permissiva. Devolve None se o esquema usa outra palavra-chave.
+    """
+    if set(esquema) - _PALAVRAS_COMPILADAS:
+        return None
+    testes = []
+
+    tipos = esquema.get('type')
+    if tipos:
+        tipos = [_TIPOS[t] for t in ([tipos] if isinstance(tipos, str) else tipos)]
+        testes.append(tipos[0] if len(tipos) == 1 else (lambda v: any(t(v) for t in tipos)))
+    if 'enum' in esquema:
+        if not all(isinstance(e, str) for e in esquema['enum']):
+            return None
+        opcoes = frozenset(esquema['enum'])
+        testes.append(lambda v: isinstance(v, str) and v in opcoes)
+    if 'minLength' in esquema:
+        tamanho = esquema['minLength']
+        testes.append(lambda v: not isinstance(v, str) or len(v) >= tamanho)
+    if 'pattern' in esquema:
+        padrao = re.compile(esquema['pattern'])
+        testes.append(lambda v: not isinstance(v, str) or padrao.search(v) is not None)
+    if 'minimum' in esquema:
+        minimo = esquema['minimum']
+        testes.append(lambda v: not _e_numero(v) or v >= minimo)
+    if 'exclusiveMinimum' in esquema:
+        limite = esquema['exclusiveMinimum']
+        testes.append(lambda v: not _e_numero(v) or v > limite)
+    if 'minItems' in esquema:
+        minimo_itens = esquema['minItems']
+        testes.append(lambda v: not isinstance(v, list) or len(v) >= minimo_itens)
+    if 'maxItems' in esquema:
+        maximo_itens = esquema['maxItems']
+        testes.append(lambda v: not isinstance(v, list) or len(v) <= maximo_itens)
+    if 'items' in esquema:
+        item = _compilar_verificacao(esquema['items'])
+        if item is None:
+            return None
+        testes.append(lambda v: not isinstance(v, list) or all(map(item, v)))
+    if 'required' in esquema:
+        obrigatorios = tuple(esquema['required'])
+        testes.append(lambda v: not isinstance(v, dict) or all(c in v for c in obrigatorios))
+    if 'properties' in esquema:
+        campos = []
+        for campo, subesquema in esquema['properties'].items():
+            verificar = _compilar_verificacao(subesquema)
+            if verificar is None:
+                return None
+            campos.append((campo, verificar))
+        campos = tuple(campos)
+        testes.append(lambda v: not isinstance(v, dict) or all(c not in v or f(v[c]) for c, f in campos))
+
+    testes = tuple(testes)
+    return lambda v: all(t(v) for t in testes)
+
+
+def _compilar(esquemas):
+    compilados = {}
+    for nome, (esquema, normalizadores) in esquemas.items():
+        Draft202012Validator.check_schema(esquema)
+        compilados[nome] = (_compilar_verificacao(esquema), Draft202012Validator(esquema),
+                            tuple(normalizadores.items()))
+    return compilados
+
+
+# Feito na importação: um esquema malformado impede a app de subir
+_VALIDADORES = _compilar(ESQUEMAS)
+
+
+def _mensagem(erro):
+    # 'required' aponta para o objeto; os demais, para o subesquema do campo
+    return erro.schema.get('erro') or erro.message
+
+
+def validar(nome, dados):
+    """
+    Valida 'dados' contra o esquema 'nome' e devolve uma cópia normalizada.
+    Levanta ErroValidacao (400) com a mensagem do primeiro campo inválido.
+    """
+    verificar, validador, normalizadores = _VALIDADORES[nome]
+    if not isinstance(dados, dict):
+        raise ErroValidacao("O corpo da requisição deve ser um objeto JSON.")
+
+    erros = [] if verificar and verificar(dados) else list(validador.iter_errors(dados))
+    if erros:
+        erro = best_match(erros)
+        # Listas (itens do orçamento, ids): aponta todos os elementos inválidos de uma vez
+        indices = sorted({e.path[1] for e in erros if len(e.path) > 1 and isinstance(e.path[1], int)})
+        if indices:
+            raise ErroValidacao(_mensagem(erro), campo=erro.path[0] if erro.path else None, invalidos=indices)
+        raise ErroValidacao(_mensagem(erro))
+
+    dados = dict(dados)
+    for campo, normalizar in normalizadores:
+        if dados.get(campo) is None:
+            continue
+        if isinstance(normalizar, dict):
+            dados[campo] = _normalizar_lista(campo, dados[campo], normalizar)
+        else:
+            dados[campo] = normalizar(dados[campo])
+    return dados
+
+
+def _normalizar_lista(campo, itens, normalizadores):
+    """Normaliza cada item da lista; se algum falhar, aponta todos os que falharam."""
+    resultado, invalidos, primeira = [], [], None
+    for indice, item in enumerate(itens):
+        item = dict(item)
+        try:
+            for subcampo, normalizar in normalizadores.items():
+                if item.get(subcampo) is not None:
+                    item[subcampo] = normalizar(item[subcampo])
+        except ErroValidacao as e:
+            invalidos.append(indice)
+            primeira = primeira or e.mensagem
+        resultado.append(item)
+    if invalidos:
+        raise ErroValidacao(primeira, campo=campo, invalidos=invalidos)
+    return resultado
+
+
+def init_app(app):
+    @app.errorhandler(ErroValidacao)
+    def tratar_erro_validacao(e):
+        return jsonify({"erro": e.mensagem, **e.detalhes}), e.status
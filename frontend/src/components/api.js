@@ -100,6 +100,27 @@ const ApiClient = {
         delete: (id) => api.delete(`/funcionarios/${id}`),
     },
 
+    tarefas: { // Tarefas em segundo plano (aprovações grandes, exclusões com histórico)
+        getAll: () => api.get('/tarefas'),
+        getById: (id) => api.get(`/tarefas/${id}`),
+    },
+
+    pedidos: { // Pedidos gerados a partir de orçamentos aprovados
+        getAll: (params) => api.get('/pedidos', { params }),
+        getById: (id) => api.get(`/pedidos/${id}`),
+        createFromOrcamento: (orcamentoId) => api.post('/pedidos', { orcamento_id: orcamentoId }),
+        updateStatus: (ids, status) => api.put('/pedidos/status', { ids, status }),
+        getPagamentos: (id) => api.get(`/pedidos/${id}/pagamentos`),
+        createPagamento: (id, pagamentoData) => api.post(`/pedidos/${id}/pagamentos`, pagamentoData),
+        deletePagamento: (pagamentoId) => api.delete(`/pagamentos/${pagamentoId}`),
+        createEntrega: (id, entregaData) => api.post(`/pedidos/${id}/entregas`, entregaData),
+    },
+
+    entregas: {
+        getAll: (params) => api.get('/entregas', { params }),
+        updateStatus: (ids, status) => api.put('/entregas/status', { ids, status }),
+    },
+
     movimentacoes: {
         getAll: () => api.get('/movimentacoes'),
         create: (movData) => api.post('/movimentacoes', movData),
@@ -80,8 +80,8 @@ function Marmores() {
   const handleDelete = async (id) => {
     if (window.confirm('Tem certeza que deseja excluir este item de estoque?')) {
       try {
-        await ApiClient.estoque.delete(id);
-        alert('Item de estoque excluído com sucesso!');
+        const response = await ApiClient.estoque.delete(id);
+        alert(response.data.mensagem || 'Item de estoque excluído com sucesso!');
         fetchEstoqueMarmores();
       } catch (error) {
         console.error('Erro ao excluir item de estoque:', error.response ? error.response.data : error);
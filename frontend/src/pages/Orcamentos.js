@@ -221,7 +221,18 @@ function Orcamentos() {
   };
 
   // Função para pré-popular o formulário para edição
-  const handleEdit = useCallback((orcamento) => {
+  // A listagem não traz o log de cálculo dos itens: busca o orçamento completo
+  // para que salvar a edição não apague os logs.
+  const handleEdit = useCallback(async (orcamentoResumo) => {
+    let orcamento;
+    try {
+      const response = await ApiClient.orcamentos.getById(orcamentoResumo.id);
+      orcamento = response.data;
+    } catch (err) {
+      console.error('Erro ao buscar orçamento para edição:', err.response ? err.response.data : err);
+      setError('Erro ao buscar orçamento para edição.');
+      return;
+    }
     setEditId(orcamento.id);
     setClienteSelecionadoId(orcamento.cliente_id.toString());
     setObservacoes(orcamento.observacoes || '');
@@ -254,8 +265,13 @@ function Orcamentos() {
   const handleAprovar = useCallback(async (orcamento) => {
     if (window.confirm(`Tem certeza que deseja APROVAR o orçamento #${orcamento.id}?`)) {
       try {
-        await ApiClient.orcamentos.updateStatus(orcamento.id, 'Aprovado');
-        alert(`Orçamento #${orcamento.id} aprovado com sucesso!`);
+        const response = await ApiClient.orcamentos.updateStatus(orcamento.id, 'Aprovado');
+        if (response.status === 202) {
+          // Orçamentos grandes são aprovados em segundo plano pelo backend
+          alert(`${response.data.mensagem} Acompanhe pela tarefa #${response.data.tarefa.id}.`);
+        } else {
+          alert(`Orçamento #${orcamento.id} aprovado com sucesso!`);
+        }
         fetchOrcamentos();
       } catch (err) {
         console.error('Erro ao aprovar orçamento:', err.response ? err.response.data : err);